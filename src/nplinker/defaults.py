@@ -15,6 +15,7 @@ GNPS_ANNOTATIONS_FILENAME: Final = "annotations.tsv"
 GNPS_FILE_MAPPINGS_TSV: Final = "file_mappings.tsv"
 GNPS_FILE_MAPPINGS_CSV: Final = "file_mappings.csv"
 STRAINS_SELECTED_FILENAME: Final = "strains_selected.json"
+BGC_CACHE_FILENAME: Final = "bgc_cache.sqlite"
 
 
 DOWNLOADS_DIRNAME: Final = "downloads"
@@ -1,8 +1,10 @@
 from .bgc import BGC
+from .bgc_cache import BGCCache
 from .gcf import GCF
 
 
 __all__ = [
     "BGC",
+    "BGCCache",
     "GCF",
 ]
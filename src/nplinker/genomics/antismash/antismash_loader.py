@@ -2,12 +2,16 @@ from __future__ import annotations
 import fnmatch
 import logging
 import os
+from collections.abc import Iterable
 from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
 from os import PathLike
 from pathlib import Path
+from typing import Any
 from Bio import SeqIO
 from Bio import SeqRecord
 from nplinker.genomics import BGC
+from nplinker.genomics.bgc_cache import BGCCache
 from nplinker.strain import Strain
 from nplinker.utils import list_dirs
 from nplinker.utils import list_files
@@ -20,11 +24,24 @@ logger = logging.getLogger(__name__)
 class AntismashBGCLoader(BGCLoaderBase):
     """Data loader for AntiSMASH BGC genbank (.gbk) files."""
 
-    def __init__(self, data_dir: str | PathLike) -> None:
+    def __init__(
+        self,
+        data_dir: str | PathLike,
+        n_jobs: int = 1,
+        cache_file: str | PathLike | None = None,
+    ) -> None:
         """Initialize the AntiSMASH BGC loader.
 
         Args:
             data_dir: Path to AntiSMASH directory that contains a collection of AntiSMASH outputs.
+            n_jobs: The number of worker processes used to parse the gbk files. -1 means using
+                all CPU cores. The BGCs are returned in the same order regardless of `n_jobs`.
+            cache_file: Path to the SQLite file of a [`BGCCache`][nplinker.genomics.BGCCache].
+                If given, only the gbk files that are not in the cache or have changed since are
+                parsed, and the cache is updated with them. Defaults to None, i.e. no cache.
+
+        Raises:
+            ValueError: If `n_jobs` is invalid, or if any of the gbk files cannot be parsed.
 
         Notes:
             The input `data_dir` must follow the structure defined in the
@@ -41,7 +58,9 @@ class AntismashBGCLoader(BGCLoaderBase):
         """
         self.data_dir = str(data_dir)
         self._file_dict = self._parse_data_dir(self.data_dir)
-        self._bgcs = self._parse_bgcs(self._file_dict)
+        self._bgcs = self._parse_bgcs(
+            self._file_dict, n_jobs, BGCCache(cache_file, self.data_dir) if cache_file else None
+        )
 
     def get_bgc_genome_mapping(self) -> dict[str, str]:
         """Get the mapping from BGC to genome.
@@ -74,13 +93,14 @@ class AntismashBGCLoader(BGCLoaderBase):
                 a collection of AntiSMASH outputs
 
         Returns:
-            The key is BGC name (gbk file name) and value is path to the gbk file.
+            The key is BGC name (gbk file name) and value is path to the gbk file. The files are
+            sorted by directory and file name, so that the order does not depend on the file system.
         """
         bgc_files = {}
-        subdirs = list_dirs(data_dir)
+        subdirs = sorted(list_dirs(data_dir))
         for subdir in subdirs:
             # get all .gbk files
-            files = list_files(subdir, suffix=".gbk", keep_parent=False)
+            files = sorted(list_files(subdir, suffix=".gbk", keep_parent=False))
             # filter BGC's .gbk files
             files = fnmatch.filter(files, "*.region???.gbk")
             for f in files:
@@ -99,22 +119,62 @@ class AntismashBGCLoader(BGCLoaderBase):
         return self._bgcs
 
     @staticmethod
-    def _parse_bgcs(bgc_files: Mapping[str, str]) -> list[BGC]:
+    def _parse_bgcs(
+        bgc_files: Mapping[str, str], n_jobs: int = 1, cache: BGCCache | None = None
+    ) -> list[BGC]:
         """Load given BGC files as BGC objects.
 
+        The files are parsed in a pool of `n_jobs` worker processes if `n_jobs` > 1. All files are
+        parsed before any error is raised, so that the errors of all invalid files are reported
+        together.
+
         Args:
             bgc_files: key is BGC name and value is path to the
                 BGC gbk file, see method :meth:`.bgc_files`.
+            n_jobs: The number of worker processes, -1 means using all CPU cores.
+            cache: The cache of parsed files. The cached files are not parsed again.
 
         Returns:
-            A list of BGC objects
+            A list of BGC objects, in the order of `bgc_files`.
+
+        Raises:
+            ValueError: If `n_jobs` is invalid, or if any of the gbk files cannot be parsed.
         """
-        return [parse_bgc_genbank(file) for file in bgc_files.values()]
+        n_workers = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+        if n_workers < 1:
+            raise ValueError(f"`n_jobs` must be a positive integer or -1, got {n_jobs}.")
+        cached = cache.get(bgc_files.values()) if cache is not None else {}
+        files = [file for file in bgc_files.values() if file not in cached]
+
+        if n_workers == 1 or len(files) <= 1:
+            results = [_parse_bgc_genbank_or_error(file) for file in files]
+        else:
+            logger.info(f"Parsing {len(files)} antiSMASH gbk files with {n_workers} worker(s).")
+            # send the files in batches to reduce the inter-process communication
+            batch_size = max(1, min(256, len(files) // (n_workers * 4)))
+            with ProcessPoolExecutor(max_workers=n_workers) as executor:
+                results = list(
+                    executor.map(_parse_bgc_genbank_or_error, files, chunksize=batch_size)
+                )
+
+        errors = [f"{file}: {error}" for file, (_, error) in zip(files, results) if error]
+        if errors:
+            raise ValueError(
+                f"Failed to parse {len(errors)} antiSMASH Genbank file(s):\n" + "\n".join(errors)
+            )
+        parsed = {file: bgc for file, (bgc, _) in zip(files, results)}
+        if cache is not None and parsed:
+            cache.put(parsed)  # type: ignore
+        return [cached.get(file) or parsed[file] for file in bgc_files.values()]  # type: ignore
 
 
 def parse_bgc_genbank(file: str | PathLike) -> BGC:
     """Parse a single BGC gbk file to BGC object.
 
+    Only the header and the feature table of the file are read, with a lightweight scanner that
+    stops before the sequence (`ORIGIN`). If the scanner cannot read the file, it is parsed with
+    Biopython instead.
+
     Args:
         file: Path to BGC gbk file
 
@@ -128,10 +188,14 @@ def parse_bgc_genbank(file: str | PathLike) -> BGC:
     file = Path(file)
     fname = file.stem
 
-    record = SeqIO.read(file, format="genbank")
-    description = record.description  # "DEFINITION" in gbk file
-    antismash_id = record.id  # "VERSION" in gbk file
-    features = _parse_antismash_genbank(record)
+    try:
+        description, antismash_id, features = _scan_antismash_genbank(file)
+    except (ValueError, UnicodeDecodeError) as e:
+        logger.debug(f"Failed to scan GenBank file {file} ({e}), parsing it with Biopython.")
+        record = SeqIO.read(file, format="genbank")
+        description = record.description  # "DEFINITION" in gbk file
+        antismash_id = record.id  # "VERSION" in gbk file
+        features = _parse_antismash_genbank(record)
     product_prediction = features.get("product")
     if product_prediction is None:
         raise ValueError(f"Not found product prediction in antiSMASH Genbank file {file}")
@@ -147,18 +211,157 @@ def parse_bgc_genbank(file: str | PathLike) -> BGC:
     return bgc
 
 
+def _parse_bgc_genbank_or_error(file: str) -> tuple[BGC | None, str | None]:
+    """Parse a BGC gbk file, returning the error message instead of raising it.
+
+    This is used to parse many files (possibly in worker processes) and report all errors at once.
+
+    Returns:
+        A tuple of the BGC object and None if the file is parsed, or None and the error message if
+        the file cannot be parsed.
+    """
+    try:
+        return parse_bgc_genbank(file), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+
 def _parse_antismash_genbank(record: SeqRecord.SeqRecord) -> dict:
-    features = {}
-    for feature in record.features:
-        if feature.type == "region":
+    return _get_antismash_features(
+        (feature.type, feature.qualifiers) for feature in record.features
+    )
+
+
+def _get_antismash_features(features: Iterable[tuple[str, Mapping[str, list[str]]]]) -> dict:
+    """Get the antiSMASH annotations from the (type, qualifiers) pairs of GenBank features."""
+    antismash_features: dict[str, Any] = {}
+    for feature_type, qualifiers in features:
+        if feature_type == "region":
             # biopython assumes region numer is a list, but it's actually an int
-            features["region_number"] = feature.qualifiers.get("region_number")[0]
-            features["product"] = feature.qualifiers.get("product")
-        if feature.type == "cand_cluster":
-            smiles = feature.qualifiers.get("SMILES")
+            antismash_features["region_number"] = qualifiers["region_number"][0]
+            antismash_features["product"] = qualifiers.get("product")
+        if feature_type == "cand_cluster":
+            smiles = qualifiers.get("SMILES")
             # space is not allowed in SMILES spec
             # biopython generates space when reading multi-line SMILES from .gbk
-            if smiles is not None:
-                smiles = tuple(i.replace(" ", "") for i in smiles)
-            features["smiles"] = smiles
-    return features
+            antismash_features["smiles"] = (
+                tuple(i.replace(" ", "") for i in smiles) if smiles is not None else None
+            )
+    return antismash_features
+
+
+# the feature types whose qualifiers are used by `_get_antismash_features`
+_ANTISMASH_FEATURE_TYPES = ("region", "cand_cluster")
+
+
+# the number of bytes at the end of a GenBank file that `_check_genbank_tail` reads
+_GENBANK_TAIL_SIZE = 64 * 1024
+
+
+def _check_genbank_tail(file: Path) -> None:
+    """Check that a GenBank file ends with the end of its only record.
+
+    Biopython refuses to read a file of multiple records as one record, so the scanner does the
+    same. Only the last `_GENBANK_TAIL_SIZE` bytes are read instead of the whole sequence, so
+    another record is only detected if its start (`LOCUS`) or the end of the previous record (`//`)
+    is in that range.
+
+    Args:
+        file: Path to the GenBank file.
+
+    Raises:
+        ValueError: If the file does not end with `//` or if it contains more than one record.
+    """
+    start = max(0, os.path.getsize(file) - _GENBANK_TAIL_SIZE)
+    with open(file, "rb") as f:
+        f.seek(start)
+        # the tail starts a line, unless it is the whole file that starts with the record's LOCUS
+        tail = (b"\n" if start else b"") + f.read()
+    body, end, rest = tail.rpartition(b"\n//")
+    if not end or rest.strip():
+        raise ValueError("the end of the record is not found")
+    if b"\n//" in body or b"\nLOCUS" in body:
+        raise ValueError("the file contains more than one record")
+
+
+def _scan_antismash_genbank(file: Path) -> tuple[str, str, dict]:
+    """Scan the header and the feature table of an antiSMASH GenBank file.
+
+    The file is read line by line until the sequence (`ORIGIN`) starts, and only the qualifiers
+    of the features used by `_get_antismash_features` are kept. The sequence is skipped, only the
+    end of the file is checked by `_check_genbank_tail`. The values are read the same way as
+    Biopython: multi-line values are joined with spaces and the quotes are removed.
+
+    Args:
+        file: Path to the GenBank file.
+
+    Returns:
+        A tuple of the description ("DEFINITION"), the id ("VERSION", or "ACCESSION" or "LOCUS"
+        name if missing) and the antiSMASH features of the record.
+
+    Raises:
+        ValueError: If the file is not a GenBank file of a single record in the expected layout.
+    """
+    ids: dict[str, str] = {}
+    definition: list[str] = []
+    features: list[tuple[str, dict[str, list[str]]]] = []
+    qualifiers: dict[str, list[str]] | None = None
+    key: str | None = None  # the qualifier whose value is being read
+    section = None
+    with open(file, encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\r\n")
+            if section is None and not line.startswith("LOCUS"):
+                raise ValueError("the file does not start with LOCUS")
+            if line.startswith(("ORIGIN", "//")):
+                _check_genbank_tail(file)
+                break
+            if line[:1] not in ("", " "):
+                # a new header keyword
+                section = line[:12].strip()
+                value = line[12:].strip()
+                if section == "DEFINITION":
+                    definition.append(value)
+                elif section in ("LOCUS", "ACCESSION", "VERSION") and value:
+                    ids[section] = value.split()[0]
+                continue
+            if section == "DEFINITION" and line.startswith(" " * 12):
+                definition.append(line.strip())
+            elif section != "FEATURES":
+                continue
+            elif line[5:6] not in ("", " "):
+                # a new feature
+                qualifiers = None
+                key = None
+                feature_type = line[5:21].strip()
+                if feature_type in _ANTISMASH_FEATURE_TYPES:
+                    qualifiers = {}
+                    features.append((feature_type, qualifiers))
+            elif qualifiers is not None:
+                content = line[21:].strip()
+                values = qualifiers.get(key, []) if key else []
+                in_quotes = bool(values) and values[-1].count('"') % 2 == 1
+                if in_quotes:
+                    values[-1] += " " + content
+                elif content.startswith("/"):
+                    key, _, value = content[1:].partition("=")
+                    qualifiers.setdefault(key, []).append(value)
+        else:
+            raise ValueError("the sequence or the end of the record is not found")
+
+    for _, quals in features:
+        for name, values in quals.items():
+            quals[name] = [_unquote(value) for value in values]
+    antismash_id = ids.get("VERSION") or ids.get("ACCESSION") or ids.get("LOCUS")
+    if antismash_id is None:
+        raise ValueError("the id of the record is not found")
+    # Biopython removes the period at the end of the definition
+    description = " ".join(definition).removesuffix(".")
+    return description, antismash_id, _get_antismash_features(features)
+
+
+def _unquote(value: str) -> str:
+    """Remove the quotes of a GenBank qualifier value."""
+    if len(value) >= 2 and value[0] == value[-1] == '"':
+        return value[1:-1].replace('""', '"')
+    return value
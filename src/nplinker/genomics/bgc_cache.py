@@ -0,0 +1,203 @@
+from __future__ import annotations
+import json
+import logging
+import os
+import sqlite3
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from contextlib import contextmanager
+from os import PathLike
+from nplinker.strain import Strain
+from .bgc import BGC
+
+
+logger = logging.getLogger(__name__)
+
+
+class BGCCache:
+    """Persistent cache of the BGC objects parsed from files.
+
+    The attributes of the parsed BGC objects are stored in a SQLite database, keyed by the real
+    path of the parsed file (see `os.path.realpath`), so the entries do not depend on the current
+    working directory or on the symbolic links used to reach the file. Each entry also records the
+    size and the modification time of the file, and is only used while both are unchanged, so a
+    changed file is parsed again.
+
+    The cache is used by the BGC loaders to avoid parsing the antiSMASH GenBank files and the
+    MIBiG metadata files again when the data are loaded again.
+
+    Attributes:
+        file: The path to the SQLite database file.
+        directory: The real path of the directory of the cached files, or None.
+    """
+
+    # version of the stored data, increase it when the stored BGC attributes or their keys change
+    VERSION = 2
+    # seconds to wait for another connection to release its lock on the database
+    TIMEOUT = 60
+
+    def __init__(self, file: str | PathLike, directory: str | PathLike | None = None) -> None:
+        """Initialize the cache, creating the database file if it does not exist.
+
+        Args:
+            file: The path to the SQLite database file.
+            directory: The directory of the cached files. If given, `get` removes the entries of
+                the files in this directory that are not queried, e.g. of deleted files, so the
+                cache does not grow without bound. Files outside of the directory are kept, so
+                one database file can be shared by caches of different directories. Defaults to
+                None, i.e. no entries are removed.
+
+        Examples:
+            >>> cache = BGCCache("output/bgc_cache.sqlite", "antismash")
+            >>> cached = cache.get(files)
+            >>> missing = [file for file in files if file not in cached]
+            >>> cache.put({file: parse_bgc_genbank(file) for file in missing})
+        """
+        self.file = str(file)
+        self.directory = os.path.realpath(directory) if directory else None
+        # the size and modification time of the files queried by `get`, before they are parsed
+        self._file_keys: dict[str, tuple[int, int]] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(self.file)), exist_ok=True)
+        # the version check and the migration run in one write transaction, so that another
+        # connection opening a new database at the same time waits instead of migrating it too
+        with self._connect() as connection:
+            version = connection.execute("PRAGMA user_version").fetchone()[0]
+            if version != self.VERSION:
+                # the entries of an older version are discarded
+                connection.execute("DROP TABLE IF EXISTS bgc")
+                connection.execute(f"PRAGMA user_version = {self.VERSION}")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS bgc "
+                "(path TEXT PRIMARY KEY, size INTEGER, mtime INTEGER, data TEXT)"
+            )
+
+    def get(self, files: Iterable[str]) -> dict[str, BGC]:
+        """Get the cached BGC objects of the given files.
+
+        The size and modification time of the files are recorded here, before the missing files
+        are parsed, and are stored by `put`. So a file changed while it is parsed is parsed again
+        the next time instead of being cached with the time of the change.
+
+        If `directory` is set, the entries of the files in it that are not in `files` are removed.
+
+        Args:
+            files: The paths of the files.
+
+        Returns:
+            The key is the path of a file and the value is the BGC object parsed from it. Files
+            that are not cached, or have changed since they were cached, are not included.
+        """
+        files = list(files)
+        paths = {file: os.path.realpath(file) for file in files}
+        self._file_keys.update((file, _get_file_key(file)) for file in files)
+        with self._connect() as connection:
+            connection.execute("CREATE TEMP TABLE query (path TEXT PRIMARY KEY)")
+            connection.executemany(
+                "INSERT OR IGNORE INTO query VALUES (?)", ((path,) for path in paths.values())
+            )
+            if self.directory is not None:
+                queried = set(paths.values())
+                stale = [
+                    (path,)
+                    for (path,) in connection.execute("SELECT path FROM bgc")
+                    if path not in queried and _is_in_directory(path, self.directory)
+                ]
+                connection.executemany("DELETE FROM bgc WHERE path = ?", stale)
+            rows = {
+                path: (size, mtime, data)
+                for path, size, mtime, data in connection.execute(
+                    "SELECT bgc.path, bgc.size, bgc.mtime, bgc.data FROM bgc "
+                    "JOIN query ON query.path = bgc.path"
+                )
+            }
+
+        bgcs = {}
+        for file, path in paths.items():
+            row = rows.get(path)
+            if row is not None and self._file_keys[file] == row[:2]:
+                bgcs[file] = _bgc_from_dict(json.loads(row[2]))
+        logger.info(f"Found {len(bgcs)} of {len(files)} BGC files in cache {self.file}.")
+        return bgcs
+
+    def put(self, bgcs: Mapping[str, BGC]) -> None:
+        """Add or update the BGC objects parsed from the given files.
+
+        Args:
+            bgcs: The key is the path of a file and the value is the BGC object parsed from it.
+                The files should be queried with `get` before they are parsed, otherwise their
+                size and modification time are taken now.
+        """
+        rows = []
+        for path, bgc in bgcs.items():
+            size, mtime = self._file_keys.get(path) or _get_file_key(path)
+            rows.append((os.path.realpath(path), size, mtime, json.dumps(_bgc_to_dict(bgc))))
+        with self._connect() as connection:
+            connection.executemany("INSERT OR REPLACE INTO bgc VALUES (?, ?, ?, ?)", rows)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """Connect to the database in a write transaction, committing it and closing afterwards.
+
+        The transaction is started with `BEGIN IMMEDIATE`, so it holds the write lock of the
+        database from the start and other connections wait for it for up to `TIMEOUT` seconds.
+        """
+        connection = sqlite3.connect(self.file, timeout=self.TIMEOUT, isolation_level=None)
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                yield connection
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+            connection.execute("COMMIT")
+        finally:
+            connection.close()
+
+
+def _is_in_directory(path: str, directory: str) -> bool:
+    """Check if a real path is in the directory of the given real path."""
+    try:
+        return os.path.commonpath([path, directory]) == directory
+    except ValueError:
+        # the paths are on different drives (Windows)
+        return False
+
+
+def _get_file_key(path: str) -> tuple[int, int]:
+    """Get the (size, modification time in nanoseconds) of a file, or (-1, -1) if it is missing."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return -1, -1
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _bgc_to_dict(bgc: BGC) -> dict:
+    """Get the attributes of a parsed BGC object as a JSON serializable dict."""
+    return {
+        "id": bgc.id,
+        "product_prediction": list(bgc.product_prediction),
+        "mibig_bgc_class": bgc.mibig_bgc_class,
+        "description": bgc.description,
+        "smiles": bgc.smiles,
+        "antismash_file": bgc.antismash_file,
+        "antismash_id": bgc.antismash_id,
+        "antismash_region": bgc.antismash_region,
+        "strain": bgc.strain.id if bgc.strain is not None else None,
+    }
+
+
+def _bgc_from_dict(data: dict) -> BGC:
+    """Create a BGC object from the attributes returned by `_bgc_to_dict`."""
+    bgc = BGC(data["id"], *data["product_prediction"])
+    for attr in ("mibig_bgc_class", "smiles"):
+        value = data[attr]
+        setattr(bgc, attr, tuple(value) if value is not None else None)
+    bgc.description = data["description"]
+    bgc.antismash_file = data["antismash_file"]
+    bgc.antismash_id = data["antismash_id"]
+    bgc.antismash_region = data["antismash_region"]
+    if data["strain"] is not None:
+        bgc.strain = Strain(data["strain"])
+    return bgc
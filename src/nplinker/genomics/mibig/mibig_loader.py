@@ -6,6 +6,7 @@ from nplinker.strain import Strain
 from nplinker.utils import list_files
 from ..abc import BGCLoaderBase
 from ..bgc import BGC
+from ..bgc_cache import BGCCache
 from .mibig_metadata import MibigMetadata
 
 
@@ -22,11 +23,14 @@ class MibigLoader(BGCLoaderBase):
     objects have Strain object as their strain attribute (i.e. `BGC.strain`).
     """
 
-    def __init__(self, data_dir: str | PathLike):
+    def __init__(self, data_dir: str | PathLike, cache_file: str | PathLike | None = None):
         """Initialize the MIBiG metadata loader.
 
         Args:
             data_dir: Path to the directory of MIBiG metadata json files
+            cache_file: Path to the SQLite file of a [`BGCCache`][nplinker.genomics.BGCCache].
+                If given, only the metadata files that are not in the cache or have changed since
+                are parsed, and the cache is updated with them. Defaults to None, i.e. no cache.
 
         Examples:
             >>> loader = MibigLoader("path/to/mibig/data/dir")
@@ -37,8 +41,8 @@ class MibigLoader(BGCLoaderBase):
         """
         self.data_dir = str(data_dir)
         self._file_dict = self.parse_data_dir(self.data_dir)
-        self._metadata_dict = self._parse_metadata()
-        self._bgcs = self._parse_bgcs()
+        self._metadata_dict: dict[str, MibigMetadata] | None = None
+        self._bgcs = self._parse_bgcs(BGCCache(cache_file, self.data_dir) if cache_file else None)
 
     def get_files(self) -> dict[str, str]:
         """Get the path of all MIBiG metadata json files.
@@ -70,9 +74,13 @@ class MibigLoader(BGCLoaderBase):
     def get_metadata(self) -> dict[str, MibigMetadata]:
         """Get MibigMetadata objects.
 
+        The metadata files are parsed on the first call.
+
         Returns:
             The key is BGC accession (file name) and the value is MibigMetadata object
         """
+        if self._metadata_dict is None:
+            self._metadata_dict = self._parse_metadata()
         return self._metadata_dict
 
     def _parse_metadata(self) -> dict[str, MibigMetadata]:
@@ -99,13 +107,21 @@ class MibigLoader(BGCLoaderBase):
         """
         return self._bgcs
 
-    def _parse_bgcs(self) -> list[BGC]:
+    def _parse_bgcs(self, cache: BGCCache | None = None) -> list[BGC]:
         """Parse all metadata files as BGC objects.
 
+        Args:
+            cache: The cache of parsed files. The cached files are not parsed again.
+
         Returns:
             A list of BGC objects
         """
-        return [parse_bgc_metadata_json(file) for file in self._file_dict.values()]
+        files = self._file_dict.values()
+        cached = cache.get(files) if cache is not None else {}
+        parsed = {file: parse_bgc_metadata_json(file) for file in files if file not in cached}
+        if cache is not None and parsed:
+            cache.put(parsed)
+        return [cached.get(file) or parsed[file] for file in files]
 
 
 def parse_bgc_metadata_json(file: str | PathLike) -> BGC:
@@ -1,6 +1,9 @@
 from __future__ import annotations
 import logging
 import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 from deprecated import deprecated
 from dynaconf import Dynaconf
 from nplinker import defaults
@@ -41,6 +44,9 @@ class DatasetLoader:
 
     Attributes:
         config: A Dynaconf object that contains the configuration settings.
+        concurrent: Whether the independent loading steps run concurrently in threads.
+        n_jobs: The number of worker processes used to parse the GNPS spectra and antiSMASH files.
+        bgc_cache_file: The path to the cache of parsed BGC files, or None if no cache is used.
         bgcs: A list of BGC objects.
         gcfs: A list of GCF objects.
         spectra: A list of Spectrum objects.
@@ -60,11 +66,28 @@ class DatasetLoader:
     OR_CANOPUS = "canopus_dir"
     OR_MOLNETENHANCER = "molnetenhancer_dir"
 
-    def __init__(self, config: Dynaconf) -> None:
+    def __init__(
+        self, config: Dynaconf, concurrent: bool = False, n_jobs: int = 1, use_cache: bool = False
+    ) -> None:
         """Initialize the DatasetLoader.
 
         Args:
             config: A Dynaconf object that contains the configuration settings.
+            concurrent: True to run the independent loading steps concurrently in threads: the
+                metabolomics and genomics data are loaded at the same time, and so are the files
+                within each of them (GNPS annotations and molecular families; MIBiG BGCs and
+                BiG-SCAPE GCFs). The loaded data are the same as in the sequential mode. Defaults
+                to False.
+            n_jobs: The number of worker processes used to parse the GNPS spectra file and the
+                antiSMASH files, -1 means using all CPU cores. If `concurrent` is True, the
+                spectra and the antiSMASH files are parsed at the same time, with half of the
+                worker processes each. Defaults to 1, i.e. no worker processes.
+            use_cache: True to cache the parsed antiSMASH and MIBiG BGC files in the output
+                directory, so that only new or changed files are parsed when the data are loaded
+                again. Defaults to False.
+
+        Raises:
+            ValueError: If `n_jobs` is not a positive integer or -1.
 
         Examples:
             >>> from nplinker.config import load_config
@@ -73,11 +96,24 @@ class DatasetLoader:
             >>> loader = DatasetLoader(config)
             >>> loader.load()
 
+            Loading the metabolomics and genomics data concurrently on all CPU cores:
+            >>> loader = DatasetLoader(config, concurrent=True, n_jobs=-1)
+            >>> loader.load()
+
         See Also:
             [DatasetArranger][nplinker.arranger.DatasetArranger]: Download, generate and/or validate
                 datasets to ensure they are ready for loading.
         """
+        if n_jobs < 1 and n_jobs != -1:
+            raise ValueError(f"`n_jobs` must be a positive integer or -1, got {n_jobs}.")
         self.config = config
+        self.concurrent = concurrent
+        self.n_jobs = n_jobs
+        self.bgc_cache_file = (
+            config.root_dir / defaults.OUTPUT_DIRNAME / defaults.BGC_CACHE_FILENAME
+            if use_cache
+            else None
+        )
 
         self.bgcs: list[BGC] = []
         self.gcfs: list[GCF] = []
@@ -102,10 +138,8 @@ class DatasetLoader:
         if not self._load_strain_mappings():
             return False
 
-        if not self._load_metabolomics():
-            return False
-
-        if not self._load_genomics():
+        # the metabolomics and genomics data only depend on the strain mappings
+        if not all(self._run(self._load_metabolomics, self._load_genomics)):
             return False
 
         # set self.strains with all strains from input plus mibig strains in use
@@ -135,6 +169,14 @@ class DatasetLoader:
         logger.info("Loaded {} Strain objects in total".format(len(self.strains)))
         return True
 
+    def _get_n_jobs(self) -> int:
+        """Get the number of worker processes for each of the spectra and antiSMASH parsers.
+
+        In the concurrent mode both parsers run at the same time, so they share the workers.
+        """
+        n_workers = (os.cpu_count() or 1) if self.n_jobs == -1 else self.n_jobs
+        return max(1, n_workers // 2) if self.concurrent else n_workers
+
     def _load_metabolomics(self):
         """Loads metabolomics data to Spectrum and MolecularFamily objects.
 
@@ -151,15 +193,21 @@ class DatasetLoader:
         gnps_dir = self.config.root_dir / defaults.GNPS_DIRNAME
 
         # Step 1: load all Spectrum objects
-        raw_spectra = GNPSSpectrumLoader(gnps_dir / defaults.GNPS_SPECTRA_FILENAME).spectra
+        raw_spectra = GNPSSpectrumLoader(
+            gnps_dir / defaults.GNPS_SPECTRA_FILENAME, n_jobs=self._get_n_jobs()
+        ).spectra
+
         # Step 2: load all GNPS annotations
-        raw_annotations = GNPSAnnotationLoader(
-            gnps_dir / defaults.GNPS_ANNOTATIONS_FILENAME
-        ).annotations
+        def load_annotations():
+            return GNPSAnnotationLoader(gnps_dir / defaults.GNPS_ANNOTATIONS_FILENAME).annotations
+
         # Step 3: load all MolecularFamily objects
-        raw_mfs = GNPSMolecularFamilyLoader(
-            gnps_dir / defaults.GNPS_MOLECULAR_FAMILY_FILENAME
-        ).get_mfs(keep_singleton=False)
+        def load_mfs():
+            return GNPSMolecularFamilyLoader(
+                gnps_dir / defaults.GNPS_MOLECULAR_FAMILY_FILENAME
+            ).get_mfs(keep_singleton=False)
+
+        raw_annotations, raw_mfs = self._run(load_annotations, load_mfs)
 
         # Step 4: add GNPS annotations to Spectrum.gnps_annotations
         add_annotation_to_spectrum(raw_annotations, raw_spectra)
@@ -189,43 +237,49 @@ class DatasetLoader:
         """
         logger.info(f"{'='*40}\nLoading genomics data starts...")
 
-        # Step 1: load antismash BGC objects & add strain info
+        # Step 1: load antismash BGC objects
         logger.info("Parsing AntiSMASH directory...")
         antismash_bgcs = AntismashBGCLoader(
-            str(self.config.root_dir / defaults.ANTISMASH_DIRNAME)
+            str(self.config.root_dir / defaults.ANTISMASH_DIRNAME),
+            n_jobs=self._get_n_jobs(),
+            cache_file=self.bgc_cache_file,
         ).get_bgcs()
-        antismash_bgcs_with_strain, _ = add_strain_to_bgc(self.strains, antismash_bgcs)
 
         # Step 2: load mibig BGC objects (having strain info)
-        if self.config.mibig.to_use:
-            self.mibig_bgcs = MibigLoader(
-                str(self.config.root_dir / defaults.MIBIG_DIRNAME)
+        def load_mibig_bgcs():
+            if not self.config.mibig.to_use:
+                return self.mibig_bgcs
+            return MibigLoader(
+                str(self.config.root_dir / defaults.MIBIG_DIRNAME), cache_file=self.bgc_cache_file
             ).get_bgcs()
 
-        # Step 3: get all BGC objects with strain info
-        all_bgcs_with_strain = antismash_bgcs_with_strain + self.mibig_bgcs
-
-        # Step 4: load all GCF objects
-        bigscape_cluster_file = (
-            self.config.root_dir
-            / defaults.BIGSCAPE_DIRNAME
-            / f"mix_clustering_c{self.config.bigscape.cutoff}.tsv"
-        )
-        bigscape_db_file = self.config.root_dir / defaults.BIGSCAPE_DIRNAME / "data_sqlite.db"
-
-        # switch depending on found file. prefer V1 if both are found
-        if bigscape_cluster_file.exists():
-            loader = BigscapeGCFLoader(bigscape_cluster_file)
-            logger.info(f"Loading BigSCAPE cluster file {bigscape_cluster_file}")
-        elif bigscape_db_file.exists():
-            loader = BigscapeV2GCFLoader(bigscape_db_file)
-            logger.info(f"Loading BigSCAPE database file {bigscape_db_file}")
-        else:
-            raise FileNotFoundError(
-                f"Neither BigSCAPE cluster file {bigscape_cluster_file} nor database file {bigscape_db_file} were found."
+        # Step 3: load all GCF objects
+        def load_gcfs():
+            bigscape_cluster_file = (
+                self.config.root_dir
+                / defaults.BIGSCAPE_DIRNAME
+                / f"mix_clustering_c{self.config.bigscape.cutoff}.tsv"
             )
+            bigscape_db_file = self.config.root_dir / defaults.BIGSCAPE_DIRNAME / "data_sqlite.db"
+
+            # switch depending on found file. prefer V1 if both are found
+            if bigscape_cluster_file.exists():
+                loader = BigscapeGCFLoader(bigscape_cluster_file)
+                logger.info(f"Loading BigSCAPE cluster file {bigscape_cluster_file}")
+            elif bigscape_db_file.exists():
+                loader = BigscapeV2GCFLoader(bigscape_db_file)
+                logger.info(f"Loading BigSCAPE database file {bigscape_db_file}")
+            else:
+                raise FileNotFoundError(
+                    f"Neither BigSCAPE cluster file {bigscape_cluster_file} nor database file {bigscape_db_file} were found."
+                )
+            return loader.get_gcfs()
 
-        raw_gcfs = loader.get_gcfs()
+        self.mibig_bgcs, raw_gcfs = self._run(load_mibig_bgcs, load_gcfs)
+
+        # Step 4: add strain info to antismash BGC objects, and get all BGC objects with strain info
+        antismash_bgcs_with_strain, _ = add_strain_to_bgc(self.strains, antismash_bgcs)
+        all_bgcs_with_strain = antismash_bgcs_with_strain + self.mibig_bgcs
 
         # Step 5: add BGC objects to GCF
         all_gcfs_with_bgc, _, _ = add_bgc_to_gcf(all_bgcs_with_strain, raw_gcfs)
@@ -245,6 +299,28 @@ class DatasetLoader:
         logger.info("Loading genomics data completed\n")
         return True
 
+    def _run(self, *tasks: Callable[[], Any]) -> list[Any]:
+        """Run the given independent tasks, concurrently in threads if `self.concurrent` is True.
+
+        The heavy parsing in the tasks is done outside of the GIL (file I/O, numpy, sqlite), so
+        the tasks run concurrently even though they are in threads. Threads are used instead of
+        processes so that the loaded objects share the same Strain objects. The spectra and
+        antiSMASH parsers start their process pools from these threads; the workers only parse
+        files, and the locks of the logging module are reset in the forked workers.
+
+        Args:
+            tasks: Functions without arguments.
+
+        Returns:
+            The return values of the tasks, in the order of the tasks. If any task raises an
+            exception, the exception of the first such task is raised after all tasks finish.
+        """
+        if not self.concurrent:
+            return [task() for task in tasks]
+        with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+            futures = [executor.submit(task) for task in tasks]
+        return [future.result() for future in futures]
+
     @deprecated(reason="To be refactored. It was used in the `self.load` method before.")
     def _load_class_info(self):
         """Load class match info (based on mibig) and chemical class predictions.
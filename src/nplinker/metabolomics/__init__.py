@@ -1,8 +1,10 @@
 from .molecular_family import MolecularFamily
+from .peak_store import PeakStore
 from .spectrum import Spectrum
 
 
 __all__ = [
     "MolecularFamily",
+    "PeakStore",
     "Spectrum",
 ]
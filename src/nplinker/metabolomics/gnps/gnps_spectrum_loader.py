@@ -1,7 +1,16 @@
 from __future__ import annotations
 import logging
+import os
+import re
+from collections.abc import Iterable
+from collections.abc import Iterator
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from os import PathLike
+from typing import Any
+import numpy as np
 from pyteomics import mgf
+from nplinker.metabolomics import PeakStore
 from nplinker.metabolomics import Spectrum
 from nplinker.metabolomics.abc import SpectrumLoaderBase
 
@@ -26,23 +35,54 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
         - spectra/*.mgf
     """
 
-    def __init__(self, file: str | PathLike) -> None:
+    def __init__(
+        self,
+        file: str | PathLike,
+        fast: bool = True,
+        n_jobs: int = 1,
+        chunk_size: int = 64 * 1024 * 1024,
+    ) -> None:
         """Initialize the GNPSSpectrumLoader.
 
+        The MGF file is parsed only once, and each spectrum is validated while it is parsed. The
+        peaks of all loaded spectra are packed into one
+        [`PeakStore`][nplinker.metabolomics.PeakStore], so the peaks of each spectrum are a view
+        into the store instead of a separate array.
+
+        With the fast reader, the file can be parsed in parallel: it is split at `BEGIN IONS` lines
+        into byte ranges of about `chunk_size` bytes, the ranges are parsed in a pool of `n_jobs`
+        worker processes, and the spectra are merged in file order.
+
         Args:
             file: path to the MGF file.
+            fast: True to parse the file with the built-in streaming MGF reader, which handles the
+                subset of the MGF format written by GNPS. False to parse it with `pyteomics`,
+                which supports the full MGF format but is slower.
+            n_jobs: The number of worker processes used to parse the file with the fast reader.
+                -1 means using all CPU cores. Files smaller than `chunk_size` are always parsed in
+                the current process.
+            chunk_size: The approximate size in bytes of the byte range parsed by each task.
 
         Raises:
-            ValueError: Raises ValueError if the file is not valid.
+            ValueError: Raises ValueError if the file is not valid, or if `n_jobs` or `chunk_size`
+                is invalid.
 
         Examples:
             >>> loader = GNPSSpectrumLoader("gnps_spectra.mgf")
             >>> print(loader.spectra[0])
+            >>> loader = GNPSSpectrumLoader("gnps_spectra.mgf", n_jobs=-1)
         """
         self._file = str(file)
+        self._fast = fast
+        self._n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else n_jobs
+        self._chunk_size = chunk_size
+        if self._n_jobs < 1:
+            raise ValueError(f"`n_jobs` must be a positive integer or -1, got {n_jobs}.")
+        if chunk_size < 1:
+            raise ValueError(f"`chunk_size` must be a positive integer, got {chunk_size}.")
         self._spectra: list[Spectrum] = []
+        self._peak_store = PeakStore.from_peaks([])
 
-        self._validate()
         self._load()
 
     @property
@@ -54,53 +94,95 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
         """
         return self._spectra
 
-    def _validate(self) -> None:
-        """Validate GNPS MGF file.
+    @property
+    def peak_store(self) -> PeakStore:
+        """Get the PeakStore holding the peaks of the loaded spectra, in the order of `spectra`."""
+        return self._peak_store
+
+    def _validate(self, params: dict[str, Any]) -> None:
+        """Validate the parameters of a spectrum in the GNPS MGF file.
+
+        Args:
+            params: the parameters of a single MS/MS query (spectrum).
 
         Raises:
-            ValueError: Raises ValueError if the file is not valid.
+            ValueError: Raises ValueError if the parameters are not valid.
         """
         # check the local scope of a single MS/MS query (spectrum) has the
         # required parameters. Note that this is not the header of the MGF
         # file, but the local scope of each spectrum.
         required_params = ["scans", "pepmass", "charge"]
-        for spec in mgf.MGF(self._file):
-            for param in required_params:
-                if param not in spec["params"]:
-                    raise ValueError(
-                        f"Invalid MGF file '{self._file}'. "
-                        f"Expected parameter '{param}' not found, "
-                        f"but got '{spec['params']}'."
-                    )
+        for param in required_params:
+            if param not in params:
+                raise ValueError(
+                    f"Invalid MGF file '{self._file}'. "
+                    f"Expected parameter '{param}' not found, "
+                    f"but got '{params}'."
+                )
 
     def _load(self) -> None:
         """Load the MGF file into Spectrum objects."""
-        for spec in mgf.MGF(self._file):
+        for params, mz, intensity in self._read():
+            self._validate(params)
+
             # Skip if m/z array is empty, as this is an invalid spectrum.
             # The invalid spectrum does not exist in other GNPS files, e.g.
             # file mappings file and molecular families file. So we can safely
             # skip it.
-            if len(spec["m/z array"]) == 0:
+            if len(mz) == 0:
                 continue
 
             # Load the spectrum
-            spectrum_id: str = spec["params"]["scans"]
+            spectrum_id: str = params["scans"]
             # calculate precursor m/z from precursor mass and charge
-            precursor_mass = spec["params"]["pepmass"][0]
-            precursor_charge = self._get_precursor_charge(spec["params"]["charge"])
+            precursor_mass = params["pepmass"][0]
+            precursor_charge = self._get_precursor_charge(params["charge"])
             precursor_mz: float = precursor_mass / abs(precursor_charge)
-            rt = spec["params"].get("rtinseconds", 0)
+            rt = params.get("rtinseconds", 0)
 
             spectrum = Spectrum(
                 id=spectrum_id,
-                mz=list(spec["m/z array"]),
-                intensity=list(spec["intensity array"]),
+                mz=mz,
+                intensity=intensity,
                 precursor_mz=precursor_mz,
                 rt=rt,
-                metadata=spec["params"],
+                metadata=params,
             )
             self._spectra.append(spectrum)
 
+        self._peak_store = PeakStore.pack(self._spectra)
+
+    def _read(self) -> Iterator[tuple[dict[str, Any], np.ndarray, np.ndarray]]:
+        """Read the spectra of the MGF file, in parallel if possible.
+
+        Yields:
+            A tuple of the parameters, the m/z array and the intensity array of each spectrum, in
+            the order of the file.
+        """
+        if not self._fast:
+            yield from _read_mgf_pyteomics(self._file)
+            return
+
+        offsets = _find_chunk_offsets(self._file, self._chunk_size)
+        if self._n_jobs == 1 or len(offsets) <= 2:
+            with open(self._file, encoding="utf-8") as f:
+                yield from _read_mgf(f)
+            return
+
+        header = _read_mgf_header(self._file)
+        logger.info(
+            f"Parsing {len(offsets) - 1} chunks of MGF file '{self._file}' "
+            f"with {self._n_jobs} worker(s)."
+        )
+        with ProcessPoolExecutor(max_workers=self._n_jobs) as executor:
+            chunks = executor.map(
+                _read_mgf_chunk, repeat(self._file), offsets[:-1], offsets[1:], repeat(header)
+            )
+            for params_list, peaks, peak_offsets in chunks:
+                for i, params in enumerate(params_list):
+                    spec_peaks = peaks[peak_offsets[i] : peak_offsets[i + 1]]
+                    yield params, spec_peaks[:, 0], spec_peaks[:, 1]
+
     def _get_precursor_charge(self, charges: list[int]) -> int:
         """Get the precursor charge from the charge list.
 
@@ -118,3 +200,188 @@ class GNPSSpectrumLoader(SpectrumLoaderBase):
             )
             charge = 1
         return charge
+
+
+def _read_mgf_pyteomics(file: str) -> Iterator[tuple[dict[str, Any], np.ndarray, np.ndarray]]:
+    """Read the spectra of an MGF file with `pyteomics`.
+
+    Args:
+        file: path to the MGF file.
+
+    Yields:
+        A tuple of the parameters, the m/z array and the intensity array of each spectrum.
+    """
+    for spec in mgf.MGF(file):
+        yield spec["params"], spec["m/z array"], spec["intensity array"]
+
+
+def _read_mgf(
+    lines: Iterable[str], header: dict[str, str] | None = None
+) -> Iterator[tuple[dict[str, Any], np.ndarray, np.ndarray]]:
+    """Read the spectra from the lines of an MGF file with a streaming line reader.
+
+    Only the subset of the MGF format written by GNPS is supported: `KEY=VALUE` parameter lines
+    and whitespace separated peak lines between `BEGIN IONS` and `END IONS`, optionally preceded
+    by global parameters that apply to all spectra. The parameters are parsed the same way as
+    `pyteomics`: keys are lowercased, `pepmass` is a tuple of (mass, intensity), `charge` is a list
+    of charges, `rtinseconds` is a float and the other values are kept as strings.
+
+    Args:
+        lines: the lines of the MGF file, or of a part of it that starts at a `BEGIN IONS` line.
+        header: the global parameters of the file, if the lines do not start at the beginning of
+            the file.
+
+    Yields:
+        A tuple of the parameters, the m/z array and the intensity array of each spectrum. The
+        arrays are views into a single array of shape (n_peaks, 2).
+    """
+    header = dict(header or {})
+    params: dict[str, str] | None = None
+    peak_lines: list[str] = []
+    for line in lines:
+        line = line.strip()
+        if not line or line[0] in _MGF_COMMENT_CHARS:
+            continue
+        if params is None:
+            if line == "BEGIN IONS":
+                params = {}
+                peak_lines = []
+            elif "=" in line:
+                key, value = line.split("=", 1)
+                header[key.lower()] = value.strip()
+            continue
+        if line == "END IONS":
+            peaks = _parse_peaks(peak_lines)
+            yield _parse_params({**header, **params}), peaks[:, 0], peaks[:, 1]
+            params = None
+        elif "=" in line:
+            key, value = line.split("=", 1)
+            params[key.lower()] = value.strip()
+        else:
+            peak_lines.append(line)
+
+
+def _read_mgf_header(file: str) -> dict[str, str]:
+    """Read the global parameters before the first spectrum of an MGF file."""
+    header: dict[str, str] = {}
+    with open(file, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line == "BEGIN IONS":
+                break
+            if line and line[0] not in _MGF_COMMENT_CHARS and "=" in line:
+                key, value = line.split("=", 1)
+                header[key.lower()] = value.strip()
+    return header
+
+
+def _read_mgf_chunk(
+    file: str, start: int, end: int, header: dict[str, str]
+) -> tuple[list[dict[str, Any]], np.ndarray, np.ndarray]:
+    """Read the spectra in a byte range of an MGF file, used by the worker processes.
+
+    Args:
+        file: path to the MGF file.
+        start: the start position of the byte range, at the beginning of a `BEGIN IONS` line.
+        end: the end position (exclusive) of the byte range.
+        header: the global parameters of the file.
+
+    Returns:
+        A tuple of the parameters of the spectra, the peaks of all spectra in an array of shape
+        (n_peaks, 2) and the positions of the first peak of each spectrum in the array, with the
+        total number of peaks appended. The peaks are returned in one array to keep the results
+        cheap to send back to the main process.
+    """
+    with open(file, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+    params_list = []
+    peaks_list = []
+    for params, mz, intensity in _read_mgf(text.splitlines(), header):
+        params_list.append(params)
+        peaks_list.append(np.column_stack([mz, intensity]))
+    store = PeakStore.from_peaks(peaks_list)
+    return params_list, store.peaks, store.offsets
+
+
+def _find_chunk_offsets(file: str, chunk_size: int) -> list[int]:
+    """Split an MGF file into byte ranges of about `chunk_size` bytes at `BEGIN IONS` lines.
+
+    Args:
+        file: path to the MGF file.
+        chunk_size: the approximate size of the byte ranges.
+
+    Returns:
+        The start positions of the byte ranges, with the file size appended.
+    """
+    marker = b"\nBEGIN IONS"
+    size = os.path.getsize(file)
+    offsets = [0]
+    with open(file, "rb") as f:
+        pos = chunk_size
+        while pos < size:
+            # scan forward from `pos` for the next line starting with `BEGIN IONS`
+            f.seek(pos - 1)
+            base = pos - 1
+            tail = b""
+            found = -1
+            while found == -1:
+                block = f.read(1024 * 1024)
+                if not block:
+                    break
+                buffer = tail + block
+                found = buffer.find(marker)
+                if found == -1:
+                    base += len(buffer) - len(marker) + 1
+                    tail = buffer[-(len(marker) - 1) :]
+                else:
+                    found += base
+            if found == -1:
+                break
+            offsets.append(found + 1)
+            pos = found + 1 + chunk_size
+    offsets.append(size)
+    return offsets
+
+
+# lines starting with these characters are comments in the MGF format
+_MGF_COMMENT_CHARS = "#;!/"
+_CHARGE_PATTERN = re.compile(r"^([+-]?)(\d+)([+-]?)$")
+
+
+def _parse_params(params: dict[str, str]) -> dict[str, Any]:
+    """Convert the values of the MGF parameters that have a numeric meaning."""
+    parsed: dict[str, Any] = dict(params)
+    if "pepmass" in params:
+        values = [float(x) for x in params["pepmass"].split()]
+        parsed["pepmass"] = (values[0], values[1] if len(values) > 1 else None)
+    if "charge" in params:
+        parsed["charge"] = _parse_charges(params["charge"])
+    if "rtinseconds" in params:
+        parsed["rtinseconds"] = float(params["rtinseconds"])
+    return parsed
+
+
+def _parse_charges(value: str) -> list[int]:
+    """Parse an MGF charge value like `2+`, `1-` or `2+ and 3+` into a list of charges."""
+    charges = []
+    for token in re.split(r"\s*(?:,|\band\b)\s*", value.strip()):
+        match = _CHARGE_PATTERN.match(token)
+        if match is None:
+            raise ValueError(f"Invalid charge value '{value}'.")
+        sign = -1 if "-" in (match.group(1), match.group(3)) else 1
+        charges.append(sign * int(match.group(2)))
+    return charges
+
+
+def _parse_peaks(lines: list[str]) -> np.ndarray:
+    """Parse the peak lines of a spectrum into an array of shape (n_peaks, 2)."""
+    try:
+        values = np.array(" ".join(lines).split(), dtype=np.float64)
+    except ValueError:
+        # the extra columns are not numbers, e.g. fragment charge `1+` or annotations
+        values = None
+    if values is None or len(values) != 2 * len(lines):
+        # some peak lines have more columns (e.g. fragment charge), keep only m/z and intensity
+        values = np.array([line.split()[:2] for line in lines], dtype=np.float64)
+    return values.reshape(-1, 2)
@@ -0,0 +1,149 @@
+from __future__ import annotations
+import os
+from collections.abc import Sequence
+from os import PathLike
+from typing import TYPE_CHECKING
+import numpy as np
+
+
+if TYPE_CHECKING:
+    from .spectrum import Spectrum
+
+
+class PeakStore:
+    """Class to store the peaks of many spectra in contiguous arrays.
+
+    The peaks of all spectra are stored in one 2D array of shape (n_peaks, 2), where each row is
+    a peak of (m/z, intensity) values, and the peaks of the i-th spectrum are the rows
+    `offsets[i]:offsets[i+1]`. So the peaks, m/z values and intensities of a spectrum are all
+    views into the store, without copying.
+
+    The store can be saved to a directory and loaded as memory-mapped arrays, so the peaks are
+    only read from disk when they are used.
+
+    Attributes:
+        peaks: 2D array of the peaks of all spectra, each row is a peak of (m/z, intensity).
+        offsets: 1D array of the positions of the first peak of each spectrum in `peaks`, with
+            the total number of peaks appended.
+    """
+
+    PEAKS_FILE = "peaks.npy"
+    OFFSETS_FILE = "offsets.npy"
+
+    def __init__(self, peaks: np.ndarray, offsets: np.ndarray) -> None:
+        """Initialize the PeakStore.
+
+        Args:
+            peaks: 2D array of shape (n_peaks, 2) of the peaks of all spectra.
+            offsets: 1D array of shape (n_spectra + 1,) of the positions of the first peak of each
+                spectrum in `peaks`, with the total number of peaks appended.
+
+        Raises:
+            ValueError: If the shapes of `peaks` and `offsets` do not match.
+
+        Examples:
+            >>> store = PeakStore(np.array([[100, 0.1], [200, 0.2], [150, 1.0]]), np.array([0, 2, 3]))
+            >>> store[0]
+            array([[1.0e+02, 1.0e-01],
+                   [2.0e+02, 2.0e-01]])
+        """
+        if peaks.ndim != 2 or peaks.shape[1] != 2:
+            raise ValueError(f"Expected peaks of shape (n_peaks, 2), got {peaks.shape}.")
+        if offsets.ndim != 1 or len(offsets) == 0 or offsets[0] != 0 or offsets[-1] != len(peaks):
+            raise ValueError(
+                f"Expected offsets starting at 0 and ending at the number of peaks {len(peaks)}."
+            )
+        self.peaks = peaks
+        self.offsets = offsets
+
+    def __len__(self) -> int:
+        """Get the number of spectra."""
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> np.ndarray:
+        """Get the peaks of the spectrum at the given index, as a view into the store."""
+        return self.peaks[self.offsets[index] : self.offsets[index + 1]]
+
+    @classmethod
+    def from_peaks(
+        cls, peaks_list: Sequence[np.ndarray], dtype: type[np.floating] = np.float64
+    ) -> PeakStore:
+        """Create a PeakStore from the peaks of spectra.
+
+        Args:
+            peaks_list: A sequence of 2D arrays of shape (n, 2), the peaks of each spectrum.
+            dtype: The data type of the stored peaks, e.g. `np.float32` to halve the memory use.
+
+        Returns:
+            A PeakStore object with the peaks copied into contiguous arrays.
+        """
+        lengths = np.array([len(peaks) for peaks in peaks_list], dtype=np.int64)
+        offsets = np.concatenate([[0], np.cumsum(lengths)])
+        peaks = np.empty((offsets[-1], 2), dtype=dtype)
+        for i, spectrum_peaks in enumerate(peaks_list):
+            peaks[offsets[i] : offsets[i + 1]] = spectrum_peaks
+        return cls(peaks, offsets)
+
+    @classmethod
+    def pack(cls, spectra: Sequence[Spectrum], dtype: type[np.floating] = np.float64) -> PeakStore:
+        """Copy the peaks of the spectra into a new PeakStore and use it for the spectra.
+
+        After packing, the peaks of each spectrum are views into the store, so the memory of the
+        peaks is held by the store only.
+
+        Args:
+            spectra: The spectra to pack. The spectra are changed in place.
+            dtype: The data type of the stored peaks.
+
+        Returns:
+            The PeakStore object with the peaks of the spectra, in the order of the spectra.
+
+        Examples:
+            >>> store = PeakStore.pack(spectra, dtype=np.float32)
+            >>> store.save("path/to/peak_store")
+        """
+        store = cls.from_peaks([spectrum.peaks for spectrum in spectra], dtype)
+        store.assign(spectra)
+        return store
+
+    def assign(self, spectra: Sequence[Spectrum]) -> None:
+        """Use the peaks in the store for the given spectra.
+
+        Args:
+            spectra: The spectra whose peaks are stored in the store, in the same order. The
+                spectra are changed in place.
+
+        Raises:
+            ValueError: If the number of spectra does not match the store.
+        """
+        if len(spectra) != len(self):
+            raise ValueError(
+                f"The number of spectra ({len(spectra)}) does not match the store ({len(self)})."
+            )
+        for i, spectrum in enumerate(spectra):
+            spectrum.peaks = self[i]
+
+    def save(self, path: str | PathLike) -> None:
+        """Save the store to a directory as `.npy` files.
+
+        Args:
+            path: The path to the directory. It is created if it does not exist.
+        """
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, self.PEAKS_FILE), self.peaks)
+        np.save(os.path.join(path, self.OFFSETS_FILE), self.offsets)
+
+    @classmethod
+    def load(cls, path: str | PathLike, mmap: bool = True) -> PeakStore:
+        """Load a store saved with `save`.
+
+        Args:
+            path: The path to the directory of the store.
+            mmap: Whether to memory-map the peaks (read-only) instead of reading them into memory.
+
+        Returns:
+            The loaded PeakStore object.
+        """
+        peaks = np.load(os.path.join(path, cls.PEAKS_FILE), mmap_mode="r" if mmap else None)
+        offsets = np.load(os.path.join(path, cls.OFFSETS_FILE))
+        return cls(peaks, offsets)
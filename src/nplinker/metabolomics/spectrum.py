@@ -1,5 +1,5 @@
 from __future__ import annotations
-from functools import cached_property
+from collections.abc import Sequence
 from typing import TYPE_CHECKING
 import numpy as np
 from nplinker.strain import Strain
@@ -13,10 +13,14 @@ if TYPE_CHECKING:
 class Spectrum:
     """Class to model MS/MS Spectrum.
 
+    The peaks are stored in one 2D array, and `mz` and `intensity` are views of its columns. The
+    peaks of many spectra can be stored in one [`PeakStore`][nplinker.metabolomics.PeakStore],
+    in which case the peaks of each spectrum are views into the store.
+
     Attributes:
         id: the spectrum ID.
-        mz: the list of m/z values.
-        intensity: the list of intensity values.
+        mz: 1D array of m/z values.
+        intensity: 1D array of intensity values.
         precursor_mz: the m/z value of the precursor.
         rt: the retention time in seconds.
         metadata: the metadata of the spectrum, i.e. the header information in the MGF
@@ -31,8 +35,8 @@ class Spectrum:
     def __init__(
         self,
         id: str,
-        mz: list[float],
-        intensity: list[float],
+        mz: Sequence[float] | np.ndarray,
+        intensity: Sequence[float] | np.ndarray,
         precursor_mz: float,
         rt: float = 0,
         metadata: dict | None = None,
@@ -41,16 +45,15 @@ class Spectrum:
 
         Args:
             id: the spectrum ID.
-            mz: the list of m/z values.
-            intensity: the list of intensity values.
+            mz: the m/z values.
+            intensity: the intensity values, with the same length as `mz`.
             precursor_mz: the precursor m/z.
             rt: the retention time in seconds. Defaults to 0.
             metadata: the metadata of the spectrum, i.e. the header information
                 in the MGF file.
         """
         self.id = id
-        self.mz = mz
-        self.intensity = intensity
+        self.peaks = self._stack_peaks(mz, intensity)
         self.precursor_mz = precursor_mz
         self.rt = rt
         self.metadata = metadata or {}
@@ -76,16 +79,63 @@ class Spectrum:
 
     def __reduce__(self) -> tuple:
         """Reduce function for pickling."""
+        # the peaks are restored from `__dict__`, so they are not passed to `__init__`
         return (
             self.__class__,
-            (self.id, self.mz, self.intensity, self.precursor_mz, self.rt, self.metadata),
+            (self.id, [], [], self.precursor_mz, self.rt, self.metadata),
             self.__dict__,
         )
 
-    @cached_property
+    @property
     def peaks(self) -> np.ndarray:
         """Get the peaks, a 2D array with each row containing the values of (m/z, intensity)."""
-        return np.array(list(zip(self.mz, self.intensity)))
+        return self._peaks
+
+    @peaks.setter
+    def peaks(self, peaks: np.ndarray) -> None:
+        if peaks.ndim != 2 or peaks.shape[1] != 2:
+            raise ValueError(f"Expected peaks of shape (n_peaks, 2), got {peaks.shape}.")
+        self._peaks = peaks
+
+    @property
+    def mz(self) -> np.ndarray:
+        """Get or set the m/z values, a view of the first column of `peaks`.
+
+        Setting the m/z values replaces `peaks` with a new array, so the spectrum no longer shares
+        the peaks with a [`PeakStore`][nplinker.metabolomics.PeakStore].
+        """
+        return self._peaks[:, 0]
+
+    @mz.setter
+    def mz(self, mz: Sequence[float] | np.ndarray) -> None:
+        self.peaks = self._stack_peaks(mz, self.intensity)
+
+    @property
+    def intensity(self) -> np.ndarray:
+        """Get or set the intensity values, a view of the second column of `peaks`.
+
+        Setting the intensity values replaces `peaks` with a new array, so the spectrum no longer
+        shares the peaks with a [`PeakStore`][nplinker.metabolomics.PeakStore].
+        """
+        return self._peaks[:, 1]
+
+    @intensity.setter
+    def intensity(self, intensity: Sequence[float] | np.ndarray) -> None:
+        self.peaks = self._stack_peaks(self.mz, intensity)
+
+    @staticmethod
+    def _stack_peaks(
+        mz: Sequence[float] | np.ndarray, intensity: Sequence[float] | np.ndarray
+    ) -> np.ndarray:
+        """Stack the m/z and intensity values into a new peaks array."""
+        mz = np.asarray(mz, dtype=np.float64)
+        intensity = np.asarray(intensity, dtype=np.float64)
+        if mz.shape != intensity.shape:
+            raise ValueError(
+                f"The m/z values {mz.shape} and intensity values {intensity.shape} must have "
+                "the same shape, set `peaks` to change the number of peaks."
+            )
+        return np.column_stack([mz, intensity])
 
     def has_strain(self, strain: Strain) -> bool:
         """Check if the given strain exists in the spectrum.
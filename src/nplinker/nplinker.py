@@ -1,5 +1,8 @@
 from __future__ import annotations
+import hashlib
+import json
 import logging
+import os
 import pickle
 from collections.abc import Sequence
 from os import PathLike
@@ -9,7 +12,12 @@ from typing import overload
 from dynaconf import Dynaconf
 from .arranger import DatasetArranger
 from .config import load_config
+from .defaults import ANTISMASH_DIRNAME
+from .defaults import DOWNLOADS_DIRNAME
+from .defaults import GENOME_BGC_MAPPINGS_FILENAME
 from .defaults import OUTPUT_DIRNAME
+from .defaults import STRAIN_MAPPINGS_FILENAME
+from .defaults import STRAINS_SELECTED_FILENAME
 from .genomics import BGC
 from .genomics import GCF
 from .loader import DatasetLoader
@@ -48,6 +56,18 @@ class NPLinker:
         # NPClassScoring.name: NPClassScoring, # To be refactored
     }
 
+    # Snapshot of the loaded data, saved in the output directory
+    SNAPSHOT = "dataset_snapshot.pkl"
+    # version of the snapshot format, increase it when the pickled data or objects change
+    SNAPSHOT_VERSION = 1
+    # input files (relative to the root directory) that the arranger may regenerate with the same
+    # content on every run, so they are fingerprinted by their content instead of their mtime
+    SNAPSHOT_CONTENT_FILES = (
+        STRAIN_MAPPINGS_FILENAME,
+        STRAINS_SELECTED_FILENAME,
+        os.path.join(ANTISMASH_DIRNAME, GENOME_BGC_MAPPINGS_FILENAME),
+    )
+
     def __init__(self, config_file: str | PathLike):
         """Initialise an NPLinker instance.
 
@@ -72,7 +92,7 @@ class NPLinker:
 
             Getting the link data between two objects:
             >>> link_data = lg.get_link_data(npl.gcfs[0], npl.spectra[0])
-            {"metcalf": Score("metcalf", 1.0, {"cutoff": 0, "standardised": False})}
+            {"metcalf": Score("metcalf", 1.0, {"cutoff": 0, "standardised": False, ...})}
 
             Saving the data to a pickle file:
             >>> npl.save_data("path/to/output.pkl", lg)
@@ -168,7 +188,13 @@ class NPLinker:
         """Get names of all valid scoring methods."""
         return list(self._valid_scoring_methods.keys())
 
-    def load_data(self):
+    def load_data(
+        self,
+        use_snapshot: bool = False,
+        concurrent: bool = False,
+        n_jobs: int = 1,
+        use_cache: bool = False,
+    ):
         """Load all data from files into memory.
 
         This method is a convenience function that calls the
@@ -180,11 +206,38 @@ class NPLinker:
         The loaded data is stored in various data containers for easy access, e.g.
         [`self.bgcs`][nplinker.NPLinker.bgcs] for all BGC objects,
         [`self.strains`][nplinker.NPLinker.strains] for all Strain objects, etc.
+
+        If `use_snapshot` is True, a snapshot of the loaded objects is saved to the output
+        directory, together with a fingerprint of the configuration and of all input files. If the
+        fingerprint is unchanged when the data are loaded again with `use_snapshot=True`, the
+        objects are loaded from the snapshot instead of from the input files. The files that the
+        arranger regenerates on every run (e.g. the strain mappings file in PODP mode) are
+        fingerprinted by their content, so they do not outdate the snapshot as long as their
+        content is unchanged.
+
+        Args:
+            use_snapshot: True to load the data from the snapshot if it is up to date, and to save
+                the snapshot after loading the data from the input files. Defaults to False.
+            concurrent: True to load the metabolomics and genomics data concurrently, see
+                [`DatasetLoader`][nplinker.loader.DatasetLoader]. Defaults to False.
+            n_jobs: The number of worker processes used to parse the GNPS spectra and antiSMASH
+                files, -1 means using all CPU cores. Defaults to 1.
+            use_cache: True to cache the parsed BGC files in the output directory. Defaults to
+                False.
         """
         arranger = DatasetArranger(self.config)
         arranger.arrange()
-        loader = DatasetLoader(self.config)
-        loader.load()
+
+        snapshot_file = os.path.join(self.output_dir, self.SNAPSHOT)
+        fingerprint = self._get_fingerprint() if use_snapshot else ""
+        if use_snapshot and self._load_snapshot(snapshot_file, fingerprint):
+            logger.info(f"Loaded data from snapshot {snapshot_file}")
+            return
+
+        loader = DatasetLoader(
+            self.config, concurrent=concurrent, n_jobs=n_jobs, use_cache=use_cache
+        )
+        loaded = loader.load()
 
         self._bgc_dict = {bgc.id: bgc for bgc in loader.bgcs}
         self._gcf_dict = {gcf.id: gcf for gcf in loader.gcfs}
@@ -197,6 +250,116 @@ class NPLinker:
         self._chem_classes = loader.chem_classes
         self._class_matches = loader.class_matches
 
+        if use_snapshot:
+            if loaded:
+                self._save_snapshot(snapshot_file, fingerprint)
+            else:
+                logger.warning("Failed to load all data, the snapshot is not saved.")
+
+    def _get_fingerprint(self) -> str:
+        """Get the fingerprint of the input data and settings that the loaded data depend on.
+
+        Returns:
+            The SHA-256 hex digest of the snapshot version, the NPLinker version, the
+            configuration (except the logging settings) and all files in the root directory,
+            except for the output and downloads directories. Each file contributes its relative
+            path and size, plus its content if it is one of `SNAPSHOT_CONTENT_FILES` or its
+            modification time otherwise, so only a few small files are read.
+        """
+        from nplinker import __version__
+
+        sha = hashlib.sha256()
+        config = {k: v for k, v in self.config.as_dict().items() if k.lower() != "log"}
+        header = [self.SNAPSHOT_VERSION, __version__, config]
+        sha.update(json.dumps(header, sort_keys=True, default=str).encode())
+
+        root_dir = str(self.config.root_dir)
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            if dirpath == root_dir:
+                dirnames[:] = [d for d in dirnames if d not in (OUTPUT_DIRNAME, DOWNLOADS_DIRNAME)]
+            # walk in sorted order so the fingerprint does not depend on the file system
+            dirnames.sort()
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                stat = os.stat(path)
+                relpath = os.path.relpath(path, root_dir)
+                if relpath in self.SNAPSHOT_CONTENT_FILES:
+                    with open(path, "rb") as f:
+                        content = hashlib.sha256(f.read()).hexdigest()
+                    sha.update(json.dumps([relpath, stat.st_size, content]).encode())
+                else:
+                    sha.update(json.dumps([relpath, stat.st_size, stat.st_mtime_ns]).encode())
+        return sha.hexdigest()
+
+    def _save_snapshot(self, file: str, fingerprint: str) -> None:
+        """Save the loaded data to a snapshot file.
+
+        The file contains two pickles: a header with the snapshot version and the fingerprint,
+        followed by the loaded data, so the header can be checked without unpickling the data.
+        The snapshot is written to a temporary file first and then renamed, so an interrupted save
+        never leaves a partial snapshot behind.
+
+        Args:
+            file: The path to the snapshot file.
+            fingerprint: The fingerprint of the input data, see `_get_fingerprint`.
+        """
+        header = {"version": self.SNAPSHOT_VERSION, "fingerprint": fingerprint}
+        data = {
+            "bgcs": self.bgcs,
+            "gcfs": self.gcfs,
+            "spectra": self.spectra,
+            "mfs": self.mfs,
+            "mibig_bgcs": self._mibig_bgcs,
+            "strains": self._strains,
+            "product_types": self._product_types,
+            "chem_classes": self._chem_classes,
+            "class_matches": self._class_matches,
+        }
+        try:
+            with open(f"{file}.tmp", "wb") as f:
+                pickle.dump(header, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(f"{file}.tmp", file)
+        except (OSError, pickle.PicklingError, RecursionError) as e:
+            logger.warning(f"Failed to save snapshot to {file}: {e}")
+
+    def _load_snapshot(self, file: str, fingerprint: str) -> bool:
+        """Load the data from a snapshot file.
+
+        Args:
+            file: The path to the snapshot file.
+            fingerprint: The fingerprint of the current input data, see `_get_fingerprint`.
+
+        Returns:
+            True if the snapshot is loaded, False if it does not exist, is invalid or does not
+            match the version or the fingerprint. The data containers are only changed if the
+            snapshot is loaded.
+        """
+        if not os.path.exists(file):
+            return False
+        try:
+            with open(file, "rb") as f:
+                header = pickle.load(f)
+                if header != {"version": self.SNAPSHOT_VERSION, "fingerprint": fingerprint}:
+                    logger.info(f"Snapshot {file} is outdated, loading data from input files.")
+                    return False
+                data = pickle.load(f)
+        # AttributeError and ImportError are raised if the pickled classes no longer exist
+        except (pickle.UnpicklingError, EOFError, OSError, AttributeError, ImportError) as e:
+            logger.warning(f"Failed to load snapshot from {file}: {e}")
+            return False
+
+        self._bgc_dict = {bgc.id: bgc for bgc in data["bgcs"]}
+        self._gcf_dict = {gcf.id: gcf for gcf in data["gcfs"]}
+        self._spec_dict = {spec.id: spec for spec in data["spectra"]}
+        self._mf_dict = {mf.id: mf for mf in data["mfs"]}
+        self._mibig_bgcs = data["mibig_bgcs"]
+        self._strains = data["strains"]
+        self._product_types = data["product_types"]
+        self._chem_classes = data["chem_classes"]
+        self._class_matches = data["class_matches"]
+        return True
+
     @overload
     def get_links(
         self, objects: Sequence[BGC], scoring_method: str, **scoring_params: Any
@@ -237,7 +400,7 @@ class NPLinker:
 
                 | Scoring Method | Scoring Parameters |
                 | -------------- | ------------------ |
-                | `metcalf` | [`cutoff`, `standardised`][nplinker.scoring.MetcalfScoring.get_links] |
+                | `metcalf` | [`cutoff`, `standardised`, `top_k`, `top_k_total`][nplinker.scoring.MetcalfScoring.get_links] |
 
         Returns:
             A LinkGraph object containing the links for the given objects.
@@ -1,8 +1,14 @@
 from __future__ import annotations
+import json
+from collections.abc import Iterable
+from collections.abc import Iterator
 from collections.abc import Sequence
 from functools import wraps
+from numbers import Real
+from os import PathLike
 from typing import Union
-from networkx import Graph
+import numpy as np
+import pandas as pd
 from tabulate import tabulate
 from nplinker.genomics import GCF
 from nplinker.metabolomics import MolecularFamily
@@ -16,6 +22,9 @@ Entity = Union[GCF, Spectrum, MolecularFamily]  # using Union to ensure python 3
 LINK_DATA = dict[str, Score]
 LINK = tuple[Entity, Entity, LINK_DATA]
 
+# the object types used to group the neighbors of each object in the adjacency index
+ENTITY_TYPES = (GCF, Spectrum, MolecularFamily)
+
 
 def validate_u(func):
     """A decorator to validate the type of the u object."""
@@ -58,13 +67,23 @@ def validate_uv(func):
 class LinkGraph:
     """Class to represent the links between objects in NPLinker.
 
-    This class wraps the `networkx.Graph` class to provide a more user-friendly interface for
-    working with the links.
-
-    The links between objects are stored as edges in a graph, while the objects themselves are
-    stored as nodes.
-
-    The scoring data for each link (or link data) is stored as the key/value attributes of the edge.
+    The links are stored in a columnar layout: the objects (or nodes) are kept in a list, and
+    each link is a row of parallel numpy arrays holding the integer positions of its two objects
+    and, for each scoring method, the score value and the position of its parameters in a table
+    of distinct parameter dicts. The links share their parameter dicts instead of keeping a copy
+    per link, and [`Score`][nplinker.scoring.Score] objects are only created when the link data
+    are accessed, i.e. each access returns new `Score` objects and changing them does not change
+    the links.
+
+    The score values of a scoring method are stored in one numpy array, whose dtype is promoted
+    as scores are added: bool, integer and float scores are returned as they are while all scores
+    of the method have the same type, and mixed numeric scores are returned as the common type
+    (e.g. float if both integer and float scores are added). Scores that are not numbers switch
+    the method to an object array, which keeps the values as they are.
+
+    The links are undirected, i.e. the link between `u` and `v` is the same as the link between
+    `v` and `u`. Sorted indexes of the links are built lazily when looking up links, so looking up
+    links is fast once all links are added.
     """
 
     def __init__(self) -> None:
@@ -104,7 +123,33 @@ class LinkGraph:
             >>> lg.get_link_data(gcf, spectrum)
             {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})}
         """
-        self._g: Graph = Graph()
+        # nodes
+        self._nodes: list[Entity] = []
+        self._node_index: dict[Entity, int] = {}
+        # positions in `ENTITY_TYPES` of the types of the nodes, and its array built lazily
+        self._node_types: list[int] = []
+        self._node_type_array: np.ndarray | None = None
+
+        # links, the arrays are buffers and only the first `_size` rows are used
+        self._size = 0
+        self._u = np.zeros(0, dtype=np.int64)
+        self._v = np.zeros(0, dtype=np.int64)
+        # for each scoring method: the score values, the positions of the parameters in the table
+        # of distinct parameters (-1 if the link has no score of the method) and the table itself
+        self._values: dict[str, np.ndarray] = {}
+        self._param_ids: dict[str, np.ndarray] = {}
+        self._params: dict[str, list[dict]] = {}
+        self._param_positions: dict[str, dict[int, int]] = {}
+
+        # index of the links by their keys, see `_get_key`: the sorted keys of the first
+        # `_n_indexed` links and a dict of the keys of the links added after them
+        self._sorted_keys = np.zeros(0, dtype=np.int64)
+        self._sorted_rows = np.zeros(0, dtype=np.int64)
+        self._n_indexed = 0
+        self._recent_keys: dict[int, int] = {}
+
+        # adjacency of the nodes in CSR layout, built lazily and reset when links are added
+        self._adjacency: tuple[np.ndarray, np.ndarray, np.ndarray] | None = None
 
     def __repr__(self) -> str:
         """Return a string representation of the LinkGraph."""
@@ -112,7 +157,45 @@ class LinkGraph:
 
     def __len__(self) -> int:
         """Get the number of objects."""
-        return len(self._g)
+        return len(self._nodes)
+
+    def __getstate__(self) -> dict:
+        """Get the state for pickling, without the unused rows of the buffers and the indexes.
+
+        The positions of the parameters are keyed by the `id` of the parameter dicts, which is not
+        valid after unpickling, so they are not pickled either.
+        """
+        state = self.__dict__.copy()
+        state["_u"] = self._u[: self._size].copy()
+        state["_v"] = self._v[: self._size].copy()
+        state["_values"] = {k: v[: self._size].copy() for k, v in self._values.items()}
+        state["_param_ids"] = {k: v[: self._size].copy() for k, v in self._param_ids.items()}
+        state["_sorted_keys"] = np.zeros(0, dtype=np.int64)
+        state["_sorted_rows"] = np.zeros(0, dtype=np.int64)
+        state["_n_indexed"] = 0
+        state["_recent_keys"] = {}
+        state["_adjacency"] = None
+        state["_node_type_array"] = None
+        del state["_param_positions"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """Restore the state from pickling and rebuild the indexes of the links and parameters.
+
+        Pickles of the LinkGraph before the columnar layout wrap a `networkx.Graph`, whose links
+        are added to a new LinkGraph. Loading them requires `networkx` to be installed.
+        """
+        if "_g" in state:
+            self.__init__()  # type: ignore[misc]
+            for u, v, data in state["_g"].edges(data=True):
+                self.add_link(u, v, **data)
+            return
+        self.__dict__.update(state)
+        self._param_positions = {
+            name: {id(parameter): pos for pos, parameter in enumerate(params)}
+            for name, params in self._params.items()
+        }
+        self._build_key_index()
 
     @validate_u
     def __getitem__(self, u: Entity) -> dict[Entity, LINK_DATA]:
@@ -127,12 +210,16 @@ class LinkGraph:
         Raises:
             KeyError: if the input object is not found in the link graph.
         """
-        try:
-            links = self._g[u]
-        except KeyError:
+        if u not in self._node_index:
             raise KeyError(f"{u} not found in the link graph.")
 
-        return {**links}  # type: ignore
+        indptr, neighbors, rows = self._get_adjacency()
+        i = self._node_index[u]
+        start, end = indptr[i * len(ENTITY_TYPES)], indptr[(i + 1) * len(ENTITY_TYPES)]
+        return {
+            self._nodes[j]: self._get_link_data(row)
+            for j, row in zip(neighbors[start:end].tolist(), rows[start:end].tolist())
+        }
 
     @property
     def links(
@@ -147,7 +234,17 @@ class LinkGraph:
             >>> lg.links
             [(gcf, spectrum, {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})})]
         """
-        return list(self._g.edges(data=True))
+        return [self._get_link(row) for row in range(self._size)]
+
+    @property
+    def num_links(self) -> int:
+        """Get the number of links, without creating the links.
+
+        Examples:
+            >>> lg.num_links
+            1
+        """
+        return self._size
 
     @validate_uv
     def add_link(
@@ -161,6 +258,8 @@ class LinkGraph:
         The objects `u` and `v` must be different types, i.e. one must be a GCF and the other must be
         a Spectrum or MolecularFamily.
 
+        If the link already exists, its data are updated with the given data.
+
         Args:
             u: the first object, either a GCF, Spectrum, or MolecularFamily
             v: the second object, either a GCF, Spectrum, or MolecularFamily
@@ -174,15 +273,143 @@ class LinkGraph:
         # validate the data
         if not data:
             raise ValueError("At least one scoring method and its data must be provided.")
-        for key, value in data.items():
-            if not ScoringMethod.has_value(key):
+        for name, value in data.items():
+            if not ScoringMethod.has_value(name):
                 raise ValueError(
-                    f"{key} is not a valid name of scoring method. See `ScoringMethod` for valid names."
+                    f"{name} is not a valid name of scoring method. See `ScoringMethod` for valid names."
                 )
             if not isinstance(value, Score):
                 raise TypeError(f"{value} is not a Score object.")
 
-        self._g.add_edge(u, v, **data)
+        i, j = self._add_node(u), self._add_node(v)
+        key = min(i, j) * 2**32 + max(i, j)  # see `_get_key`
+        row = self._find_row(key)
+        if row < 0:
+            row = self._size
+            self._reserve(row + 1)
+            self._u[row], self._v[row] = i, j
+            self._size += 1
+            self._recent_keys[key] = row
+            self._adjacency = None
+        for name, value in data.items():
+            self._set_score(name, row, value)
+
+    def add_links(
+        self,
+        u_nodes: Iterable[Entity],
+        v_nodes: Iterable[Entity],
+        values: Iterable[float] | np.ndarray,
+        /,
+        name: str,
+        parameter: dict,
+    ) -> None:
+        """Add links of one scoring method in bulk.
+
+        The i-th link is between `u_nodes[i]` and `v_nodes[i]`, with the score value `values[i]`.
+        All links share the scoring method `name` and its `parameter`, which are only validated
+        once for the whole batch, and the links are added with vectorised operations. The result
+        is the same as calling
+        `add_link(u_nodes[i], v_nodes[i], **{name: Score(name, values[i], parameter)})` for each
+        link in order, i.e. the data of existing links are updated and the last score is kept for
+        repeated links.
+
+        Args:
+            u_nodes: the first objects of the links, either GCF, Spectrum, or MolecularFamily
+            v_nodes: the second objects of the links, either GCF, Spectrum, or MolecularFamily
+            values: the score values of the links
+            name: the name of the scoring method, see `ScoringMethod` for valid names
+            parameter: the parameters used for the scoring method, shared by all links
+
+        Raises:
+            ValueError: if the name is not a valid name of scoring method or the numbers of
+                `u_nodes`, `v_nodes` and `values` differ.
+            TypeError: if the types of the objects of any link are invalid.
+
+        Examples:
+            >>> lg.add_links([gcf1, gcf2], [spectrum1, spectrum1], [1.0, 2.0],
+            ...              name="metcalf", parameter={"cutoff": 0.5})
+        """
+        if not ScoringMethod.has_value(name):
+            raise ValueError(
+                f"{name} is not a valid name of scoring method. See `ScoringMethod` for valid names."
+            )
+        u_array = self._to_object_array(u_nodes)
+        v_array = self._to_object_array(v_nodes)
+        if not isinstance(values, np.ndarray):
+            values = list(values)
+            values = np.asarray(values) if values else np.zeros(0)
+            if values.ndim != 1:
+                values = self._to_object_array(values)
+        if not len(u_array) == len(v_array) == len(values):
+            raise ValueError(
+                f"The numbers of u_nodes ({len(u_array)}), v_nodes ({len(v_array)}) and values "
+                f"({len(values)}) must be the same."
+            )
+        if len(values) == 0:
+            return
+        dtype = self._get_score_dtype(values)
+
+        # validate the types of the objects and map the objects to their positions
+        u_codes, u_uniques = pd.factorize(u_array)
+        v_codes, v_uniques = pd.factorize(v_array)
+        self._validate_links(u_uniques, u_codes, v_uniques, v_codes)
+        i = np.array([self._add_node(u) for u in u_uniques], dtype=np.int64)[u_codes]
+        j = np.array([self._add_node(v) for v in v_uniques], dtype=np.int64)[v_codes]
+
+        # find the rows of the existing links, and append the new links in the order of their
+        # first occurrence
+        keys = self._get_key(i, j)
+        rows = self._find_rows(keys)
+        new = np.flatnonzero(rows < 0)
+        new_keys, first, inverse = np.unique(keys[new], return_index=True, return_inverse=True)
+        rank = np.empty(len(new_keys), dtype=np.int64)
+        rank[np.argsort(first)] = np.arange(len(new_keys))
+        rows[new] = self._size + rank[inverse]
+        self._append_links(i[new[np.sort(first)]], j[new[np.sort(first)]])
+
+        # set the scores, keeping the last score of repeated links
+        last = len(rows) - 1 - np.unique(rows[::-1], return_index=True)[1]
+        self._add_method(name, dtype)
+        self._set_scores(name, rows[last], values[last], self._get_param_id(name, parameter))
+
+    def merge(self, other: LinkGraph) -> LinkGraph:
+        """Return a new LinkGraph object with the links of both LinkGraph objects (union).
+
+        The scores of the links in both LinkGraph objects are combined. If a link has a score of
+        the same scoring method in both, the score of `other` is kept.
+
+        The links are combined with vectorised operations on the columns of the links, without
+        validating the links again.
+
+        Args:
+            other: the other LinkGraph object
+
+        Returns:
+            A new LinkGraph object with the links of this object followed by the new links of
+            `other`.
+
+        Examples:
+            Combine the Metcalf and Rosetta links:
+            >>> lg = lg_metcalf.merge(lg_rosetta)
+        """
+        return self._combine(other, inner=False)
+
+    def join(self, other: LinkGraph) -> LinkGraph:
+        """Return a new LinkGraph object with the links in both LinkGraph objects (intersection).
+
+        The scores of the links are combined as in `merge`.
+
+        Args:
+            other: the other LinkGraph object
+
+        Returns:
+            A new LinkGraph object with the links of this object that are also in `other`.
+
+        Examples:
+            Get the Metcalf links that are supported by Rosetta hits:
+            >>> lg = lg_metcalf.join(lg_rosetta)
+        """
+        return self._combine(other, inner=True)
 
     @validate_uv
     def has_link(self, u: Entity, v: Entity) -> bool:
@@ -199,7 +426,7 @@ class LinkGraph:
             >>> lg.has_link(gcf, spectrum)
             True
         """
-        return self._g.has_edge(u, v)
+        return self._find_link(u, v) >= 0
 
     @validate_uv
     def get_link_data(
@@ -221,7 +448,10 @@ class LinkGraph:
             >>> lg.get_link_data(gcf, spectrum)
             {"metcalf": Score("metcalf", 1.0, {"cutoff": 0.5})}
         """
-        return self._g.get_edge_data(u, v)  # type: ignore
+        row = self._find_link(u, v)
+        if row < 0:
+            return None
+        return self._get_link_data(row)
 
     def filter(self, u_nodes: Sequence[Entity], v_nodes: Sequence[Entity] = [], /) -> LinkGraph:
         """Return a new LinkGraph object with the filtered links between the given objects.
@@ -250,51 +480,571 @@ class LinkGraph:
             Filter the links between two lists of objects:
             >>> new_lg = lg.filter([gcf1, gcf2], [spectrum1, spectrum2])
         """
-        lg = LinkGraph()
-
         # exchange u_nodes and v_nodes if u_nodes is empty but v_nodes not
         if len(u_nodes) == 0 and len(v_nodes) != 0:
             u_nodes = v_nodes
             v_nodes = []
 
+        # the validation only depends on the types, so validate one object of each type
+        u_samples = {type(u): u for u in u_nodes}.values()
+        v_samples = {type(v): v for v in v_nodes}.values()
+        for u in u_samples:
+            self._validate_node(u)
+            for v in v_samples:
+                self._validate_link(u, v)
+
+        u_index = self._get_node_positions(u_nodes)
         if len(v_nodes) == 0:
-            for u in u_nodes:
-                self._filter_one_node(u, lg)
+            _, rows = self._get_neighbors(u_index)
+        else:
+            v_index = self._get_node_positions(v_nodes)
+            # walk the links of the side with fewer links to the types of the other side, and keep
+            # the links to the objects of the other side
+            u_types, v_types = self._get_node_types(u_index), self._get_node_types(v_index)
+            u_degree = self._get_degree(u_index, np.unique(v_types)).sum()
+            v_degree = self._get_degree(v_index, np.unique(u_types)).sum()
+            if v_degree < u_degree:
+                u_index, v_index, v_types = v_index, u_index, u_types
+            neighbors, rows = self._get_neighbors(u_index, np.unique(v_types))
+            is_target = np.zeros(len(self._nodes), dtype=bool)
+            is_target[v_index] = True
+            rows = rows[is_target[neighbors]]
+        # keep the order of the links
+        return self._take(np.unique(rows))
+
+    def _validate_links(
+        self,
+        u_uniques: np.ndarray,
+        u_codes: np.ndarray,
+        v_uniques: np.ndarray,
+        v_codes: np.ndarray,
+    ) -> None:
+        """Validate the types of the objects of links given as factorized objects.
 
-        for u in u_nodes:
-            for v in v_nodes:
-                self._filter_two_nodes(u, v, lg)
+        The validation only depends on the types, so only one link is validated for each pair of
+        types.
+        """
+        for codes in (u_codes, v_codes):
+            if (codes < 0).any():
+                # missing values (e.g. None) are not factorized
+                self._validate_node(None)
+        type_index: dict[type, int] = {}
+        u_types = np.array([type_index.setdefault(type(u), len(type_index)) for u in u_uniques])
+        v_types = np.array([type_index.setdefault(type(v), len(type_index)) for v in v_uniques])
+        pairs = np.unique(np.column_stack([u_types[u_codes], v_types[v_codes]]), axis=0)
+        for u_type, v_type in pairs:
+            u = u_uniques[np.flatnonzero(u_types == u_type)[0]]
+            v = v_uniques[np.flatnonzero(v_types == v_type)[0]]
+            self._validate_link(u, v)
+
+    @staticmethod
+    def _to_object_array(nodes: Iterable[object]) -> np.ndarray:
+        """Convert the objects to a 1D numpy array of objects."""
+        nodes = list(nodes)
+        array = np.empty(len(nodes), dtype=object)
+        array[:] = nodes
+        return array
+
+    def top(self, n: int = 10, by: str = "metcalf") -> LinkGraph:
+        """Return a new LinkGraph object with the `n` links of the highest scores.
+
+        The top links are selected with a partial sort (`np.argpartition`), so only the `n`
+        selected links are sorted and no full sort of the scores is done. Links without a score
+        of the scoring method `by` are ignored.
 
-        return lg
+        Args:
+            n: the number of links to keep
+            by: the name of the scoring method whose scores are used to rank the links
+
+        Returns:
+            A new LinkGraph object with the top links, in descending order of their scores. Ties
+            are broken by the order of the links.
+
+        Raises:
+            ValueError: if `n` is not a positive integer or the scores of `by` are not numbers.
+
+        Examples:
+            Display the 10 links with the highest Metcalf scores:
+            >>> lg.top(10, by="metcalf")
+        """
+        if not isinstance(n, int) or n < 1:
+            raise ValueError(f"`n` must be a positive integer, got {n}.")
+        if by not in self._values:
+            return LinkGraph()
+        if self._values[by].dtype == object:
+            raise ValueError(f"The scores of {by} are not numbers.")
+
+        rows = np.flatnonzero(self._param_ids[by][: self._size] >= 0)
+        # bool scores cannot be negated, so rank them as integers
+        values = self._values[by][rows].astype(np.result_type(self._values[by].dtype, np.int8))
+        if len(rows) > n:
+            top = np.argpartition(-values, n - 1)[:n]
+            rows, values = rows[top], values[top]
+        order = np.lexsort((rows, -values))
+        return self._take(rows[order])
+
+    def iter_tables(self, batch_size: int = 100_000) -> Iterator[pd.DataFrame]:
+        """Iterate over the links in tables of at most `batch_size` links.
+
+        Only one table is created at a time, so all links can be processed with bounded memory.
+
+        Each table has the following columns:
+
+        - `gcf`: the id of the GCF object of the link;
+        - `target_type`: the type of the other object, i.e. `Spectrum` or `MolecularFamily`;
+        - `target`: the id of the other object;
+        - one column for each scoring method in the LinkGraph, e.g. `metcalf`, containing the
+            score values, or NaN (None for non-numeric scores) if the link has no such score. As
+            NaN is a float, bool and integer scores are converted to float.
+
+        Args:
+            batch_size: the maximum number of links in a table
+
+        Yields:
+            A DataFrame of links, in the order of the links.
+
+        Raises:
+            ValueError: if `batch_size` is not a positive integer.
+
+        Examples:
+            >>> for df in lg.iter_tables(batch_size=10000):
+            ...     process(df)
+        """
+        if not isinstance(batch_size, int) or batch_size < 1:
+            raise ValueError(f"`batch_size` must be a positive integer, got {batch_size}.")
+        ids = self._to_object_array([node.id for node in self._nodes])
+        types = self._get_node_types(np.arange(len(self._nodes)))
+        type_names = np.array([cls.__name__ for cls in ENTITY_TYPES], dtype=object)
+        for start in range(0, self._size, batch_size):
+            end = min(start + batch_size, self._size)
+            u = self._u[start:end]
+            v = self._v[start:end]
+            u_is_gcf = types[u] == ENTITY_TYPES.index(GCF)
+            gcf = np.where(u_is_gcf, u, v)
+            target = np.where(u_is_gcf, v, u)
+            columns = {
+                "gcf": ids[gcf],
+                "target_type": type_names[types[target]],
+                "target": ids[target],
+            }
+            for name, param_ids in self._param_ids.items():
+                values = self._values[name][start:end]
+                missing = param_ids[start:end] < 0
+                if values.dtype == object:
+                    columns[name] = values.copy()
+                    columns[name][missing] = None
+                else:
+                    columns[name] = np.where(missing, np.nan, values)
+            yield pd.DataFrame(columns)
+
+    def export(
+        self,
+        file: str | PathLike,
+        format: str | None = None,
+        batch_size: int = 100_000,
+    ) -> None:
+        """Export the links to a CSV, Parquet or Arrow IPC file, in batches of links.
+
+        The links are written batch by batch (one row group per batch for Parquet and one record
+        batch per batch for Arrow IPC), so the memory use is bounded by the batch size. The
+        columns are described in `iter_tables`. For Parquet and Arrow IPC files, the parameters of
+        the scoring methods are stored as JSON in the schema metadata under the key `parameters`,
+        and non-numeric scores are written as strings.
+
+        Writing Parquet and Arrow IPC files requires the `pyarrow` package, which is installed
+        with the `arrow` extra: `pip install nplinker[arrow]`.
+
+        Args:
+            file: the path to the output file
+            format: the file format, one of `csv`, `parquet` and `arrow`. If None, the format is
+                inferred from the file extension (`.csv`, `.parquet` or `.arrow`/`.feather`).
+            batch_size: the number of links per batch
+
+        Raises:
+            ValueError: if the format is not supported or cannot be inferred.
+            ImportError: if `pyarrow` is not installed when writing Parquet or Arrow IPC files.
+
+        Examples:
+            >>> lg.export("links.parquet")
+            >>> lg.export("links.csv")
+            >>> lg.export("links.txt", format="csv")
+        """
+        if format is None:
+            suffix = str(file).rsplit(".", 1)[-1].lower()
+            format = {"feather": "arrow", "ipc": "arrow"}.get(suffix, suffix)
+        if format not in ("csv", "parquet", "arrow"):
+            raise ValueError(
+                f"Unsupported format {format}. Supported formats are: csv, parquet and arrow."
+            )
+
+        tables = self.iter_tables(batch_size)
+        if format == "csv":
+            with open(file, "w", newline="") as f:
+                self._empty_table().to_csv(f, index=False)
+                for df in tables:
+                    df.to_csv(f, index=False, header=False)
+            return
 
-    @validate_u
-    def _filter_one_node(self, u: Entity, lg: LinkGraph) -> None:
-        """Filter the links for a given object and add them to the new LinkGraph object."""
         try:
-            links = self[u]
-        except KeyError:
-            pass
-        else:
-            for node2, value in links.items():
-                lg.add_link(u, node2, **value)
+            import pyarrow as pa
+            import pyarrow.ipc
+            import pyarrow.parquet
+        except ImportError as e:
+            raise ImportError(
+                f"Exporting links to {format} files requires `pyarrow`, install it with "
+                "`pip install nplinker[arrow]`."
+            ) from e
+        # non-numeric scores are written as strings
+        text_columns = [name for name, values in self._values.items() if values.dtype == object]
+        schema = pa.schema(
+            [(column, pa.string()) for column in ("gcf", "target_type", "target")]
+            + [
+                (name, pa.string() if name in text_columns else pa.float64())
+                for name in self._values
+            ],
+            metadata={"parameters": json.dumps(self._params, default=str)},
+        )
+        writer_class = (
+            pyarrow.parquet.ParquetWriter if format == "parquet" else pyarrow.ipc.new_file
+        )
+        with writer_class(file, schema) as writer:
+            for df in tables:
+                for name in text_columns:
+                    df[name] = df[name].map(lambda x: None if x is None else str(x))
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+
+    def _empty_table(self) -> pd.DataFrame:
+        """Get an empty table with the columns and dtypes of the tables of `iter_tables`."""
+        columns = {
+            "gcf": pd.Series(dtype=object),
+            "target_type": pd.Series(dtype=object),
+            "target": pd.Series(dtype=object),
+        }
+        for name, values in self._values.items():
+            columns[name] = pd.Series(dtype=values.dtype)
+        df = pd.DataFrame(columns)
+        return df  # type: ignore
+
+    @validate_u
+    def _validate_node(self, u: Entity) -> None:
+        """Validate the type of an object."""
 
     @validate_uv
-    def _filter_two_nodes(self, u: Entity, v: Entity, lg: LinkGraph) -> None:
-        """Filter the links between two objects and add them to the new LinkGraph object."""
-        link_data = self.get_link_data(u, v)
-        if link_data is not None:
-            lg.add_link(u, v, **link_data)
+    def _validate_link(self, u: Entity, v: Entity) -> None:
+        """Validate the types of the two objects of a link."""
+
+    def _get_node_positions(self, nodes: Sequence[Entity]) -> np.ndarray:
+        """Get the positions of the given objects, ignoring objects not in the link graph."""
+        return np.array(
+            [self._node_index[node] for node in nodes if node in self._node_index], dtype=np.int64
+        )
+
+    def _add_node(self, node: Entity) -> int:
+        """Add an object if it is not in the link graph yet, and return its position."""
+        i = self._node_index.get(node)
+        if i is None:
+            i = len(self._nodes)
+            self._nodes.append(node)
+            self._node_index[node] = i
+            self._node_types.append(
+                next(t for t, cls in enumerate(ENTITY_TYPES) if isinstance(node, cls))
+            )
+            self._node_type_array = None
+        return i
+
+    @staticmethod
+    def _get_key(i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        """Get the keys of the links between the objects at positions `i` and `j`.
+
+        The key does not depend on the order of the two objects.
+        """
+        keys: np.ndarray = np.minimum(i, j) * 2**32 + np.maximum(i, j)
+        return keys
+
+    def _find_link(self, u: Entity, v: Entity) -> int:
+        """Get the row of the link between two objects, or -1 if there is no such link."""
+        i, j = self._node_index.get(u), self._node_index.get(v)
+        if i is None or j is None:
+            return -1
+        return self._find_row(min(i, j) * 2**32 + max(i, j))
+
+    def _find_row(self, key: int) -> int:
+        """Get the row of the link with the given key, or -1 if there is no such link."""
+        row = self._recent_keys.get(key)
+        if row is not None:
+            return row
+        pos = np.searchsorted(self._sorted_keys, key)
+        if pos < self._n_indexed and self._sorted_keys[pos] == key:
+            return int(self._sorted_rows[pos])
+        # merge the recent keys into the sorted keys once there are many of them
+        if len(self._recent_keys) > max(1024, self._n_indexed // 4):
+            self._build_key_index()
+        return -1
+
+    def _find_rows(self, keys: np.ndarray) -> np.ndarray:
+        """Get the rows of the links with the given keys, -1 for the keys of no link."""
+        if self._recent_keys:
+            self._build_key_index()
+        rows = np.full(len(keys), -1, dtype=np.int64)
+        if self._n_indexed > 0:
+            pos = np.minimum(np.searchsorted(self._sorted_keys, keys), self._n_indexed - 1)
+            found = self._sorted_keys[pos] == keys
+            rows[found] = self._sorted_rows[pos[found]]
+        return rows
+
+    def _append_links(self, i: np.ndarray, j: np.ndarray) -> None:
+        """Append new links between the objects at positions `i` and `j`."""
+        start, end = self._size, self._size + len(i)
+        self._reserve(end)
+        self._u[start:end] = i
+        self._v[start:end] = j
+        self._size = end
+        self._adjacency = None
+        self._build_key_index()
+
+    def _set_scores(
+        self, name: str, rows: np.ndarray, values: np.ndarray, param_ids: np.ndarray | int
+    ) -> None:
+        """Set the scores of a scoring method for the links at the given rows."""
+        self._promote_scores(name, self._get_score_dtype(values))
+        self._values[name][rows] = values
+        self._param_ids[name][rows] = param_ids
+
+    def _combine(self, other: LinkGraph, inner: bool) -> LinkGraph:
+        """Combine the links and scores of two LinkGraph objects, see `merge` and `join`."""
+        lg = self._take(np.arange(self._size))
+        positions = np.array([lg._add_node(node) for node in other._nodes], dtype=np.int64)
+        i = positions[other._u[: other._size]]
+        j = positions[other._v[: other._size]]
+        rows = lg._find_rows(lg._get_key(i, j))
+        new = rows < 0
+        if not inner:
+            rows[new] = lg._size + np.arange(new.sum())
+            lg._append_links(i[new], j[new])
+
+        for name, other_param_ids in other._param_ids.items():
+            param_ids = other_param_ids[: other._size]
+            has_score = (param_ids >= 0) & (rows >= 0)
+            lg._add_method(name, other._values[name].dtype)
+            param_map = np.array(
+                [lg._get_param_id(name, parameter) for parameter in other._params[name]],
+                dtype=np.int32,
+            )
+            lg._set_scores(
+                name,
+                rows[has_score],
+                other._values[name][: other._size][has_score],
+                param_map[param_ids[has_score]],
+            )
+
+        if inner:
+            # keep the order of the links, and drop the objects without links
+            return lg._take(np.sort(rows[~new]))
+        return lg
+
+    def _build_key_index(self) -> None:
+        """Build the sorted index of the keys of all links."""
+        keys = self._get_key(self._u[: self._size], self._v[: self._size])
+        self._sorted_rows = np.argsort(keys, kind="stable")
+        self._sorted_keys = keys[self._sorted_rows]
+        self._n_indexed = self._size
+        self._recent_keys = {}
+
+    def _get_adjacency(self) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Get the adjacency of the objects in CSR layout, grouped by the types of the neighbors.
+
+        Returns:
+            A tuple of (indptr, neighbors, rows). With `t` the position of a type in
+            `ENTITY_TYPES` and `k = i * len(ENTITY_TYPES) + t`, the neighbors of type `t` of the
+            object at position `i` are `neighbors[indptr[k]:indptr[k+1]]`, and `rows` are the rows
+            of the corresponding links.
+        """
+        if self._adjacency is None:
+            u, v = self._u[: self._size], self._v[: self._size]
+            src = np.concatenate([u, v])
+            dst = np.concatenate([v, u])
+            rows = np.concatenate([np.arange(self._size)] * 2)
+            groups = src * len(ENTITY_TYPES) + self._get_node_types(dst)
+            order = np.lexsort((dst, groups))
+            counts = np.bincount(groups, minlength=len(self._nodes) * len(ENTITY_TYPES))
+            indptr = np.concatenate([[0], np.cumsum(counts)])
+            self._adjacency = (indptr, dst[order], rows[order])
+        return self._adjacency
+
+    def _get_node_types(self, positions: np.ndarray) -> np.ndarray:
+        """Get the positions in `ENTITY_TYPES` of the types of the objects at the given positions."""
+        if self._node_type_array is None:
+            self._node_type_array = np.array(self._node_types, dtype=np.int64)
+        types: np.ndarray = self._node_type_array[positions]
+        return types
+
+    def _get_ranges(self, positions: np.ndarray, types: np.ndarray | None) -> np.ndarray:
+        """Get the (start, end) positions in the adjacency of the neighbors of the given types.
+
+        Args:
+            positions: the positions of the objects
+            types: the positions in `ENTITY_TYPES` of the types of neighbors; all types if None
+
+        Returns:
+            A numpy array of shape (len(positions) * len(types), 2).
+        """
+        indptr = self._get_adjacency()[0]
+        n_types = len(ENTITY_TYPES)
+        if types is None:
+            return np.column_stack([indptr[positions * n_types], indptr[(positions + 1) * n_types]])
+        groups = (positions[:, np.newaxis] * n_types + types[np.newaxis, :]).ravel()
+        return np.column_stack([indptr[groups], indptr[groups + 1]])
+
+    def _get_degree(self, positions: np.ndarray, types: np.ndarray | None = None) -> np.ndarray:
+        """Get the numbers of neighbors of the given types of the objects at the given positions."""
+        ranges = self._get_ranges(positions, types)
+        degree: np.ndarray = ranges[:, 1] - ranges[:, 0]
+        return degree
+
+    def _get_neighbors(
+        self, positions: np.ndarray, types: np.ndarray | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Get the neighbors of the given types of the objects at the given positions.
+
+        Args:
+            positions: the positions of the objects
+            types: the positions in `ENTITY_TYPES` of the types of neighbors; all types if None
+
+        Returns:
+            The positions of the neighbors and the rows of the corresponding links.
+        """
+        _, neighbors, rows = self._get_adjacency()
+        ranges = self._get_ranges(positions, types)
+        lengths = ranges[:, 1] - ranges[:, 0]
+        # concatenate the ranges without a python loop
+        offsets = np.repeat(ranges[:, 0] - np.cumsum(lengths) + lengths, lengths)
+        index = offsets + np.arange(lengths.sum())
+        return neighbors[index], rows[index]
+
+    def _reserve(self, size: int) -> None:
+        """Make sure the buffers of the links can hold `size` links."""
+        capacity = len(self._u)
+        if size <= capacity:
+            return
+        capacity = max(size, 2 * capacity, 16)
+        self._u = self._resize(self._u, capacity, 0)
+        self._v = self._resize(self._v, capacity, 0)
+        for name in self._values:
+            self._values[name] = self._resize(self._values[name], capacity, 0)
+            self._param_ids[name] = self._resize(self._param_ids[name], capacity, -1)
+
+    @staticmethod
+    def _resize(array: np.ndarray, capacity: int, fill_value) -> np.ndarray:
+        """Return a copy of the array resized to `capacity`, padded with `fill_value`."""
+        resized = np.full(capacity, fill_value, dtype=array.dtype)
+        resized[: len(array)] = array[:capacity]
+        return resized
+
+    def _add_method(self, name: str, dtype: np.dtype) -> None:
+        """Add the columns of a scoring method, with the score values of the given dtype."""
+        if name not in self._values:
+            capacity = len(self._u)
+            self._values[name] = np.zeros(capacity, dtype=dtype)
+            self._param_ids[name] = np.full(capacity, -1, dtype=np.int32)
+            self._params[name] = []
+            self._param_positions[name] = {}
+
+    @staticmethod
+    def _get_score_dtype(values) -> np.dtype:
+        """Get the dtype to store the given score value(s), object if they are not numbers."""
+        dtype = np.asarray(values).dtype
+        return dtype if dtype.kind in "biuf" else np.dtype(object)
+
+    def _promote_scores(self, name: str, dtype: np.dtype) -> None:
+        """Promote the dtype of the scores of a scoring method to hold scores of `dtype`."""
+        current = self._values[name].dtype
+        if current.kind == "O" or current == dtype:
+            return
+        promoted = dtype if dtype.kind == "O" else np.result_type(current, dtype)
+        if promoted != current:
+            self._values[name] = self._values[name].astype(promoted)
+
+    def _get_param_id(self, name: str, parameter: dict) -> int:
+        """Get the position of the parameters in the table of the scoring method.
+
+        The parameters are looked up by identity, so links scored in one run share one entry.
+        """
+        positions = self._param_positions[name]
+        pos = positions.get(id(parameter))
+        if pos is None:
+            pos = len(self._params[name])
+            self._params[name].append(parameter)
+            positions[id(parameter)] = pos
+        return pos
+
+    def _set_score(self, name: str, row: int, score: Score) -> None:
+        """Set the score of a scoring method for the link at the given row."""
+        value = score.value
+        # keep the scores that are not numbers as they are, e.g. lists of hits
+        if isinstance(value, (Real, np.generic)):
+            dtype = self._get_score_dtype(value)
+        else:
+            dtype = np.dtype(object)
+        self._add_method(name, dtype)
+        self._promote_scores(name, dtype)
+        self._values[name][row] = value
+        self._param_ids[name][row] = self._get_param_id(name, score.parameter)
+
+    def _get_link_data(self, row: int) -> LINK_DATA:
+        """Get the data of the link at the given row."""
+        data = {}
+        for name, param_ids in self._param_ids.items():
+            param_id = param_ids[row]
+            if param_id >= 0:
+                value = self._values[name][row]
+                if isinstance(value, np.generic):
+                    value = value.item()
+                data[name] = Score(name, value, self._params[name][param_id])
+        return data
+
+    def _get_link(self, row: int) -> LINK:
+        """Get the link at the given row."""
+        return (
+            self._nodes[self._u[row]],
+            self._nodes[self._v[row]],
+            self._get_link_data(row),
+        )
+
+    def _take(self, rows: np.ndarray) -> LinkGraph:
+        """Return a new LinkGraph object with the links at the given rows."""
+        lg = LinkGraph()
+        u, v = self._u[rows], self._v[rows]
+        # keep the relative order of the objects
+        nodes = np.unique(np.concatenate([u, v]))
+        lg._nodes = [self._nodes[i] for i in nodes.tolist()]
+        lg._node_index = {node: i for i, node in enumerate(lg._nodes)}
+        lg._node_types = [self._node_types[i] for i in nodes.tolist()]
+        lg._u = np.searchsorted(nodes, u)
+        lg._v = np.searchsorted(nodes, v)
+        lg._size = len(rows)
+        for name in self._values:
+            param_ids = self._param_ids[name][rows]
+            if (param_ids < 0).all():
+                continue
+            lg._values[name] = self._values[name][rows]
+            lg._param_ids[name] = param_ids
+            lg._params[name] = list(self._params[name])
+            lg._param_positions[name] = dict(self._param_positions[name])
+        lg._build_key_index()
+        return lg
 
     def _get_table_repr(self) -> str:
         """Generate a table representation of the LinkGraph.
 
-        The table is truncated to 60 links.
+        The table is truncated to 60 links, and only the displayed links are created. Use `top` to
+        display the links of the highest scores.
         """
         headers = ["", "Object 1", "Object 2", "Metcalf Score", "Rosetta Score"]
         table_data = []
         display_limit = 60
 
-        for index, (u, v, data) in enumerate(self.links, start=1):
+        for index in range(1, min(self._size, display_limit) + 1):
+            u, v, data = self._get_link(index - 1)
             metcalf_score = data.get("metcalf")
             rosetta_score = data.get("rosetta")
 
@@ -307,13 +1057,10 @@ class LinkGraph:
             ]
             table_data.append(row)
 
-            if index == display_limit:
-                break
-
         table = tabulate(table_data, headers=headers, tablefmt="github", stralign="right")
 
-        if len(self.links) > display_limit:
-            truncated_info = f"...\n[ {len(self.links)} links ]"
+        if self._size > display_limit:
+            truncated_info = f"...\n[ {self._size} links ]"
             return f"{table}\n{truncated_info}"
 
         return table
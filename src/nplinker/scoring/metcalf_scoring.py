@@ -1,5 +1,10 @@
 from __future__ import annotations
+import hashlib
+import json
 import logging
+import os
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
 from typing import TYPE_CHECKING
 from typing import Any
@@ -7,17 +12,20 @@ from typing import Union
 from typing import overload
 import numpy as np
 import pandas as pd
-from scipy.stats import hypergeom
+from scipy.sparse import csr_matrix
 from nplinker.genomics import GCF
 from nplinker.metabolomics import MolecularFamily
 from nplinker.metabolomics import Spectrum
+from nplinker.strain import StrainCollection
 from .abc import ScoringBase
 from .link_graph import LinkGraph
-from .link_graph import Score
 from .scoring_method import ScoringMethod
 from .utils import get_presence_gcf_strain
+from .utils import get_presence_matrix
 from .utils import get_presence_mf_strain
 from .utils import get_presence_spec_strain
+from .utils import pack_presence
+from .utils import unpack_presence
 
 
 if TYPE_CHECKING:
@@ -43,7 +51,17 @@ class MetcalfScoring(ScoringBase):
     Attributes:
         name: The name of this scoring method, set to a fixed value `metcalf`.
         npl: The NPLinker object.
-        CACHE: The name of the cache file to use for storing the MetcalfScoring.
+        CACHE: The name of the cache directory in the output directory of NPLinker, used for
+            storing the presence DataFrames, raw scores and mean/std tables of the MetcalfScoring
+            if `use_cache` is True. The cache is keyed by a fingerprint of the strains, the objects
+            and their strains and the weights, so `setup` loads it instead of calculating the
+            scores if the data are unchanged. The raw scores are loaded as read-only memory-mapped
+            arrays.
+        use_cache: Whether `setup` and `update` load and save the cache, see `CACHE`. Default is
+            False. The cache stores the dense raw score arrays, i.e. 4 bytes per spectrum-gcf and
+            per mf-gcf pair, e.g. about 4 GB for 100,000 spectra and 10,000 GCFs, so only enable
+            it if the scores are too slow to calculate and the disk space is available. Set it
+            before calling `setup`.
 
         presence_gcf_strain: A DataFrame to store presence of gcfs with respect to strains.
             The index of the DataFrame are the GCF objects and the columns are Strain objects.
@@ -55,28 +73,35 @@ class MetcalfScoring(ScoringBase):
             The index of the DataFrame are the MolecularFamily objects and the columns are Strain objects.
             The values are 1 where the molecular family occurs in the strain, 0 otherwise.
 
-        raw_score_spec_gcf: A DataFrame to store the raw Metcalf scores for spectrum-gcf links.
-            The columns are "spec", "gcf" and "score":
-
-            - The "spec" and "gcf" columns contain the Spectrum and GCF objects respectively,
-            - The "score" column contains the raw Metcalf scores.
-
-        raw_score_mf_gcf: A DataFrame to store the raw Metcalf scores for molecular family-gcf links.
-            The columns are "mf", "gcf" and "score":
-
-            - The "mf" and "gcf" columns contain the MolecularFamily and GCF objects respectively,
-            - the "score" column contains the raw Metcalf scores.
+        raw_score_spec_gcf: A numpy array to store the raw Metcalf scores for spectrum-gcf links.
+            The array has shape (n_spectra, n_gcfs). The rows and columns follow the order of the
+            index of `presence_spec_strain` and `presence_gcf_strain`, respectively, so the objects
+            are only referred to by their integer positions.
+        raw_score_mf_gcf: A numpy array to store the raw Metcalf scores for molecular family-gcf
+            links. The array has shape (n_mfs, n_gcfs). The rows and columns follow the order of
+            the index of `presence_mf_strain` and `presence_gcf_strain`, respectively.
 
         metcalf_mean: A numpy array to store the mean value used for standardising Metcalf scores.
             The array has shape (n_strains+1, n_strains+1), where n_strains is the number of strains.
         metcalf_std: A numpy array to store the standard deviation value used for standardising
             Metcalf scores. The array has shape (n_strains+1, n_strains+1), where n_strains is the
             number of strains.
+
+        chunk_size: The number of spectra or molecular families per block in chunked scoring mode.
+            If None (default), the raw scores are calculated for all links in `setup` and kept in
+            memory. If set, the raw scores are not kept in memory; instead, `get_links` calculates
+            them block by block from the presence DataFrames and only keeps the links that pass
+            the cutoff, so the memory use is bounded by the block size. Set it before calling
+            `setup`.
+        n_jobs: The number of worker processes used to score the blocks in chunked scoring mode.
+            Default is 1, i.e. no worker processes. If -1, all CPUs are used.
     """
 
     name = ScoringMethod.METCALF.value
     npl: NPLinker | None = None
-    CACHE: str = "cache_metcalf_scoring.pckl"
+    CACHE: str = "cache_metcalf_scoring"
+    CACHE_VERSION: int = 1
+    use_cache: bool = False
     metcalf_weights: tuple[int, int, int, int] = (10, -10, 0, 1)
 
     # index: gcf/spec/mf ids, columns: strain ids, value: 0/1
@@ -84,12 +109,16 @@ class MetcalfScoring(ScoringBase):
     presence_spec_strain: pd.DataFrame = pd.DataFrame()
     presence_mf_strain: pd.DataFrame = pd.DataFrame()
 
-    raw_score_spec_gcf: pd.DataFrame = pd.DataFrame(columns=["spec", "gcf", "score"])
-    raw_score_mf_gcf: pd.DataFrame = pd.DataFrame(columns=["mf", "gcf", "score"])
+    # rows: spec/mf positions, columns: gcf positions, value: raw Metcalf score
+    raw_score_spec_gcf: np.ndarray = np.zeros((0, 0), dtype=np.int32)
+    raw_score_mf_gcf: np.ndarray = np.zeros((0, 0), dtype=np.int32)
 
     metcalf_mean: np.ndarray | None = None
     metcalf_std: np.ndarray | None = None
 
+    chunk_size: int | None = None
+    n_jobs: int = 1
+
     @classmethod
     def setup(cls, npl: NPLinker) -> None:
         """Setup the MetcalfScoring object.
@@ -109,32 +138,127 @@ class MetcalfScoring(ScoringBase):
         )
         cls.npl = npl
 
+        cache_dir = os.path.join(npl.output_dir, cls.CACHE)
+        fingerprint = cls._get_fingerprint(npl) if cls.use_cache else ""
+        if cls.use_cache and cls._load_cache(npl, cache_dir, fingerprint):
+            logger.info(f"MetcalfScoring.setup completed, loaded from cache {cache_dir}")
+            return
+
         # calculate presence of gcfs/spectra/mfs with respect to strains
         cls.presence_gcf_strain = get_presence_gcf_strain(npl.gcfs, npl.strains)
         cls.presence_spec_strain = get_presence_spec_strain(npl.spectra, npl.strains)
         cls.presence_mf_strain = get_presence_mf_strain(npl.mfs, npl.strains)
 
-        # calculate raw Metcalf scores for spec-gcf links
-        raw_score_spec_gcf = cls._calc_raw_score(
-            cls.presence_spec_strain, cls.presence_gcf_strain, cls.metcalf_weights
-        )
-        cls.raw_score_spec_gcf = raw_score_spec_gcf.reset_index().melt(id_vars="index")
-        cls.raw_score_spec_gcf.columns = ["spec", "gcf", "score"]  # type: ignore
+        if cls.chunk_size is None:
+            # calculate raw Metcalf scores for spec-gcf links
+            cls.raw_score_spec_gcf = cls._calc_raw_score(
+                cls.presence_spec_strain, cls.presence_gcf_strain, cls.metcalf_weights
+            )
 
-        # calculate raw Metcalf scores for spec-gcf links
-        raw_score_mf_gcf = cls._calc_raw_score(
-            cls.presence_mf_strain, cls.presence_gcf_strain, cls.metcalf_weights
-        )
-        cls.raw_score_mf_gcf = raw_score_mf_gcf.reset_index().melt(id_vars="index")
-        cls.raw_score_mf_gcf.columns = ["mf", "gcf", "score"]  # type: ignore
+            # calculate raw Metcalf scores for mf-gcf links
+            cls.raw_score_mf_gcf = cls._calc_raw_score(
+                cls.presence_mf_strain, cls.presence_gcf_strain, cls.metcalf_weights
+            )
+        else:
+            logger.info("MetcalfScoring: chunked scoring mode, raw scores are calculated later.")
+            cls.raw_score_spec_gcf = np.zeros((0, 0), dtype=np.int32)
+            cls.raw_score_mf_gcf = np.zeros((0, 0), dtype=np.int32)
 
         # calculate mean and std for standardising Metcalf scores
         cls.metcalf_mean, cls.metcalf_std = cls._calc_mean_std(
             len(npl.strains), cls.metcalf_weights
         )
 
+        if cls.use_cache:
+            cls._save_cache(cache_dir, fingerprint)
         logger.info("MetcalfScoring.setup completed")
 
+    @classmethod
+    def update(cls, npl: NPLinker) -> None:
+        """Update the MetcalfScoring object incrementally with the new data of the NPLinker object.
+
+        The strains, GCFs, spectra and molecular families in `npl` that are not scored yet are
+        appended to the presence DataFrames as new columns and rows, and only the affected blocks
+        of the raw scores are calculated:
+
+        - the raw Metcalf score is a sum of per-strain terms, so the scores between existing
+            objects are updated by adding the scores over the new strains only;
+        - the scores involving new objects are calculated over all strains.
+
+        The mean and standard deviation tables are recalculated if new strains are added.
+
+        The occurrence of the scored objects in the existing strains is compared with the stored
+        presence. If it has changed (e.g. a spectrum is found in another existing strain), or if
+        any scored object or strain is no longer present in `npl`, the existing scores are stale
+        and all scores are recalculated from scratch. If the MetcalfScoring object has not been
+        set up yet, `setup` is called instead.
+
+        Args:
+            npl: The NPLinker object with new data added.
+
+        Examples:
+            >>> MetcalfScoring.setup(npl)
+            >>> # load the dataset again after new strains, spectra or GCFs are added
+            >>> npl.load_data()
+            >>> MetcalfScoring.update(npl)
+        """
+        if cls.npl is None:
+            cls.setup(npl)
+            return
+
+        old_strains = set(cls.presence_gcf_strain.columns)
+        new_strains = StrainCollection()
+        for strain in npl.strains:
+            if strain not in old_strains:
+                new_strains.add(strain)
+
+        extended_gcf = cls._extend_presence(cls.presence_gcf_strain, npl.gcfs, new_strains)
+        extended_spec = cls._extend_presence(cls.presence_spec_strain, npl.spectra, new_strains)
+        extended_mf = cls._extend_presence(cls.presence_mf_strain, npl.mfs, new_strains)
+        if (
+            len(npl.strains) - len(new_strains) != len(old_strains)
+            or extended_gcf is None
+            or extended_spec is None
+            or extended_mf is None
+        ):
+            logger.info(
+                "MetcalfScoring.update found removed or changed objects or strains, running setup."
+            )
+            cls.npl = None
+            cls.setup(npl)
+            return
+
+        logger.info(
+            f"MetcalfScoring.update starts: "
+            f"#new_gcfs={len(extended_gcf[0]) - len(cls.presence_gcf_strain)}, "
+            f"#new_spectra={len(extended_spec[0]) - len(cls.presence_spec_strain)}, "
+            f"#new_mfs={len(extended_mf[0]) - len(cls.presence_mf_strain)}, "
+            f"#new_strains={len(new_strains)}"
+        )
+        cls.npl = npl
+
+        # update raw Metcalf scores for spec-gcf and mf-gcf links
+        if cls.chunk_size is None:
+            cls.raw_score_spec_gcf = cls._extend_raw_score(
+                cls.raw_score_spec_gcf, *extended_spec, *extended_gcf, cls.metcalf_weights
+            )
+            cls.raw_score_mf_gcf = cls._extend_raw_score(
+                cls.raw_score_mf_gcf, *extended_mf, *extended_gcf, cls.metcalf_weights
+            )
+        cls.presence_gcf_strain = extended_gcf[0]
+        cls.presence_spec_strain = extended_spec[0]
+        cls.presence_mf_strain = extended_mf[0]
+
+        # update mean and std for standardising Metcalf scores
+        if len(new_strains) > 0:
+            cls.metcalf_mean, cls.metcalf_std = cls._calc_mean_std(
+                len(npl.strains), cls.metcalf_weights
+            )
+
+        if cls.use_cache:
+            cls._save_cache(os.path.join(npl.output_dir, cls.CACHE), cls._get_fingerprint(npl))
+        logger.info("MetcalfScoring.update completed")
+
     @overload
     def get_links(self, *objects: GCF, **parameters: Any) -> LinkGraph: ...
     @overload
@@ -154,6 +278,10 @@ class MetcalfScoring(ScoringBase):
 
                 - `cutoff`: The minimum score to consider a link (≥cutoff). Default is 0.
                 - `standardised`: Whether to use standardised scores. Default is False.
+                - `top_k`: If given, only keep the `top_k` highest-scoring links (≥cutoff) of each
+                    input object for each link type (spec-gcf or mf-gcf). Default is None.
+                - `top_k_total`: If given, only keep the `top_k_total` highest-scoring links
+                    (≥cutoff) of all input objects for each link type. Default is None.
 
         Returns:
             The [`LinkGraph`][nplinker.scoring.LinkGraph] object containing the links involving the
@@ -161,54 +289,197 @@ class MetcalfScoring(ScoringBase):
 
         Raises:
             TypeError: If the input objects are not of the same type or the object type is invalid.
+            ValueError: If `top_k` or `top_k_total` is not a positive integer.
+
+        Examples:
+            Get the 10 best spectrum or molecular family candidates for a GCF:
+            >>> lg = mc.get_links(gcf, top_k=10)
         """
-        # validate input objects
-        if len(objects) == 0:
-            objects = self.npl.gcfs
-        # check if all objects are of the same type
-        types = {type(i) for i in objects}
-        if len(types) > 1:
-            raise TypeError("Input objects must be of the same type.")
-        # check if the object type is valid
-        obj_type = next(iter(types))
-        if obj_type not in (GCF, Spectrum, MolecularFamily):
-            raise TypeError(
-                f"Invalid type {obj_type}. Input objects must be GCF, Spectrum or MolecularFamily objects."
-            )
+        objects, obj_type = self._validate_objects(objects)
 
         # validate scoring parameters
         self._cutoff: float = parameters.get("cutoff", 0)
         self._standardised: bool = parameters.get("standardised", False)
-        parameters.update({"cutoff": self._cutoff, "standardised": self._standardised})
+        self._top_k: int | None = parameters.get("top_k")
+        self._top_k_total: int | None = parameters.get("top_k_total")
+        for name, value in (("top_k", self._top_k), ("top_k_total", self._top_k_total)):
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"`{name}` must be a positive integer, got {value}.")
+        parameters.update(
+            {
+                "cutoff": self._cutoff,
+                "standardised": self._standardised,
+                "top_k": self._top_k,
+                "top_k_total": self._top_k_total,
+            }
+        )
 
         logger.info(
             f"MetcalfScoring: #objects={len(objects)}, type={obj_type}, cutoff={self._cutoff}, "
-            f"standardised={self._standardised}"
+            f"standardised={self._standardised}, top_k={self._top_k}, "
+            f"top_k_total={self._top_k_total}"
+        )
+        if self._standardised and (self.metcalf_mean is None or self.metcalf_std is None):
+            raise ValueError(
+                "MetcalfScoring.metcalf_mean and metcalf_std are not set. Run MetcalfScoring.setup first."
+            )
+        scores_list = self._get_links(
+            *objects,
+            obj_type=obj_type,
+            score_cutoff=self._cutoff,
+            standardised=self._standardised,
+            top_k=self._top_k,
+            top_k_total=self._top_k_total,
         )
-        if not self._standardised:
-            scores_list = self._get_links(*objects, obj_type=obj_type, score_cutoff=self._cutoff)
-        else:
-            if self.metcalf_mean is None or self.metcalf_std is None:
-                raise ValueError(
-                    "MetcalfScoring.metcalf_mean and metcalf_std are not set. Run MetcalfScoring.setup first."
-                )
-            # use negative infinity as the score cutoff to ensure we get all links
-            scores_list = self._get_links(*objects, obj_type=obj_type, score_cutoff=-np.inf)
-            scores_list = self._calc_standardised_score(scores_list)
 
         links = LinkGraph()
         for score_df in scores_list:
-            for row in score_df.itertuples(index=False):  # row has attributes: spec/mf, gcf, score
-                met = row.spec if score_df.name == LinkType.SPEC_GCF else row.mf
-                links.add_link(
-                    row.gcf,
-                    met,
-                    metcalf=Score(self.name, row.score, parameters),
-                )
+            met_col = "spec" if score_df.name == LinkType.SPEC_GCF else "mf"
+            links.add_links(
+                score_df["gcf"],
+                score_df[met_col],
+                score_df["score"].to_numpy(),
+                name=self.name,
+                parameter=parameters,
+            )
 
-        logger.info(f"MetcalfScoring: completed! Found {len(links.links)} links in total.")
+        n_links = sum(len(score_df) for score_df in scores_list)
+        logger.info(f"MetcalfScoring: completed! Found {n_links} links in total.")
         return links
 
+    def get_pvalues(
+        self,
+        *objects: Entity,
+        n_permutations: int = 1000,
+        batch_size: int = 100,
+        max_exceedances: int | None = None,
+        cutoff: float | None = None,
+        max_fdr: float | None = 0.05,
+        seed: int | None = None,
+    ) -> list[pd.DataFrame]:
+        """Get empirical p-values of the links of the given objects by permuting strain labels.
+
+        For each permutation, the strain labels of the GCFs are shuffled, which keeps the number
+        of strains of every object and only changes the co-occurrence of the linked objects. The
+        p-value of a link is the fraction of permutations whose Metcalf score is at least the
+        observed score. The permutations are evaluated in batches of `batch_size`: the permuted
+        GCF presence of a batch is stacked into one sparse matrix, so the co-occurrences of all
+        links in all permutations of the batch come from a single sparse matrix product. With
+        `n_jobs` > 1, the batches are evaluated in a pool of worker processes.
+
+        If `max_exceedances` is given, a link stops being permuted once `max_exceedances`
+        permutations score at least as high as the observed score, and its p-value is estimated as
+        `max_exceedances / n` with n the number of permutations done for it (Besag and Clifford,
+        1991). Otherwise the p-value is `(exceedances + 1) / (n_permutations + 1)`.
+
+        The false discovery rate (FDR) is calculated with the Benjamini-Hochberg procedure over
+        all tested links of each link type. By default only the links with FDR ≤ `max_fdr` are
+        returned, so the result does not hold all pairs of the objects. The counts of the tested
+        links are still kept in dense arrays of shape (n_met, n_gcf), so to bound the memory use
+        on large datasets, test the links of a subset of the objects at a time.
+
+        Args:
+            objects: The objects to get p-values for. All objects must be of the same type, i.e.
+                `GCF`, `Spectrum` or `MolecularFamily` type.
+                If no objects are provided, all detected objects (`npl.gcfs`) will be used.
+            n_permutations: The maximum number of permutations. Default is 1000.
+            batch_size: The number of permutations evaluated in one sparse matrix product.
+                Default is 100.
+            max_exceedances: If given, the number of exceedances after which a link stops being
+                permuted. Default is None, i.e. no early stopping.
+            cutoff: If given, only return the links with raw Metcalf score ≥ `cutoff`. The FDR
+                is still calculated over all tested links. Default is None.
+            max_fdr: If given, only return the links with FDR ≤ `max_fdr`. Default is 0.05. If
+                None, all tested links are returned.
+            seed: The seed of the random number generator for the permutations.
+
+        Returns:
+            List of data frames named by link types, see `LinkType`. Each data frame has column
+            names of ['spec', 'gcf', 'score', 'pvalue', 'fdr'] or ['mf', 'gcf', 'score', 'pvalue',
+            'fdr'] depending on the link type, where 'score' contains the raw Metcalf scores.
+
+        Raises:
+            TypeError: If the input objects are not of the same type or the object type is invalid.
+            ValueError: If `n_permutations`, `batch_size`, `max_exceedances`, `max_fdr` or
+                `n_jobs` is invalid.
+
+        Examples:
+            Get the links with FDR ≤ 0.05 of all GCFs:
+            >>> spec_gcf, mf_gcf = mc.get_pvalues(n_permutations=10000, max_exceedances=50)
+
+            Get the p-values of all links of a GCF:
+            >>> spec_gcf, mf_gcf = mc.get_pvalues(gcf, max_fdr=None)
+        """
+        objs, obj_type = self._validate_objects(objects)
+        for name, value in (
+            ("n_permutations", n_permutations),
+            ("batch_size", batch_size),
+            ("max_exceedances", max_exceedances),
+        ):
+            if value is not None and (not isinstance(value, int) or value < 1):
+                raise ValueError(f"`{name}` must be a positive integer, got {value}.")
+        if max_fdr is not None and not 0 < max_fdr <= 1:
+            raise ValueError(f"`max_fdr` must be in the range (0, 1], got {max_fdr}.")
+        n_jobs = (os.cpu_count() or 1) if self.n_jobs == -1 else self.n_jobs
+        if n_jobs < 1:
+            raise ValueError(f"`n_jobs` must be a positive integer or -1, got {self.n_jobs}.")
+
+        link_types = []
+        if obj_type in (GCF, Spectrum):
+            link_types.append(LinkType.SPEC_GCF)
+        if obj_type in (GCF, MolecularFamily):
+            link_types.append(LinkType.MF_GCF)
+
+        logger.info(
+            f"MetcalfScoring: permutation test for #objects={len(objs)}, type={obj_type}, "
+            f"n_permutations={n_permutations}, batch_size={batch_size}, "
+            f"max_exceedances={max_exceedances}, max_fdr={max_fdr}, n_jobs={n_jobs}"
+        )
+        rng = np.random.default_rng(seed)
+        results = []
+        for link_type in link_types:
+            if link_type == LinkType.SPEC_GCF:
+                met_col, met_presence = "spec", self.presence_spec_strain
+            else:
+                met_col, met_presence = "mf", self.presence_mf_strain
+            met_index = met_presence.index
+            gcf_index = self.presence_gcf_strain.index
+            if obj_type == GCF:
+                rows = np.arange(len(met_index))
+                cols = self._get_positions(gcf_index, objs)
+            else:
+                rows = self._get_positions(met_index, objs)
+                cols = np.arange(len(gcf_index))
+
+            p_met = self._get_presence_rows(met_presence, rows)
+            p_gcf = self._get_presence_rows(self.presence_gcf_strain, cols)
+            scores = self._calc_raw_score(p_met, p_gcf, self.metcalf_weights)
+            pvalues = self._calc_permutation_pvalues(
+                p_met, p_gcf, n_permutations, batch_size, max_exceedances, n_jobs, rng
+            )
+            fdr = self._calc_fdr(pvalues.ravel()).reshape(pvalues.shape)
+
+            mask = np.ones(scores.shape, dtype=bool)
+            if cutoff is not None:
+                mask &= scores >= cutoff
+            if max_fdr is not None:
+                mask &= fdr <= max_fdr
+            i, j = np.nonzero(mask)
+            df = pd.DataFrame(
+                {
+                    met_col: met_index[rows[i]],
+                    "gcf": gcf_index[cols[j]],
+                    "score": scores[i, j],
+                    "pvalue": pvalues[i, j],
+                    "fdr": fdr[i, j],
+                }
+            )
+            df.name = link_type
+            results.append(df)
+
+        logger.info("MetcalfScoring: permutation test completed.")
+        return results
+
     # TODO CG: refactor this method
     def format_data(self, data):
         """Format the data for display."""
@@ -221,37 +492,155 @@ class MetcalfScoring(ScoringBase):
         # sort based on score
         return sorted(objects, key=lambda objlink: objlink[self], reverse=reverse)
 
+    def _validate_objects(self, objects: Sequence[Entity]) -> tuple[Sequence[Entity], type]:
+        """Validate the input objects of `get_links` and `get_pvalues`.
+
+        Args:
+            objects: The input objects. If empty, all GCFs (`npl.gcfs`) are used.
+
+        Returns:
+            The input objects and their type.
+
+        Raises:
+            TypeError: If the input objects are not of the same type or the object type is invalid.
+            ValueError: If no objects are given and MetcalfScoring is not set up.
+        """
+        if len(objects) == 0:
+            if self.npl is None:
+                raise ValueError("MetcalfScoring is not set up. Run MetcalfScoring.setup first.")
+            objects = self.npl.gcfs
+        # check if all objects are of the same type
+        types = {type(i) for i in objects}
+        if len(types) > 1:
+            raise TypeError("Input objects must be of the same type.")
+        # check if the object type is valid
+        obj_type = next(iter(types))
+        if obj_type not in (GCF, Spectrum, MolecularFamily):
+            raise TypeError(
+                f"Invalid type {obj_type}. Input objects must be GCF, Spectrum or MolecularFamily objects."
+            )
+        return objects, obj_type
+
     @staticmethod
     def _calc_raw_score(
-        p1: pd.DataFrame, p2: pd.DataFrame, weights: tuple[int, int, int, int]
-    ) -> pd.DataFrame:
+        p1: pd.DataFrame | csr_matrix,
+        p2: pd.DataFrame | csr_matrix,
+        weights: tuple[int, int, int, int],
+    ) -> np.ndarray:
         """Calculate non-standardised Metcalf scores.
 
         Args:
-            p1: A DataFrame containing the presence of objects in strains.
-            p2: A DataFrame containing the presence of objects in strains.
+            p1: A DataFrame or sparse matrix containing the presence of objects in strains.
+            p2: A DataFrame or sparse matrix containing the presence of objects in strains.
             weights: The weights to use for Metcalf scoring.
 
         Returns:
-            A DataFrame containing the non-standardised Metcalf scores.
+            A numpy array of shape (len(p1), len(p2)) containing the non-standardised Metcalf
+            scores. The rows and columns follow the order of the rows of `p1` and `p2`.
         """
-        nop1 = 1 - p1
-        nop2 = 1 - p2
-
-        # calculate co-presence
-        p1_p2 = p1.dot(p2.T)
-        p1_nop2 = p1.dot(nop2.T)
-        nop1_p2 = nop1.dot(p2.T)
-        nop1_nop2 = nop1.dot(nop2.T)
-
-        # calculate weighted sum
-        score = (
-            p1_p2 * weights[0]
-            + p1_nop2 * weights[1]
-            + nop1_p2 * weights[2]
-            + nop1_nop2 * weights[3]
-        )
+        n_strains = p1.shape[1]
+        sp1 = csr_matrix(p1.to_numpy(dtype=np.int32) if isinstance(p1, pd.DataFrame) else p1)
+        sp2 = csr_matrix(p2.to_numpy(dtype=np.int32) if isinstance(p2, pd.DataFrame) else p2)
+
+        # number of strains for each object
+        n1 = np.asarray(sp1.sum(axis=1), dtype=np.int32)  # shape (len(p1), 1)
+        n2 = np.asarray(sp2.sum(axis=1), dtype=np.int32).T  # shape (1, len(p2))
+
+        # calculate co-presence, the other three co-presence counts follow from it:
+        #   p1 · (1-p2)ᵀ     = n1 - p1_p2
+        #   (1-p1) · p2ᵀ     = n2 - p1_p2
+        #   (1-p1) · (1-p2)ᵀ = n_strains - n1 - n2 + p1_p2
+        p1_p2: np.ndarray = (sp1 @ sp2.T).toarray().astype(np.int32, copy=False)
+
+        # calculate weighted sum, grouped by the terms of p1_p2, n1, n2 and n_strains
+        score = p1_p2
+        score *= weights[0] - weights[1] - weights[2] + weights[3]
+        score += n1 * (weights[1] - weights[3])
+        score += n2 * (weights[2] - weights[3])
+        score += n_strains * weights[3]
+
+        return score
+
+    @staticmethod
+    def _extend_presence(
+        presence: pd.DataFrame, objects: Sequence[Entity], new_strains: StrainCollection
+    ) -> tuple[pd.DataFrame, pd.DataFrame] | None:
+        """Extend the presence DataFrame with new objects (rows) and new strains (columns).
+
+        Args:
+            presence: The presence DataFrame of the existing objects.
+            objects: All current objects, including the existing and the new ones.
+            new_strains: The strains to add as new columns.
+
+        Returns:
+            None if any existing object is not found in `objects`, or if the occurrence of any
+            existing object in the existing strains differs from `presence`. Otherwise, a tuple of
+
+            - the extended presence DataFrame, with the existing objects first and the new objects
+                after them, and with the new strains appended to the columns;
+            - the presence DataFrame of the existing objects with respect to the new strains.
+        """
+        positions = pd.Index(list(objects)).get_indexer(presence.index)
+        if (positions < 0).any():
+            return None
+        is_new = np.ones(len(objects), dtype=bool)
+        is_new[positions] = False
+        # use the current objects, which are equal to the existing ones
+        old_objects = [objects[i] for i in positions.tolist()]
+        new_objects = [objects[i] for i in np.flatnonzero(is_new).tolist()]
+
+        strains = list(presence.columns) + list(new_strains)
+        old_all = get_presence_matrix(old_objects, strains).toarray().astype(int)  # type: ignore
+        n_old_strains = presence.shape[1]
+        if not np.array_equal(old_all[:, :n_old_strains], presence.to_numpy()):
+            return None
+        old_new = old_all[:, n_old_strains:]
+        new_all = get_presence_matrix(new_objects, strains).toarray().astype(int)  # type: ignore
+
+        extended = pd.DataFrame(
+            np.vstack([np.hstack([presence.to_numpy(), old_new]), new_all]),
+            index=old_objects + new_objects,
+            columns=strains,
+        )  # type: ignore
+        delta = pd.DataFrame(old_new, index=old_objects, columns=list(new_strains))  # type: ignore
+        return extended, delta
+
+    @classmethod
+    def _extend_raw_score(
+        cls,
+        raw_score: np.ndarray,
+        p1: pd.DataFrame,
+        p1_new_strains: pd.DataFrame,
+        p2: pd.DataFrame,
+        p2_new_strains: pd.DataFrame,
+        weights: tuple[int, int, int, int],
+    ) -> np.ndarray:
+        """Extend the raw Metcalf scores with new objects and new strains.
+
+        Args:
+            raw_score: The raw Metcalf scores of the existing objects.
+            p1: The extended presence DataFrame of the objects on the rows of `raw_score`.
+            p1_new_strains: The presence DataFrame of the existing objects on the rows with respect
+                to the new strains.
+            p2: The extended presence DataFrame of the objects on the columns of `raw_score`.
+            p2_new_strains: The presence DataFrame of the existing objects on the columns with
+                respect to the new strains.
+            weights: The weights to use for Metcalf scoring.
+
+        Returns:
+            A numpy array of shape (len(p1), len(p2)) containing the raw Metcalf scores.
+        """
+        n1, n2 = raw_score.shape
+        score = np.empty((len(p1), len(p2)), dtype=np.int32)
+
+        # existing objects: add the scores over the new strains
+        score[:n1, :n2] = raw_score
+        if p1_new_strains.shape[1] > 0:
+            score[:n1, :n2] += cls._calc_raw_score(p1_new_strains, p2_new_strains, weights)
 
+        # new objects: calculate the scores over all strains
+        score[:n1, n2:] = cls._calc_raw_score(p1.iloc[:n1], p2.iloc[n2:], weights)
+        score[n1:, :] = cls._calc_raw_score(p1.iloc[n1:], p2, weights)
         return score
 
     @staticmethod
@@ -268,36 +657,173 @@ class MetcalfScoring(ScoringBase):
             Two numpy arrays containing the mean and standard deviation values for Metcalf scoring.
             The arrays have shape (n_strains+1, n_strains+1).
         """
-        sz = (n_strains + 1, n_strains + 1)
-        mean = np.zeros(sz)
-        variance = np.zeros(sz)
-        for n in range(n_strains + 1):
-            for m in range(n_strains + 1):
-                max_overlap = min(n, m)
-                min_overlap = max(0, n + m - n_strains)
-                expected_value = 0
-                expected_sq = 0
-                for o in range(min_overlap, max_overlap + 1):
-                    o_prob = hypergeom.pmf(o, n_strains, n, m)
-                    # compute metcalf for n strains in type 1 and m in gcf
-                    score = o * weights[0]
-                    score += weights[1] * (n - o)
-                    score += weights[2] * (m - o)
-                    score += weights[3] * (n_strains - (n + m - o))
-                    expected_value += o_prob * score
-                    expected_sq += o_prob * (score**2)
-                mean[n, m] = expected_value
-                expected_sq = expected_sq - expected_value**2
-                if expected_sq < 1e-09:
-                    expected_sq = 1
-                variance[n, m] = expected_sq
+        # For an object in n strains and a gcf in m strains, the overlap o of their strains follows
+        # the hypergeometric distribution Hypergeom(n_strains, n, m), and the Metcalf score is a
+        # linear function of the overlap:
+        #   score = a * o + b,
+        # where a = w0 - w1 - w2 + w3 and b = w1 * n + w2 * m + w3 * (n_strains - n - m).
+        # So the mean and variance of the score follow from the moments of the overlap.
+        n = np.arange(n_strains + 1, dtype=np.float64)[:, np.newaxis]
+        m = np.arange(n_strains + 1, dtype=np.float64)[np.newaxis, :]
+        a = weights[0] - weights[1] - weights[2] + weights[3]
+        b = weights[1] * n + weights[2] * m + weights[3] * (n_strains - n - m)
+
+        if n_strains > 0:
+            overlap_mean = n * m / n_strains
+        else:
+            overlap_mean = np.zeros((1, 1))
+        if n_strains > 1:
+            overlap_var = n * m * (n_strains - n) * (n_strains - m)
+            overlap_var /= n_strains**2 * (n_strains - 1)
+        else:
+            overlap_var = np.zeros((n_strains + 1, n_strains + 1))
+
+        mean = a * overlap_mean + b
+        variance = a**2 * overlap_var
+        variance[variance < 1e-09] = 1
         return mean, np.sqrt(variance)
 
+    @classmethod
+    def _get_fingerprint(cls, npl: NPLinker) -> str:
+        """Get the fingerprint of the data and settings that the Metcalf scores depend on.
+
+        Args:
+            npl: The NPLinker object.
+
+        Returns:
+            The SHA-256 hex digest of the cache version, the weights, the scoring mode, the strain
+            ids and the ids and strain names of all GCFs, spectra and molecular families.
+        """
+        sha = hashlib.sha256()
+        header = [cls.CACHE_VERSION, list(cls.metcalf_weights), cls.chunk_size is None]
+        sha.update(json.dumps(header).encode())
+        # strains and objects are hashed in sorted order, as their order is kept in the cache index
+        sha.update(json.dumps(sorted(strain.id for strain in npl.strains)).encode())
+        groups: list[Sequence[Entity]] = [npl.gcfs, npl.spectra, npl.mfs]
+        for objects in groups:
+            for obj in sorted(objects, key=lambda x: x.id):
+                names = sorted(name for strain in obj.strains for name in strain.names)
+                sha.update(json.dumps([obj.id, names]).encode())
+            sha.update(b"\0")
+        return sha.hexdigest()
+
+    @classmethod
+    def _save_cache(cls, cache_dir: str, fingerprint: str) -> None:
+        """Save the presence DataFrames, raw scores and mean/std tables to the cache directory.
+
+        The presence DataFrames are saved as packed bitsets, and all arrays are saved as `.npy`
+        files so that they can be memory-mapped when loading. The index file `index.json`, which
+        contains the fingerprint and the ids of the strains and objects, is written last, so an
+        interrupted save is never loaded.
+
+        Args:
+            cache_dir: The path to the cache directory.
+            fingerprint: The fingerprint of the data, see `_get_fingerprint`.
+        """
+        index_file = os.path.join(cache_dir, "index.json")
+        arrays = {
+            "presence_gcf_strain": pack_presence(cls.presence_gcf_strain.to_numpy()),
+            "presence_spec_strain": pack_presence(cls.presence_spec_strain.to_numpy()),
+            "presence_mf_strain": pack_presence(cls.presence_mf_strain.to_numpy()),
+            "raw_score_spec_gcf": cls.raw_score_spec_gcf,
+            "raw_score_mf_gcf": cls.raw_score_mf_gcf,
+            "metcalf_mean": cls.metcalf_mean,
+            "metcalf_std": cls.metcalf_std,
+        }
+        index = {
+            "fingerprint": fingerprint,
+            "strains": [strain.id for strain in cls.presence_gcf_strain.columns],  # type: ignore
+            "gcfs": [gcf.id for gcf in cls.presence_gcf_strain.index],
+            "spectra": [spec.id for spec in cls.presence_spec_strain.index],
+            "mfs": [mf.id for mf in cls.presence_mf_strain.index],
+        }
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            if os.path.exists(index_file):
+                os.remove(index_file)
+            for name, array in arrays.items():
+                # write to a new file and replace the old one, which may still be memory-mapped
+                path = os.path.join(cache_dir, f"{name}.npy")
+                with open(f"{path}.tmp", "wb") as f:
+                    np.save(f, array)  # type: ignore
+                os.replace(f"{path}.tmp", path)
+            with open(index_file, "w") as f:
+                json.dump(index, f)
+        except OSError as e:
+            logger.warning(f"MetcalfScoring: failed to save cache to {cache_dir}: {e}")
+
+    @classmethod
+    def _load_cache(cls, npl: NPLinker, cache_dir: str, fingerprint: str) -> bool:
+        """Load the presence DataFrames, raw scores and mean/std tables from the cache directory.
+
+        Args:
+            npl: The NPLinker object, used to look up the cached objects by their ids.
+            cache_dir: The path to the cache directory.
+            fingerprint: The fingerprint of the current data, see `_get_fingerprint`.
+
+        Returns:
+            True if the cache is loaded, False if the cache does not exist, is invalid or does not
+            match the fingerprint. The class attributes are only changed if the cache is loaded.
+        """
+        index_file = os.path.join(cache_dir, "index.json")
+        if not os.path.exists(index_file):
+            return False
+        try:
+            with open(index_file) as f:
+                index = json.load(f)
+            if index.get("fingerprint") != fingerprint:
+                logger.info("MetcalfScoring: cache is outdated, recalculating scores.")
+                return False
+            arrays = {
+                name: np.load(os.path.join(cache_dir, f"{name}.npy"), mmap_mode="r")
+                for name in (
+                    "presence_gcf_strain",
+                    "presence_spec_strain",
+                    "presence_mf_strain",
+                    "raw_score_spec_gcf",
+                    "raw_score_mf_gcf",
+                    "metcalf_mean",
+                    "metcalf_std",
+                )
+            }
+        except (OSError, ValueError) as e:
+            logger.warning(f"MetcalfScoring: failed to load cache from {cache_dir}: {e}")
+            return False
+
+        strain_dict = {strain.id: strain for strain in npl.strains}
+        strains = [strain_dict[strain_id] for strain_id in index["strains"]]
+        presence = {}
+        for name, ids, lookup in (
+            ("presence_gcf_strain", index["gcfs"], npl.lookup_gcf),
+            ("presence_spec_strain", index["spectra"], npl.lookup_spectrum),
+            ("presence_mf_strain", index["mfs"], npl.lookup_mf),
+        ):
+            objects = [lookup(obj_id) for obj_id in ids]
+            if any(obj is None for obj in objects):
+                return False
+            presence[name] = pd.DataFrame(
+                unpack_presence(arrays[name], len(strains)).astype(int),
+                index=objects,
+                columns=strains,
+            )  # type: ignore
+
+        cls.presence_gcf_strain = presence["presence_gcf_strain"]
+        cls.presence_spec_strain = presence["presence_spec_strain"]
+        cls.presence_mf_strain = presence["presence_mf_strain"]
+        cls.raw_score_spec_gcf = arrays["raw_score_spec_gcf"]
+        cls.raw_score_mf_gcf = arrays["raw_score_mf_gcf"]
+        cls.metcalf_mean = arrays["metcalf_mean"]
+        cls.metcalf_std = arrays["metcalf_std"]
+        return True
+
     def _get_links(
         self,
         *objects: Entity,
         obj_type: Entity,
         score_cutoff: float = 0,
+        standardised: bool = False,
+        top_k: int | None = None,
+        top_k_total: int | None = None,
     ) -> list[pd.DataFrame]:
         """Get links and scores for the given objects.
 
@@ -306,6 +832,12 @@ class MetcalfScoring(ScoringBase):
                 the same type.
             obj_type: The type of the objects.
             score_cutoff: Minimum score to consider a link (≥score_cutoff). Default is 0.
+            standardised: Whether to use standardised scores. If True, the `score_cutoff` is
+                applied to the standardised scores. Default is False.
+            top_k: If given, only keep the `top_k` highest-scoring links of each input object for
+                each link type. Default is None.
+            top_k_total: If given, only keep the `top_k_total` highest-scoring links for each link
+                type. Default is None.
 
         Returns:
             List of data frames containing the ids of the linked objects and the score.
@@ -317,67 +849,537 @@ class MetcalfScoring(ScoringBase):
             - the 'score' column contains the scores.
         """
         links = []
-        col_name = (
-            "spec" if obj_type == Spectrum else "mf" if obj_type == MolecularFamily else "gcf"
-        )
 
         # spec-gcf link
         if obj_type in (GCF, Spectrum):
-            df = self.raw_score_spec_gcf[
-                self.raw_score_spec_gcf[col_name].isin(objects)
-                & (self.raw_score_spec_gcf["score"] >= score_cutoff)
-            ]
-            df.name = LinkType.SPEC_GCF
+            df = self._get_score_df(
+                objects,
+                obj_type,
+                LinkType.SPEC_GCF,
+                score_cutoff,
+                standardised,
+                top_k,
+                top_k_total,
+            )
             links.append(df)
 
         # mf-gcf link
         if obj_type in (GCF, MolecularFamily):
-            df = self.raw_score_mf_gcf[
-                self.raw_score_mf_gcf[col_name].isin(objects)
-                & (self.raw_score_mf_gcf["score"] >= score_cutoff)
-            ]
-            df.name = LinkType.MF_GCF
+            df = self._get_score_df(
+                objects,
+                obj_type,
+                LinkType.MF_GCF,
+                score_cutoff,
+                standardised,
+                top_k,
+                top_k_total,
+            )
             links.append(df)
 
         return links
 
-    def _calc_standardised_score(self, raw_scores: list[pd.DataFrame]) -> list[pd.DataFrame]:
-        """Calculate standardised Metcalf scores.
+    def _get_score_df(
+        self,
+        objects: Sequence[Entity],
+        obj_type: Entity,
+        link_type: LinkType,
+        score_cutoff: float,
+        standardised: bool,
+        top_k: int | None = None,
+        top_k_total: int | None = None,
+    ) -> pd.DataFrame:
+        """Look up the scores of the given objects and wrap the passing links as a DataFrame.
+
+        The scores are selected from the raw score arrays by integer positions, and only the
+        selected links (see `_select_links`) are turned back into objects.
+
+        Args:
+            objects: A list of GCF, Spectrum or MolecularFamily objects and all objects must be of
+                the same type.
+            obj_type: The type of the objects.
+            link_type: The type of the links to get.
+            score_cutoff: Minimum score to consider a link (≥score_cutoff).
+            standardised: Whether to use standardised scores.
+            top_k: The maximum number of links to keep for each input object.
+            top_k_total: The maximum number of links to keep in total.
+
+        Returns:
+            A DataFrame named by the link type, with column names of ['spec', 'gcf', 'score'] or
+            ['mf', 'gcf', 'score'] depending on the link type.
+        """
+        if link_type == LinkType.SPEC_GCF:
+            met_col, raw_score, met_presence = (
+                "spec",
+                self.raw_score_spec_gcf,
+                self.presence_spec_strain,
+            )
+        else:
+            met_col, raw_score, met_presence = (
+                "mf",
+                self.raw_score_mf_gcf,
+                self.presence_mf_strain,
+            )
+        met_index = met_presence.index
+        gcf_index = self.presence_gcf_strain.index
+
+        if obj_type == GCF:
+            rows = np.arange(len(met_index))
+            cols = self._get_positions(gcf_index, objects)
+        else:
+            rows = self._get_positions(met_index, objects)
+            cols = np.arange(len(gcf_index))
+
+        # the input objects are on the columns for GCFs, otherwise on the rows
+        axis = 0 if obj_type == GCF else 1
+
+        if self.chunk_size is None:
+            scores = raw_score[np.ix_(rows, cols)]
+            if standardised:
+                p_met = self._get_presence_rows(met_presence, rows)
+                p_gcf = self._get_presence_rows(self.presence_gcf_strain, cols)
+                # the mean and std are checked in `get_links`
+                # the presences are 0/1, so the numbers of strains are the numbers of nonzeros
+                scores = self._calc_standardised_score(
+                    scores,
+                    p_met.getnnz(axis=1),
+                    p_gcf.getnnz(axis=1),
+                    self.metcalf_mean,  # type: ignore
+                    self.metcalf_std,  # type: ignore
+                )
+            i, j = self._select_links(scores, score_cutoff, top_k, top_k_total, axis)
+            met_pos, gcf_pos, values = rows[i], cols[j], scores[i, j]
+        else:
+            met_pos, gcf_pos, values = self._get_scores_in_chunks(
+                met_presence, rows, cols, standardised, score_cutoff, top_k, top_k_total, axis
+            )
+
+        df = pd.DataFrame(
+            {
+                met_col: met_index[met_pos],
+                "gcf": gcf_index[gcf_pos],
+                "score": values,
+            }
+        )
+        df.name = link_type
+        return df
+
+    def _get_scores_in_chunks(
+        self,
+        met_presence: pd.DataFrame,
+        rows: np.ndarray,
+        cols: np.ndarray,
+        standardised: bool,
+        score_cutoff: float,
+        top_k: int | None,
+        top_k_total: int | None,
+        axis: int,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Calculate the scores in blocks of `chunk_size` spectra or molecular families.
+
+        Each block is scored independently, optionally in a pool of `n_jobs` worker processes,
+        and only the links selected in the block are returned from it. The top links of all
+        blocks are then selected from the links of the blocks.
+
+        Args:
+            met_presence: The presence DataFrame of spectra or molecular families.
+            rows: The positions of the spectra or molecular families to score.
+            cols: The positions of the GCFs to score.
+            standardised: Whether to use standardised scores.
+            score_cutoff: Minimum score to consider a link (≥score_cutoff).
+            top_k: The maximum number of links to keep for each input object.
+            top_k_total: The maximum number of links to keep in total.
+            axis: The axis along which the candidates of each input object lie, see
+                `_select_links`.
+
+        Returns:
+            The positions of the spectra or molecular families, the positions of the GCFs and the
+            scores of the selected links.
+
+        Raises:
+            ValueError: If `chunk_size` or `n_jobs` is invalid.
+        """
+        if self.chunk_size < 1:  # type: ignore
+            raise ValueError(f"`chunk_size` must be a positive integer, got {self.chunk_size}.")
+        n_jobs = (os.cpu_count() or 1) if self.n_jobs == -1 else self.n_jobs
+        if n_jobs < 1:
+            raise ValueError(f"`n_jobs` must be a positive integer or -1, got {self.n_jobs}.")
+
+        state = {
+            "p_gcf": self._get_presence_rows(self.presence_gcf_strain, cols),
+            "cols": cols,
+            "weights": self.metcalf_weights,
+            "mean": self.metcalf_mean if standardised else None,
+            "std": self.metcalf_std if standardised else None,
+            "score_cutoff": score_cutoff,
+            "top_k": top_k,
+            "top_k_total": top_k_total,
+            "axis": axis,
+        }
+        tasks = [
+            (self._get_presence_rows(met_presence, chunk), chunk)
+            for chunk in (
+                rows[start : start + self.chunk_size]  # type: ignore
+                for start in range(0, len(rows), self.chunk_size)  # type: ignore
+            )
+        ]
+        logger.info(f"MetcalfScoring: scoring {len(tasks)} blocks with {n_jobs} worker(s).")
+
+        if n_jobs == 1:
+            results = [self._score_chunk(*task, **state) for task in tasks]
+        else:
+            with ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_chunk_worker, initargs=(state,)
+            ) as executor:
+                results = list(executor.map(_score_chunk_in_worker, tasks))
+        if not results:
+            return np.array([], dtype=int), np.array([], dtype=int), np.array([])
+
+        met_pos = np.concatenate([result[0] for result in results])
+        gcf_pos = np.concatenate([result[1] for result in results])
+        values = np.concatenate([result[2] for result in results])
+
+        # the top links of all blocks are among the top links of each block
+        if top_k is not None or top_k_total is not None:
+            keys = gcf_pos if axis == 0 else met_pos
+            keep = self._select_top_links(keys, values, top_k, top_k_total)
+            met_pos, gcf_pos, values = met_pos[keep], gcf_pos[keep], values[keep]
+
+        return met_pos, gcf_pos, values
+
+    @classmethod
+    def _score_chunk(
+        cls,
+        p_met: csr_matrix,
+        rows: np.ndarray,
+        *,
+        p_gcf: csr_matrix,
+        cols: np.ndarray,
+        weights: tuple[int, int, int, int],
+        mean: np.ndarray | None,
+        std: np.ndarray | None,
+        score_cutoff: float,
+        top_k: int | None,
+        top_k_total: int | None,
+        axis: int,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Score a block of spectra or molecular families against the GCFs.
+
+        Returns:
+            The positions of the spectra or molecular families, the positions of the GCFs and the
+            scores of the selected links in the block.
+        """
+        scores = cls._calc_raw_score(p_met, p_gcf, weights)
+        if mean is not None and std is not None:
+            n_met_strains = np.asarray(p_met.sum(axis=1)).ravel()
+            n_gcf_strains = np.asarray(p_gcf.sum(axis=1)).ravel()
+            scores = cls._calc_standardised_score(scores, n_met_strains, n_gcf_strains, mean, std)
+        i, j = cls._select_links(scores, score_cutoff, top_k, top_k_total, axis)
+        return rows[i], cols[j], scores[i, j]
+
+    @staticmethod
+    def _select_top_links(
+        keys: np.ndarray, values: np.ndarray, top_k: int | None, top_k_total: int | None
+    ) -> np.ndarray:
+        """Select the top links from a flat list of links.
+
+        Args:
+            keys: The positions of the input objects of the links.
+            values: The scores of the links.
+            top_k: If given, the maximum number of links to keep for each input object.
+            top_k_total: If given, the maximum number of links to keep in total.
+
+        Returns:
+            The indices of the selected links.
+        """
+        keep = np.arange(len(values))
+        if top_k is not None:
+            # rank the links of each input object by descending score
+            order = np.lexsort((-values, keys))
+            group_starts = np.flatnonzero(np.r_[True, np.diff(keys[order]) != 0])
+            group_sizes = np.diff(np.r_[group_starts, len(order)])
+            ranks = np.arange(len(order)) - np.repeat(group_starts, group_sizes)
+            keep = order[ranks < top_k]
+        if top_k_total is not None and len(keep) > top_k_total:
+            keep = keep[np.argpartition(values[keep], -top_k_total)[-top_k_total:]]
+        return keep
+
+    @staticmethod
+    def _select_links(
+        scores: np.ndarray,
+        score_cutoff: float,
+        top_k: int | None,
+        top_k_total: int | None,
+        axis: int,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Select the links with score ≥ `score_cutoff`, optionally keeping only the top ones.
+
+        The top links are found with `np.argpartition`, so no full sort of the scores is done.
+        Ties at the k-th score are broken arbitrarily.
+
+        Args:
+            scores: A numpy array of shape (n_met, n_gcf) containing the scores of the links.
+            score_cutoff: Minimum score to consider a link (≥score_cutoff).
+            top_k: If given, the maximum number of links to keep for each input object.
+            top_k_total: If given, the maximum number of links to keep in total.
+            axis: The axis of `scores` along which the candidates of each input object lie, i.e. 0
+                if the input objects are on the columns and 1 if they are on the rows.
+
+        Returns:
+            The row and column positions of the selected links in `scores`.
+        """
+        mask = scores >= score_cutoff
+
+        if top_k is not None and top_k < scores.shape[axis]:
+            # links below the cutoff never make it into the top k
+            masked_scores = np.where(mask, scores, -np.inf)
+            top = np.argpartition(masked_scores, -top_k, axis=axis)
+            top = np.take(top, np.arange(-top_k, 0), axis=axis)
+            top_mask = np.zeros_like(mask)
+            np.put_along_axis(top_mask, top, True, axis=axis)
+            mask &= top_mask
+
+        i, j = np.nonzero(mask)
+
+        if top_k_total is not None and len(i) > top_k_total:
+            top = np.argpartition(scores[i, j], -top_k_total)[-top_k_total:]
+            i, j = i[top], j[top]
+
+        return i, j
+
+    @classmethod
+    def _calc_permutation_pvalues(
+        cls,
+        p_met: csr_matrix,
+        p_gcf: csr_matrix,
+        n_permutations: int,
+        batch_size: int,
+        max_exceedances: int | None,
+        n_jobs: int,
+        rng: np.random.Generator,
+    ) -> np.ndarray:
+        """Calculate the empirical p-values of the links by permuting the strains of the GCFs.
+
+        The number of strains of each object is not changed by the permutations, so the Metcalf
+        score of a link is a linear function of the co-occurrence of its objects, and only the
+        co-occurrences are compared with the observed ones.
 
         Args:
-            raw_scores: A list of DataFrames containing the raw Metcalf scores.
+            p_met: The presence matrix of the spectra or molecular families.
+            p_gcf: The presence matrix of the GCFs.
+            n_permutations: The maximum number of permutations.
+            batch_size: The number of permutations per batch.
+            max_exceedances: If given, the number of exceedances after which a link stops being
+                permuted.
+            n_jobs: The number of worker processes.
+            rng: The random number generator for the permutations.
 
         Returns:
-            A list of DataFrames containing the standardised Metcalf scores.
+            A numpy array of shape (n_met, n_gcf) containing the p-values of the links.
         """
-        standardised_scores = []
-        for raw_score_df in raw_scores:
-            # create a new DataFrame to store the standardised scores, with the same columns
-            # and name as the raw score DataFrame
-            standardised_score_df = pd.DataFrame(columns=raw_score_df.columns)
-
-            for row in raw_score_df.itertuples(index=False):
-                met = row.spec if raw_score_df.name == LinkType.SPEC_GCF else row.mf
-                n_gcf_strains = len(row.gcf.strains)  # type: ignore
-                n_met_strains = len(met.strains)  # type: ignore
-
-                mean = self.metcalf_mean[n_met_strains][n_gcf_strains]  # type: ignore
-                sqrt = self.metcalf_std[n_met_strains][n_gcf_strains]  # type: ignore
-
-                z_score = (row.score - mean) / sqrt
-
-                if z_score >= self._cutoff:
-                    # add the row to the standardised score DataFrame with the z-score as score value
-                    data = {col_name: getattr(row, col_name) for col_name in raw_score_df.columns}
-                    data["score"] = z_score
-                    new_row = pd.DataFrame(data, index=[0])
-                    standardised_score_df = pd.concat(
-                        (standardised_score_df, new_row), ignore_index=True
+        shape = (p_met.shape[0], p_gcf.shape[0])
+        weights = cls.metcalf_weights
+        slope = weights[0] - weights[1] - weights[2] + weights[3]
+        if slope == 0 or 0 in shape:
+            # the score does not depend on the co-occurrence
+            return np.ones(shape)
+        # count the permutations with co-occurrence ≥ observed, or ≤ observed for a negative slope
+        sign = 1 if slope > 0 else -1
+        observed = sign * (p_met @ p_gcf.T).toarray().astype(np.int32)
+
+        exceedances = np.zeros(shape, dtype=np.int32)
+        # without early stopping, all links are permuted in every round, so the number of done
+        # permutations (broadcast to all links) and the active links are not tracked per link
+        early_stopping = max_exceedances is not None
+        n_done = np.zeros(shape if early_stopping else (1, 1), dtype=np.int32)
+        active = np.ones(shape, dtype=bool) if early_stopping else None
+        n_strains = p_met.shape[1]
+        state = {"p_gcf": p_gcf, "sign": sign}
+        executor = (
+            ProcessPoolExecutor(
+                max_workers=n_jobs, initializer=_init_chunk_worker, initargs=(state,)
+            )
+            if n_jobs > 1
+            else None
+        )
+        try:
+            n_left = n_permutations
+            while n_left > 0 and (active is None or active.any()):
+                # one round: a batch of permutations for each worker
+                sizes = [min(batch_size, n_left - k * batch_size) for k in range(n_jobs)]
+                sizes = [size for size in sizes if size > 0]
+                n_left -= sum(sizes)
+                # only the rows with active links are permuted
+                if active is None:
+                    p_met_active, observed_active = p_met, observed
+                else:
+                    active_rows = np.flatnonzero(active.any(axis=1))
+                    p_met_active, observed_active = p_met[active_rows], observed[active_rows]
+                tasks = [
+                    (
+                        p_met_active,
+                        observed_active,
+                        rng.permuted(np.tile(np.arange(n_strains), (size, 1)), axis=1),
                     )
+                    for size in sizes
+                ]
+                if executor is None:
+                    counts = [cls._count_exceedances(*task, **state) for task in tasks]
                 else:
-                    continue
+                    counts = list(executor.map(_count_exceedances_in_worker, tasks))
+                if active is None:
+                    exceedances += np.sum(counts, axis=0, dtype=np.int32)
+                    n_done += sum(sizes)
+                else:
+                    round_active = active[active_rows]
+                    exceedances[active_rows] += (
+                        np.sum(counts, axis=0, dtype=np.int32) * round_active
+                    )
+                    n_done[active_rows] += sum(sizes) * round_active
+                    active &= exceedances < max_exceedances
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        pvalues: np.ndarray = (exceedances + 1) / (n_done + 1)
+        if early_stopping:
+            stopped = exceedances >= max_exceedances
+            pvalues[stopped] = exceedances[stopped] / n_done[stopped]
+        return pvalues
+
+    @staticmethod
+    def _count_exceedances(
+        p_met: csr_matrix,
+        observed: np.ndarray,
+        permutations: np.ndarray,
+        *,
+        p_gcf: csr_matrix,
+        sign: int,
+        block_size: int = 2**24,
+    ) -> np.ndarray:
+        """Count the permutations in which the co-occurrence of each link exceeds the observed one.
+
+        The GCF presence matrices of all permutations are stacked into one sparse matrix, so the
+        co-occurrences of all permutations come from one sparse matrix product, done in blocks of
+        rows of `p_met` to bound the size of the dense result.
+
+        Args:
+            p_met: The presence matrix of the spectra or molecular families.
+            observed: The observed co-occurrences multiplied by `sign`, of shape (n_met, n_gcf).
+            permutations: A numpy array of shape (n_permutations, n_strains), each row of which is
+                a permutation of the strain positions.
+            p_gcf: The presence matrix of the GCFs.
+            sign: 1 to count co-occurrences ≥ observed, -1 to count co-occurrences ≤ observed.
+            block_size: The maximum number of elements of the dense result of a block.
+
+        Returns:
+            A numpy array of shape (n_met, n_gcf) containing the number of exceedances.
+        """
+        n_perms = len(permutations)
+        n_gcf, nnz = p_gcf.shape[0], p_gcf.nnz
+        # in permutation b, the strain at position s moves to position inverse[b, s]
+        inverse = np.argsort(permutations, axis=1)
+        stacked = csr_matrix(
+            (
+                np.tile(p_gcf.data, n_perms),
+                inverse[:, p_gcf.indices].ravel(),
+                np.r_[0, (p_gcf.indptr[1:] + nnz * np.arange(n_perms)[:, np.newaxis]).ravel()],
+            ),
+            shape=(n_perms * n_gcf, p_gcf.shape[1]),
+        )
+
+        counts = np.zeros(observed.shape, dtype=np.int32)
+        n_rows = max(1, block_size // max(1, n_perms * n_gcf))
+        for start in range(0, p_met.shape[0], n_rows):
+            block = (p_met[start : start + n_rows] @ stacked.T).toarray()
+            block = sign * block.reshape(-1, n_perms, n_gcf)
+            counts[start : start + n_rows] = (
+                block >= observed[start : start + n_rows, np.newaxis, :]
+            ).sum(axis=1)
+        return counts
+
+    @staticmethod
+    def _calc_fdr(pvalues: np.ndarray) -> np.ndarray:
+        """Calculate the false discovery rates with the Benjamini-Hochberg procedure.
+
+        Args:
+            pvalues: A 1D numpy array of p-values.
+
+        Returns:
+            A 1D numpy array of the adjusted p-values, in the order of `pvalues`.
+        """
+        n = len(pvalues)
+        order = np.argsort(pvalues)
+        adjusted = pvalues[order] * n / np.arange(1, n + 1)
+        adjusted = np.minimum.accumulate(adjusted[::-1])[::-1]
+        fdr = np.empty(n)
+        fdr[order] = np.minimum(adjusted, 1)
+        return fdr
+
+    @staticmethod
+    def _get_presence_rows(presence: pd.DataFrame, positions: np.ndarray) -> csr_matrix:
+        """Get the rows of a presence DataFrame at the given positions as a sparse matrix.
+
+        The rows are selected before they are converted, so only the selected block of the
+        DataFrame is copied.
+        """
+        return csr_matrix(presence.iloc[positions].to_numpy(dtype=np.int32))
+
+    @staticmethod
+    def _get_positions(index: pd.Index, objects: Sequence[Entity]) -> np.ndarray:
+        """Get the unique integer positions of the given objects in the index.
+
+        Objects not found in the index are ignored.
+        """
+        positions = index.get_indexer(pd.Index(list(objects)))
+        return np.unique(positions[positions >= 0])
+
+    @staticmethod
+    def _calc_standardised_score(
+        raw_scores: np.ndarray,
+        n_met_strains: np.ndarray,
+        n_gcf_strains: np.ndarray,
+        mean: np.ndarray,
+        std: np.ndarray,
+    ) -> np.ndarray:
+        """Calculate standardised Metcalf scores.
+
+        Args:
+            raw_scores: A numpy array of shape (n_met, n_gcf) containing the raw Metcalf scores of
+                spectrum/mf-gcf links.
+            n_met_strains: A numpy array of shape (n_met,) containing the number of strains of
+                each spectrum or molecular family (i.e. the rows of `raw_scores`).
+            n_gcf_strains: A numpy array of shape (n_gcf,) containing the number of strains of
+                each gcf (i.e. the columns of `raw_scores`).
+            mean: The mean values for standardising Metcalf scores, see `metcalf_mean`.
+            std: The standard deviation values for standardising Metcalf scores, see
+                `metcalf_std`.
+
+        Returns:
+            A numpy array of the same shape as `raw_scores` containing the standardised Metcalf
+            scores.
+        """
+        index = np.ix_(n_met_strains, n_gcf_strains)
+        scores: np.ndarray = (raw_scores - mean[index]) / std[index]
+        return scores
+
+
+# state shared by the worker processes of chunked scoring and permutation tests, set by
+# `_init_chunk_worker`
+_chunk_worker_state: dict[str, Any] = {}
+
+
+def _init_chunk_worker(state: dict[str, Any]) -> None:
+    """Initialize a worker process of chunked scoring with the shared state."""
+    _chunk_worker_state.update(state)
+
+
+def _score_chunk_in_worker(
+    task: tuple[csr_matrix, np.ndarray],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Score a block of spectra or molecular families in a worker process."""
+    return MetcalfScoring._score_chunk(*task, **_chunk_worker_state)
 
-            standardised_score_df.name = raw_score_df.name
-            standardised_scores.append(standardised_score_df)
 
-        return standardised_scores
+def _count_exceedances_in_worker(task: tuple[csr_matrix, np.ndarray, np.ndarray]) -> np.ndarray:
+    """Count the exceedances of a batch of permutations in a worker process."""
+    return MetcalfScoring._count_exceedances(*task, **_chunk_worker_state)
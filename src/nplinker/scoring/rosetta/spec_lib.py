@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 import logging
+import numpy as np
 from sortedcontainers import SortedList
 from nplinker.metabolomics.gnps import GNPSSpectrumLoader
 from .rosetta_functions import fast_cosine
@@ -103,5 +104,4 @@ class SpecLib:
                 new_mz.append(mz)
                 new_intensities.append(intensity)
 
-        spec.mz = new_mz
-        spec.intensity = new_intensities
+        spec.peaks = np.column_stack([new_mz, new_intensities]).reshape(-1, 2)
@@ -1,29 +1,25 @@
 from __future__ import annotations
 from collections.abc import Sequence
+from typing import Union
+import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix
 from nplinker.genomics import GCF
 from nplinker.metabolomics import MolecularFamily
 from nplinker.metabolomics import Spectrum
 from nplinker.strain import StrainCollection
 
 
+Entity = Union[GCF, Spectrum, MolecularFamily]
+
+
 def get_presence_gcf_strain(gcfs: Sequence[GCF], strains: StrainCollection) -> pd.DataFrame:
     """Get the occurrence of strains in gcfs.
 
     The occurrence is a DataFrame with GCF objects as index and Strain objects as columns, and the
     values are 1 if the gcf occurs in the strain,  0 otherwise.
     """
-    df_gcf_strain = pd.DataFrame(
-        0,
-        index=gcfs,
-        columns=list(strains),
-        dtype=int,
-    )  # type: ignore
-    for gcf in gcfs:
-        for strain in strains:
-            if gcf.has_strain(strain):
-                df_gcf_strain.loc[gcf, strain] = 1
-    return df_gcf_strain  # type: ignore
+    return _get_presence_df(gcfs, strains)
 
 
 def get_presence_spec_strain(
@@ -34,17 +30,7 @@ def get_presence_spec_strain(
     The occurrence is a DataFrame with Spectrum objects as index and Strain objects as columns, and
     the values are 1 if the spectrum occurs in the strain, 0 otherwise.
     """
-    df_spec_strain = pd.DataFrame(
-        0,
-        index=spectra,
-        columns=list(strains),
-        dtype=int,
-    )  # type: ignore
-    for spectrum in spectra:
-        for strain in strains:
-            if spectrum.has_strain(strain):
-                df_spec_strain.loc[spectrum, strain] = 1
-    return df_spec_strain  # type: ignore
+    return _get_presence_df(spectra, strains)
 
 
 def get_presence_mf_strain(
@@ -55,14 +41,143 @@ def get_presence_mf_strain(
     The occurrence is a DataFrame with MolecularFamily objects as index and Strain objects as
     columns, and the values are 1 if the molecular family occurs in the strain, 0 otherwise.
     """
-    df_mf_strain = pd.DataFrame(
-        0,
-        index=mfs,
+    return _get_presence_df(mfs, strains)
+
+
+def get_presence_matrix(objects: Sequence[Entity], strains: StrainCollection) -> csr_matrix:
+    """Get the occurrence of strains in the given objects as a sparse matrix.
+
+    The (row, column) positions of all presences are gathered from the `strains` attribute of each
+    object in one pass, so the cost scales with the number of presences rather than with the
+    number of objects times the number of strains.
+
+    Args:
+        objects: A sequence of GCF, Spectrum or MolecularFamily objects.
+        strains: The strains used as the columns of the matrix.
+
+    Returns:
+        A sparse matrix of shape (len(objects), len(strains)), where the rows follow the order of
+        `objects` and the columns follow the order of `strains`. The values are 1 if the object
+        occurs in the strain, 0 otherwise.
+    """
+    # a strain matches a column if any of its names (id or aliases) is the id of the column strain,
+    # which is the same rule as `StrainCollection.__contains__`
+    col_index = {strain.id: i for i, strain in enumerate(strains)}
+
+    rows: list[int] = []
+    cols: list[int] = []
+    for i, obj in enumerate(objects):
+        obj_cols = {
+            col_index[name] for strain in obj.strains for name in strain.names if name in col_index
+        }
+        rows.extend([i] * len(obj_cols))
+        cols.extend(obj_cols)
+
+    data = np.ones(len(rows), dtype=np.int8)
+    return csr_matrix((data, (rows, cols)), shape=(len(objects), len(col_index)), dtype=np.int8)
+
+
+def get_presence_bits(objects: Sequence[Entity], strains: StrainCollection) -> np.ndarray:
+    """Get the occurrence of strains in the given objects as packed bitsets.
+
+    Each row is the bitset of an object, in the same layout as
+    [`StrainCollection.to_bitset`][nplinker.strain.StrainCollection.to_bitset]: the occurrence of
+    the k-th strain is stored in bit `k % 64` of word `k // 64`. It takes 1 bit per object and
+    strain, i.e. 64 times less memory than a presence matrix of 64-bit integers.
+
+    Args:
+        objects: A sequence of GCF, Spectrum or MolecularFamily objects.
+        strains: The strains to get the occurrence of.
+
+    Returns:
+        A numpy array of dtype uint64 and shape (len(objects), ceil(len(strains) / 64)).
+    """
+    presence = get_presence_matrix(objects, strains)
+    rows, cols = presence.nonzero()
+    cols = cols.astype(np.uint64)
+    bits = np.zeros((presence.shape[0], (presence.shape[1] + 63) // 64), dtype=np.uint64)
+    np.bitwise_or.at(bits, (rows, cols >> np.uint64(6)), np.uint64(1) << (cols & np.uint64(63)))
+    return bits
+
+
+def pack_presence(presence: np.ndarray) -> np.ndarray:
+    """Pack a 0/1 presence matrix into bitsets, in the layout of `get_presence_bits`.
+
+    Args:
+        presence: A 2D numpy array of 0/1 values, with objects as rows and strains as columns.
+
+    Returns:
+        A numpy array of dtype uint64 and shape (n_objects, ceil(n_strains / 64)).
+    """
+    n_words = (presence.shape[1] + 63) // 64
+    packed = np.packbits(presence.astype(bool), axis=1, bitorder="little")
+    padded = np.zeros((presence.shape[0], n_words * 8), dtype=np.uint8)
+    padded[:, : packed.shape[1]] = packed
+    return padded.view("<u8").astype(np.uint64)
+
+
+def unpack_presence(bits: np.ndarray, n_strains: int) -> np.ndarray:
+    """Unpack bitsets into a 0/1 presence matrix, the inverse of `pack_presence`.
+
+    Args:
+        bits: A numpy array of dtype uint64 and shape (n_objects, ceil(n_strains / 64)).
+        n_strains: The number of strains, i.e. the number of columns of the presence matrix.
+
+    Returns:
+        A numpy array of dtype uint8 and shape (n_objects, n_strains).
+    """
+    as_bytes = np.ascontiguousarray(bits, dtype="<u8").view(np.uint8)
+    return np.unpackbits(as_bytes, axis=1, count=n_strains, bitorder="little")
+
+
+def count_cooccurrence(bits1: np.ndarray, bits2: np.ndarray, block_size: int = 2**22) -> np.ndarray:
+    """Count the strains shared by each pair of objects from their packed bitsets.
+
+    The counts are calculated with a bitwise AND followed by a popcount, in blocks of rows of
+    `bits1` to bound the size of the intermediate arrays.
+
+    Args:
+        bits1: The bitsets of the first objects, see `get_presence_bits`.
+        bits2: The bitsets of the second objects, with the same strains as `bits1`.
+        block_size: The maximum number of 64-bit words in the intermediate array of a block.
+
+    Returns:
+        A numpy array of dtype int32 and shape (len(bits1), len(bits2)), where the value at
+        (i, j) is the number of strains shared by the i-th object of `bits1` and the j-th object
+        of `bits2`.
+    """
+    counts = np.zeros((len(bits1), len(bits2)), dtype=np.int32)
+    n_rows = max(1, block_size // max(1, bits2.size))
+    for start in range(0, len(bits1), n_rows):
+        block = bits1[start : start + n_rows, np.newaxis, :] & bits2[np.newaxis, :, :]
+        counts[start : start + n_rows] = _popcount(block).sum(axis=2)
+    return counts
+
+
+# number of set bits of each byte value, used when `np.bitwise_count` is unavailable (numpy<2)
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray) -> np.ndarray:
+    """Count the set bits of each 64-bit word."""
+    counts: np.ndarray
+    if hasattr(np, "bitwise_count"):
+        counts = np.bitwise_count(words)
+    else:
+        counts = _POPCOUNT_TABLE[words.view(np.uint8)]
+        counts = counts.reshape(*words.shape, 8).sum(axis=-1, dtype=np.uint8)
+    return counts
+
+
+def _get_presence_df(objects: Sequence[Entity], strains: StrainCollection) -> pd.DataFrame:
+    """Wrap the presence matrix of the given objects as a DataFrame.
+
+    The DataFrame has the objects as index and Strain objects as columns.
+    """
+    presence = get_presence_matrix(objects, strains)
+    df_presence = pd.DataFrame(
+        presence.toarray().astype(int),
+        index=list(objects),
         columns=list(strains),
-        dtype=int,
-    )  # type: ignore
-    for mf in mfs:
-        for strain in strains:
-            if mf.has_strain(strain):
-                df_mf_strain.loc[mf, strain] = 1
-    return df_mf_strain  # type: ignore
+    )
+    return df_presence  # type: ignore
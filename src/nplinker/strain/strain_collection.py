@@ -3,6 +3,7 @@ import json
 import logging
 from collections.abc import Iterator
 from os import PathLike
+import numpy as np
 from jsonschema import validate
 from nplinker.schemas import STRAIN_MAPPINGS_SCHEMA
 from .strain import Strain
@@ -163,6 +164,34 @@ class StrainCollection:
             return self._strain_dict_name[name]
         raise ValueError(f"Strain {name} not found in the strain collection.")
 
+    def to_bitset(self, strains: StrainCollection) -> np.ndarray:
+        """Get the occurrence of the given strains in this collection as a packed bitset.
+
+        The bitset follows the order of `strains`: the occurrence of the k-th strain is stored in
+        bit `k % 64` of word `k // 64`. A strain occurs in this collection if any of its names
+        (id or aliases) is the id of the strain in `strains`, as in `__contains__`.
+
+        Args:
+            strains: The strains to get the occurrence of, e.g. all strains of a dataset.
+
+        Returns:
+            A numpy array of dtype uint64 and shape (ceil(len(strains) / 64),).
+
+        Examples:
+            >>> gcf.strains.to_bitset(npl.strains)
+            array([5], dtype=uint64)
+        """
+        index = {strain.id: i for i, strain in enumerate(strains)}
+        positions = np.array(
+            sorted({index[name] for strain in self for name in strain.names if name in index}),
+            dtype=np.uint64,
+        )
+        bitset = np.zeros((len(index) + 63) // 64, dtype=np.uint64)
+        np.bitwise_or.at(
+            bitset, positions >> np.uint64(6), np.uint64(1) << (positions & np.uint64(63))
+        )
+        return bitset
+
     @staticmethod
     def read_json(file: str | PathLike) -> StrainCollection:
         """Read a strain mappings JSON file and return a `StrainCollection` object.
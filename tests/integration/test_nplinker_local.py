@@ -2,6 +2,7 @@ import os
 import pickle
 import pytest
 from nplinker.genomics import GCF
+from nplinker.loader import DatasetLoader
 from nplinker.metabolomics import MolecularFamily
 from nplinker.metabolomics import Spectrum
 from nplinker.nplinker import NPLinker
@@ -12,7 +13,7 @@ from . import DATA_DIR
 def npl(root_dir) -> NPLinker:
     os.environ["NPLINKER_ROOT_DIR"] = root_dir
     npl = NPLinker(DATA_DIR / "nplinker_local_mode.toml")
-    npl.load_data()
+    npl.load_data(use_snapshot=True, concurrent=True, n_jobs=-1, use_cache=True)
     return npl
 
 
@@ -56,6 +57,33 @@ def test_load_data(npl: NPLinker):
     assert len(npl.strains) == 46
 
 
+def test_load_data_sequential(npl: NPLinker):
+    # loading the data sequentially gives the same objects as loading them concurrently
+    loader = DatasetLoader(npl.config, concurrent=False)
+    loader.load()
+    assert {bgc.id for bgc in loader.bgcs} == {bgc.id for bgc in npl.bgcs}
+    assert {gcf.id for gcf in loader.gcfs} == {gcf.id for gcf in npl.gcfs}
+    assert {spec.id for spec in loader.spectra} == {spec.id for spec in npl.spectra}
+    assert {mf.id for mf in loader.mfs} == {mf.id for mf in npl.mfs}
+    assert loader.strains == npl.strains
+
+
+def test_load_data_from_snapshot(npl: NPLinker, monkeypatch):
+    assert os.path.exists(os.path.join(npl.output_dir, NPLinker.SNAPSHOT))
+
+    # the data are loaded from the snapshot saved by the first `load_data` call
+    monkeypatch.setattr(
+        DatasetLoader, "load", lambda self: pytest.fail("data are loaded from input files")
+    )
+    new_npl = NPLinker(DATA_DIR / "nplinker_local_mode.toml")
+    new_npl.load_data(use_snapshot=True)
+    assert len(new_npl.bgcs) == len(npl.bgcs)
+    assert len(new_npl.gcfs) == len(npl.gcfs)
+    assert len(new_npl.spectra) == len(npl.spectra)
+    assert len(new_npl.mfs) == len(npl.mfs)
+    assert len(new_npl.strains) == len(npl.strains)
+
+
 def test_get_links(npl):
     # default scoring parameters are used (cutoff=0, standardised=False),
     # so all score values should be >= 0
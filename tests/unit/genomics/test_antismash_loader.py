@@ -1,8 +1,13 @@
 import pytest
+from Bio import SeqIO
 from nplinker.genomics import BGC
 from nplinker.genomics.abc import BGCLoaderBase
 from nplinker.genomics.antismash import AntismashBGCLoader
+from nplinker.genomics.antismash import antismash_loader
 from nplinker.genomics.antismash import parse_bgc_genbank
+from nplinker.genomics.antismash.antismash_loader import _GENBANK_TAIL_SIZE
+from nplinker.genomics.antismash.antismash_loader import _parse_antismash_genbank
+from nplinker.genomics.antismash.antismash_loader import _scan_antismash_genbank
 from .. import DATA_DIR
 
 
@@ -56,6 +61,41 @@ class TestAntismashBGCLoader:
         assert isinstance(bgcs, list)
         assert len(bgcs) == 44
         assert isinstance(bgcs[0], BGC)
+        assert [bgc.id for bgc in bgcs] == list(loader.get_files())
+
+    def test_parse_bgcs_parallel(self, loader):
+        bgcs = AntismashBGCLoader._parse_bgcs(loader.get_files(), n_jobs=2)
+        assert bgcs == loader.get_bgcs()
+        assert [bgc.id for bgc in bgcs] == [bgc.id for bgc in loader.get_bgcs()]
+
+    @pytest.mark.parametrize("n_jobs", [1, 2])
+    def test_parse_bgcs_error(self, loader, n_jobs):
+        bgc_files = dict(loader.get_files())
+        bgc_files["fake_antismash.region001"] = str(DATA_DIR / "fake_antismash.region001.gbk")
+        bgc_files["missing.region001"] = "missing.region001.gbk"
+        with pytest.raises(ValueError, match="Failed to parse 2 antiSMASH Genbank file") as e:
+            AntismashBGCLoader._parse_bgcs(bgc_files, n_jobs=n_jobs)
+        assert "fake_antismash.region001.gbk: ValueError: Not found product" in str(e.value)
+        assert "missing.region001.gbk: FileNotFoundError" in str(e.value)
+
+    def test_parse_bgcs_cache(self, loader, tmp_path, monkeypatch):
+        cache_file = tmp_path / "bgc_cache.sqlite"
+        bgcs = AntismashBGCLoader(DATA_DIR / "antismash", cache_file=cache_file).get_bgcs()
+        assert bgcs == loader.get_bgcs()
+
+        # the cached files are not parsed again
+        monkeypatch.setattr(
+            antismash_loader,
+            "_parse_bgc_genbank_or_error",
+            lambda file: pytest.fail(f"{file} is parsed"),
+        )
+        cached_bgcs = AntismashBGCLoader(DATA_DIR / "antismash", cache_file=cache_file).get_bgcs()
+        assert cached_bgcs == bgcs
+        assert [bgc.antismash_file for bgc in cached_bgcs] == list(loader.get_files().values())
+
+    def test_parse_bgcs_invalid_n_jobs(self, loader):
+        with pytest.raises(ValueError, match="`n_jobs` must be a positive integer or -1"):
+            AntismashBGCLoader._parse_bgcs(loader.get_files(), n_jobs=0)
 
 
 def test_parse_bgc_genbank():
@@ -75,3 +115,71 @@ def test_parse_bgc_genbank_error():
     gbk_file = str(DATA_DIR / "fake_antismash.region001.gbk")
     with pytest.raises(ValueError, match="Not found product prediction in antiSMASH Genbank file"):
         parse_bgc_genbank(gbk_file)
+
+
+def test_parse_bgc_genbank_fallback(tmp_path):
+    # the scanner expects LOCUS on the first line, so Biopython is used for this file
+    gbk_file = DATA_DIR / "antismash" / "GCF_000514515.1" / "NZ_AZWB01000005.region001.gbk"
+    tmp_file = tmp_path / "NZ_AZWB01000005.region001.gbk"
+    tmp_file.write_text("\n" + gbk_file.read_text())
+    with pytest.raises(ValueError, match="does not start with LOCUS"):
+        _scan_antismash_genbank(tmp_file)
+    bgc = parse_bgc_genbank(tmp_file)
+    assert bgc.id == "NZ_AZWB01000005.region001"
+    assert bgc.product_prediction == ("NRPS", "lanthipeptide")
+    assert bgc.antismash_id == "NZ_AZWB01000005"
+
+
+def test_parse_bgc_genbank_multiple_records(tmp_path):
+    # Biopython refuses to read a file of multiple records as one, and so does the scanner if the
+    # second record is in the end of the file that it checks
+    gbk_file = DATA_DIR / "antismash" / "GCF_000514855.1" / "NZ_AZWS01000025.region002.gbk"
+    assert gbk_file.stat().st_size < _GENBANK_TAIL_SIZE
+    tmp_file = tmp_path / "NZ_AZWS01000025.region002.gbk"
+    tmp_file.write_text(gbk_file.read_text() * 2)
+    with pytest.raises(ValueError, match="more than one record"):
+        _scan_antismash_genbank(tmp_file)
+    with pytest.raises(ValueError, match="More than one record found"):
+        parse_bgc_genbank(tmp_file)
+
+    # trailing whitespace after the record is fine
+    tmp_file.write_text(gbk_file.read_text() + "\n  \n")
+    assert _scan_antismash_genbank(tmp_file) == _scan_antismash_genbank(gbk_file)
+
+    # a truncated record is left to Biopython
+    tmp_file.write_text(gbk_file.read_text().rsplit("//", 1)[0])
+    with pytest.raises(ValueError, match="end of the record is not found"):
+        _scan_antismash_genbank(tmp_file)
+
+
+def test_scan_antismash_genbank_tail_only(monkeypatch):
+    # only the end of the file is read after the feature table, not the whole sequence
+    gbk_file = DATA_DIR / "antismash" / "GCF_000514515.1" / "NZ_AZWB01000005.region001.gbk"
+    expected = _scan_antismash_genbank(gbk_file)
+    monkeypatch.setattr(antismash_loader, "_GENBANK_TAIL_SIZE", 16)
+    assert _scan_antismash_genbank(gbk_file) == expected
+
+
+@pytest.mark.parametrize(
+    "gbk_file",
+    sorted((DATA_DIR / "antismash").glob("*/*.gbk")) + [DATA_DIR / "fake_antismash.region001.gbk"],
+    ids=lambda path: path.name,
+)
+def test_scan_antismash_genbank(gbk_file):
+    record = SeqIO.read(gbk_file, format="genbank")
+    expected = (record.description, record.id, _parse_antismash_genbank(record))
+    assert _scan_antismash_genbank(gbk_file) == expected
+
+
+def test_scan_antismash_genbank_quoted_slash(tmp_path):
+    gbk_file = DATA_DIR / "antismash" / "GCF_000514515.1" / "NZ_AZWB01000005.region001.gbk"
+    tmp_file = tmp_path / "test.gbk"
+    # a continuation line of a quoted value that starts with "/" is not a new qualifier
+    tmp_file.write_text(
+        gbk_file.read_text().replace(
+            '/SMILES="NC([*])C(=O)NC([*])C(=O)NC(CO)C(=O)NC(Cc1ccccc1)C(\n',
+            '/SMILES="C/C=C\\\n                     /C(=O)""O""\n                     C(\n',
+        )
+    )
+    _, _, features = _scan_antismash_genbank(tmp_file)
+    assert features["smiles"] == ('C/C=C\\/C(=O)"O"C(=O)NCC(=O)O',)
@@ -0,0 +1,121 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from nplinker.genomics import BGC
+from nplinker.genomics import BGCCache
+from nplinker.genomics.antismash import parse_bgc_genbank
+from nplinker.genomics.mibig import parse_bgc_metadata_json
+from .. import DATA_DIR
+
+
+@pytest.fixture
+def files(tmp_path):
+    gbk_file = tmp_path / "NZ_AZWB01000005.region001.gbk"
+    json_file = tmp_path / "BGC0000001.json"
+    shutil.copy(DATA_DIR / "antismash" / "GCF_000514515.1" / gbk_file.name, gbk_file)
+    shutil.copy(DATA_DIR / "mibig" / "BGC0000001_v3.1.json", json_file)
+    return str(gbk_file), str(json_file)
+
+
+@pytest.fixture
+def bgcs(files):
+    gbk_file, json_file = files
+    return {gbk_file: parse_bgc_genbank(gbk_file), json_file: parse_bgc_metadata_json(json_file)}
+
+
+def assert_same_bgc(bgc1: BGC, bgc2: BGC):
+    assert bgc1 == bgc2
+    for attr in (
+        "mibig_bgc_class",
+        "description",
+        "smiles",
+        "antismash_file",
+        "antismash_id",
+        "antismash_region",
+    ):
+        assert getattr(bgc1, attr) == getattr(bgc2, attr)
+    assert bgc1.strain == bgc2.strain
+
+
+def test_put_get(tmp_path, bgcs):
+    cache = BGCCache(tmp_path / "cache" / "bgc_cache.sqlite")
+    assert cache.get(bgcs) == {}
+
+    cache.put(bgcs)
+    # a new cache object reads the same database file
+    cached = BGCCache(cache.file).get([*bgcs, "missing.gbk"])
+    assert set(cached) == set(bgcs)
+    for file, bgc in bgcs.items():
+        assert_same_bgc(cached[file], bgc)
+
+
+def test_get_changed_file(tmp_path, files, bgcs):
+    gbk_file, json_file = files
+    cache = BGCCache(tmp_path / "bgc_cache.sqlite")
+    cache.put(bgcs)
+
+    stat = os.stat(gbk_file)
+    os.utime(gbk_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert set(cache.get(files)) == {json_file}
+
+    os.remove(json_file)
+    assert cache.get(files) == {}
+
+
+def test_outdated_version(tmp_path, monkeypatch, bgcs):
+    cache = BGCCache(tmp_path / "bgc_cache.sqlite")
+    cache.put(bgcs)
+    monkeypatch.setattr(BGCCache, "VERSION", BGCCache.VERSION + 1)
+    assert BGCCache(cache.file).get(bgcs) == {}
+
+
+def test_get_prune_directory(tmp_path, files, bgcs):
+    gbk_file, json_file = files
+    other_file = str(tmp_path.parent / "other.gbk")
+    cache = BGCCache(tmp_path / "cache" / "bgc_cache.sqlite", tmp_path)
+    cache.put({**bgcs, other_file: bgcs[gbk_file]})
+
+    # the entries of the files in the directory that are not queried are removed
+    assert set(cache.get([json_file])) == {json_file}
+    cache = BGCCache(cache.file)
+    assert cache.get([gbk_file]) == {}
+    # the entries of the files outside of the directory are kept
+    assert set(cache.get([json_file, other_file])) == {json_file, other_file}
+
+
+def test_put_file_key_before_parse(tmp_path, files, bgcs):
+    gbk_file, _ = files
+    cache = BGCCache(tmp_path / "bgc_cache.sqlite")
+    assert cache.get(files) == {}
+
+    # the file changes after it is queried, e.g. while it is parsed
+    stat = os.stat(gbk_file)
+    os.utime(gbk_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    cache.put(bgcs)
+    assert set(BGCCache(cache.file).get(files)) == {files[1]}
+
+
+def test_init_concurrent(tmp_path, bgcs):
+    cache_file = tmp_path / "bgc_cache.sqlite"
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        caches = list(executor.map(BGCCache, [cache_file] * 8))
+    caches[0].put(bgcs)
+    assert set(caches[-1].get(bgcs)) == set(bgcs)
+
+
+def test_get_prune_real_path(tmp_path, monkeypatch, files, bgcs):
+    gbk_file, json_file = files
+    link_dir = tmp_path.parent / f"{tmp_path.name}_link"
+    os.symlink(tmp_path, link_dir)
+    cache = BGCCache(tmp_path / "bgc_cache.sqlite", link_dir)
+    cache.put(bgcs)
+
+    # the same files given by a relative path are found in the cache and are not pruned
+    monkeypatch.chdir(tmp_path.parent)
+    rel_files = [os.path.relpath(file) for file in files]
+    assert set(cache.get(rel_files)) == set(rel_files)
+    # the entries are pruned if the directory is given through a link
+    link_json_file = os.path.join(link_dir, os.path.basename(json_file))
+    assert set(cache.get([link_json_file])) == {link_json_file}
+    assert cache.get([gbk_file]) == {}
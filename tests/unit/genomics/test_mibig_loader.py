@@ -39,6 +39,15 @@ class TestMibigBGCLoader:
         assert isinstance(files["BGC0000001"], str)
         assert os.path.exists(files["BGC0000001"])
 
+    def test_get_bgcs_cache(self, loader, data_dir, tmp_path):
+        cache_file = tmp_path / "bgc_cache.sqlite"
+        bgcs = MibigLoader(data_dir, cache_file=cache_file).get_bgcs()
+        cached_bgcs = MibigLoader(data_dir, cache_file=cache_file).get_bgcs()
+        assert bgcs == cached_bgcs == loader.get_bgcs()
+        assert [bgc.mibig_bgc_class for bgc in cached_bgcs] == [
+            bgc.mibig_bgc_class for bgc in loader.get_bgcs()
+        ]
+
     def test_parse_data_dir(self, data_dir):
         files = MibigLoader.parse_data_dir(data_dir)
         assert isinstance(files, dict)
@@ -1,6 +1,8 @@
+import numpy as np
 import pytest
 from nplinker.metabolomics.gnps import GNPSFormat
 from nplinker.metabolomics.gnps import GNPSSpectrumLoader
+from nplinker.metabolomics.gnps.gnps_spectrum_loader import _find_chunk_offsets
 
 
 @pytest.mark.parametrize(
@@ -10,3 +12,123 @@ from nplinker.metabolomics.gnps import GNPSSpectrumLoader
 def test_gnps_spectrum_loader(workflow, num_spectra, gnps_spectra_files):
     loader = GNPSSpectrumLoader(gnps_spectra_files[workflow])
     assert len(loader.spectra) == num_spectra
+
+
+MGF_TEXT = """COM=global parameters apply to all spectra
+BEGIN IONS
+PEPMASS=981.54
+CHARGE=0
+SCANS=1
+RTINSECONDS=12.5
+102.054955\t0.0
+103.03954\t1.5
+END IONS
+
+BEGIN IONS
+PEPMASS=500.0 200.0
+CHARGE=2+
+SCANS=2
+END IONS
+
+# comment
+BEGIN IONS
+PEPMASS=300.2
+CHARGE=1-
+SCANS=3
+150.1 10.0 1
+160.2 20.0 1
+END IONS
+"""
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_gnps_spectrum_loader_mgf(tmp_path, fast):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT)
+    spectra = GNPSSpectrumLoader(mgf_file, fast=fast).spectra
+
+    # the spectrum without peaks is skipped
+    assert [spec.id for spec in spectra] == ["1", "3"]
+    assert spectra[0].precursor_mz == 981.54
+    assert spectra[0].rt == 12.5
+    np.testing.assert_array_equal(spectra[0].mz, [102.054955, 103.03954])
+    np.testing.assert_array_equal(spectra[0].intensity, [0.0, 1.5])
+    assert spectra[0].metadata["com"] == "global parameters apply to all spectra"
+    assert spectra[1].precursor_mz == 300.2
+    assert spectra[1].rt == 0
+    assert list(spectra[1].metadata["charge"]) == [-1]
+    np.testing.assert_array_equal(spectra[1].peaks, [[150.1, 10.0], [160.2, 20.0]])
+
+
+def test_gnps_spectrum_loader_peak_store(tmp_path):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT)
+    loader = GNPSSpectrumLoader(mgf_file)
+    # the peaks of all spectra are views into the peak store
+    assert len(loader.peak_store) == len(loader.spectra)
+    for i, spec in enumerate(loader.spectra):
+        assert np.shares_memory(spec.peaks, loader.peak_store.peaks)
+        np.testing.assert_array_equal(spec.peaks, loader.peak_store[i])
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_gnps_spectrum_loader_peak_charge(tmp_path, fast):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT.replace("150.1 10.0 1\n", "150.1 10.0 1+\n"))
+    spectra = GNPSSpectrumLoader(mgf_file, fast=fast).spectra
+    np.testing.assert_array_equal(spectra[1].peaks, [[150.1, 10.0], [160.2, 20.0]])
+
+
+def test_gnps_spectrum_loader_peak_annotation(tmp_path):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT.replace("103.03954\t1.5\n", '103.03954\t1.5\t"y1"\n'))
+    spectra = GNPSSpectrumLoader(mgf_file).spectra
+    np.testing.assert_array_equal(spectra[0].peaks, [[102.054955, 0.0], [103.03954, 1.5]])
+
+
+def test_gnps_spectrum_loader_fast_same_as_pyteomics(tmp_path):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT)
+    fast = GNPSSpectrumLoader(mgf_file).spectra
+    slow = GNPSSpectrumLoader(mgf_file, fast=False).spectra
+    assert [spec.metadata for spec in fast] == [spec.metadata for spec in slow]
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_gnps_spectrum_loader_invalid(tmp_path, fast):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT.replace("SCANS=3\n", ""))
+    with pytest.raises(ValueError, match="Expected parameter 'scans' not found"):
+        GNPSSpectrumLoader(mgf_file, fast=fast)
+
+
+@pytest.mark.parametrize("chunk_size", [1, 100, 10**6])
+def test_gnps_spectrum_loader_parallel(tmp_path, chunk_size):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT * 5)
+    serial = GNPSSpectrumLoader(mgf_file).spectra
+    parallel = GNPSSpectrumLoader(mgf_file, n_jobs=2, chunk_size=chunk_size).spectra
+    assert len(parallel) == len(serial) == 10
+    for spec1, spec2 in zip(serial, parallel):
+        assert spec1.id == spec2.id
+        assert spec1.metadata == spec2.metadata
+        np.testing.assert_array_equal(spec1.peaks, spec2.peaks)
+
+
+def test_find_chunk_offsets(tmp_path):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT * 5)
+    data = mgf_file.read_bytes()
+    offsets = _find_chunk_offsets(str(mgf_file), 100)
+    assert offsets[0] == 0
+    assert offsets[-1] == len(data)
+    assert offsets == sorted(set(offsets))
+    assert all(data[pos : pos + 10] == b"BEGIN IONS" for pos in offsets[1:-1])
+
+
+@pytest.mark.parametrize("n_jobs, chunk_size", [[0, 100], [-2, 100], [1, 0]])
+def test_gnps_spectrum_loader_invalid_args(tmp_path, n_jobs, chunk_size):
+    mgf_file = tmp_path / "spectra.mgf"
+    mgf_file.write_text(MGF_TEXT)
+    with pytest.raises(ValueError, match="must be a positive integer"):
+        GNPSSpectrumLoader(mgf_file, n_jobs=n_jobs, chunk_size=chunk_size)
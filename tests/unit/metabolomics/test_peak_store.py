@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+from nplinker.metabolomics import PeakStore
+from nplinker.metabolomics import Spectrum
+
+
+@pytest.fixture
+def spectra():
+    return [
+        Spectrum("spec1", [100, 200], [0.1, 0.2], 150),
+        Spectrum("spec2", [], [], 150),
+        Spectrum("spec3", [300], [0.3], 150),
+    ]
+
+
+def test_init():
+    store = PeakStore(np.array([[100, 0.1], [200, 0.2], [300, 0.3]]), np.array([0, 2, 2, 3]))
+    assert len(store) == 3
+    np.testing.assert_array_equal(store[0], [[100, 0.1], [200, 0.2]])
+    assert store[1].shape == (0, 2)
+    np.testing.assert_array_equal(store[2], [[300, 0.3]])
+
+
+@pytest.mark.parametrize(
+    "peaks, offsets",
+    [
+        [np.zeros((3, 3)), np.array([0, 3])],
+        [np.zeros((3, 2)), np.array([0, 2])],
+        [np.zeros((3, 2)), np.array([1, 3])],
+    ],
+)
+def test_init_invalid(peaks, offsets):
+    with pytest.raises(ValueError, match="Expected"):
+        PeakStore(peaks, offsets)
+
+
+@pytest.mark.parametrize("dtype", [np.float64, np.float32])
+def test_pack(spectra, dtype):
+    expected = [spectrum.peaks.copy() for spectrum in spectra]
+    store = PeakStore.pack(spectra, dtype=dtype)
+
+    assert store.peaks.dtype == dtype
+    assert store.peaks.shape == (3, 2)
+    for spectrum, peaks in zip(spectra, expected):
+        np.testing.assert_allclose(spectrum.peaks, peaks, rtol=1e-6)
+        # the peaks, m/z values and intensities are views into the store
+        assert np.shares_memory(spectrum.peaks, store.peaks) or len(peaks) == 0
+        assert np.shares_memory(spectrum.mz, store.peaks) or len(peaks) == 0
+        assert np.shares_memory(spectrum.intensity, store.peaks) or len(peaks) == 0
+
+
+def test_assign_invalid(spectra):
+    store = PeakStore.from_peaks([spectrum.peaks for spectrum in spectra])
+    with pytest.raises(ValueError, match="does not match"):
+        store.assign(spectra[:2])
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load(spectra, tmp_path, mmap):
+    store = PeakStore.pack(spectra)
+    store.save(tmp_path / "store")
+    loaded = PeakStore.load(tmp_path / "store", mmap=mmap)
+
+    assert isinstance(loaded.peaks, np.memmap) == mmap
+    np.testing.assert_array_equal(loaded.peaks, store.peaks)
+    np.testing.assert_array_equal(loaded.offsets, store.offsets)
+
+    loaded.assign(spectra)
+    np.testing.assert_array_equal(spectra[0].mz, [100, 200])
+    np.testing.assert_array_equal(spectra[2].intensity, [0.3])
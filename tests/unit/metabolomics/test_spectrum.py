@@ -1,3 +1,4 @@
+import pickle
 import numpy as np
 import pytest
 from nplinker.metabolomics import Spectrum
@@ -17,8 +18,8 @@ def test_init(rt, metadata, expected_metadata):
     spec = Spectrum("spec1", [100, 200], [0.1, 0.2], 150, rt, metadata)
 
     assert spec.id == "spec1"
-    assert spec.mz == [100, 200]
-    assert spec.intensity == [0.1, 0.2]
+    np.testing.assert_array_equal(spec.mz, [100, 200])
+    np.testing.assert_array_equal(spec.intensity, [0.1, 0.2])
     assert spec.precursor_mz == 150
     assert spec.rt == rt
     assert spec.metadata == expected_metadata
@@ -57,6 +58,42 @@ def test_peaks():
     """Test the peaks attribute."""
     spec = Spectrum("spec1", [100, 200], [0.1, 0.2], 150)
     assert np.array_equal(spec.peaks, np.array([[100, 0.1], [200, 0.2]]))
+    # mz and intensity are views of the peaks
+    assert np.shares_memory(spec.mz, spec.peaks)
+    assert np.shares_memory(spec.intensity, spec.peaks)
+
+    spec.peaks = np.array([[300, 0.3]])
+    np.testing.assert_array_equal(spec.mz, [300])
+    np.testing.assert_array_equal(spec.intensity, [0.3])
+
+    with pytest.raises(ValueError, match="Expected peaks of shape"):
+        spec.peaks = np.array([300, 0.3])
+    with pytest.raises(ValueError):
+        Spectrum("spec1", [100, 200], [0.1], 150)
+
+
+def test_set_mz_intensity():
+    """Test setting the mz and intensity attributes."""
+    spec = Spectrum("spec1", [100, 200], [0.1, 0.2], 150)
+    peaks = spec.peaks
+    spec.mz = [300, 400]
+    spec.intensity = np.array([0.3, 0.4])
+    np.testing.assert_array_equal(spec.peaks, [[300, 0.3], [400, 0.4]])
+    # the peaks are replaced, not changed in place
+    np.testing.assert_array_equal(peaks, [[100, 0.1], [200, 0.2]])
+
+    with pytest.raises(ValueError, match="must have the same shape"):
+        spec.mz = [100]
+    with pytest.raises(ValueError, match="must have the same shape"):
+        spec.intensity = [0.1, 0.2, 0.3]
+
+
+def test_pickle():
+    """Test pickling and unpickling."""
+    spec = Spectrum("spec1", [100, 200], [0.1, 0.2], 150)
+    new_spec = pickle.loads(pickle.dumps(spec))
+    assert new_spec == spec
+    np.testing.assert_array_equal(new_spec.peaks, spec.peaks)
 
 
 def test_has_strain():
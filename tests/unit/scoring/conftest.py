@@ -83,6 +83,8 @@ def npl(gcfs, spectra, mfs, strains, tmp_path) -> NPLinker:
 @fixture(scope="function")
 def mc(npl) -> MetcalfScoring:
     """MetcalfScoring object."""
+    # reset the class-level state, which may be changed by other tests
+    MetcalfScoring.npl = None
     mc = MetcalfScoring()
     mc.setup(npl)
     return mc
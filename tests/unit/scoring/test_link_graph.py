@@ -1,5 +1,11 @@
+import json
+import pickle
+import numpy as np
+import pandas as pd
 import pytest
+from pandas.testing import assert_frame_equal
 from pytest import fixture
+from nplinker.metabolomics import Spectrum
 from nplinker.scoring import LinkGraph
 from nplinker.scoring import Score
 
@@ -112,3 +118,352 @@ def test_filter(gcfs, spectra, score):
     # test filtering with GCFs and Spectra
     lg_filtered = lg.filter(u_nodes, v_nodes)
     assert len(lg_filtered) == 4
+
+
+def test_add_link_update(gcfs, spectra, score):
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=score)
+    new_score = Score("rosetta", 2.0, {})
+    # the link is undirected, so the data of the existing link are updated
+    lg.add_link(spectra[0], gcfs[0], rosetta=new_score)
+    assert len(lg.links) == 1
+    assert lg.get_link_data(gcfs[0], spectra[0]) == {"metcalf": score, "rosetta": new_score}
+
+
+def test_add_link_non_numeric_score(gcfs, spectra, mfs):
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], spectra[0], rosetta=Score("rosetta", 1.5, {}))
+    lg.add_link(gcfs[0], mfs[0], rosetta=Score("rosetta", ["hit"], {}))
+    assert lg.get_link_data(gcfs[0], spectra[0])["rosetta"].value == 1.5
+    assert lg.get_link_data(gcfs[0], mfs[0])["rosetta"].value == ["hit"]
+
+
+def test_add_link_score_dtype(gcfs, spectra, mfs):
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=Score("metcalf", 2, {}))
+    lg.add_link(gcfs[0], mfs[0], rosetta=Score("rosetta", True, {}))
+    lg.add_links([gcfs[1]], [spectra[1]], [3], name="metcalf", parameter={})
+    # the scores keep their types
+    metcalf = lg.get_link_data(gcfs[0], spectra[0])["metcalf"].value
+    assert metcalf == 2 and type(metcalf) is int
+    assert lg.get_link_data(gcfs[0], mfs[0])["rosetta"].value is True
+    assert lg.top(1, by="rosetta").links == [(gcfs[0], mfs[0], lg.get_link_data(gcfs[0], mfs[0]))]
+
+    # mixed integer and float scores are returned as float
+    lg.add_link(gcfs[2], spectra[2], metcalf=Score("metcalf", 0.5, {}))
+    metcalf = lg.get_link_data(gcfs[1], spectra[1])["metcalf"].value
+    assert metcalf == 3.0 and type(metcalf) is float
+
+
+def test_many_links(gcfs):
+    spectra = [Spectrum(f"spectrum{i}", [1], [1], 10.0) for i in range(3000)]
+    parameter = {"cutoff": 0}
+    lg = LinkGraph()
+    for i, spectrum in enumerate(spectra):
+        lg.add_link(gcfs[i % 3], spectrum, metcalf=Score("metcalf", i, parameter))
+    # add the links again to look them up while links are added
+    for i, spectrum in enumerate(spectra):
+        lg.add_link(spectrum, gcfs[i % 3], metcalf=Score("metcalf", -i, parameter))
+
+    assert len(lg.links) == 3000
+    assert len(lg[gcfs[1]]) == 1000
+    assert lg.get_link_data(gcfs[0], spectra[2998]) is None
+    link_data = lg.get_link_data(gcfs[2], spectra[2999])
+    assert link_data == {"metcalf": Score("metcalf", -2999, parameter)}
+    # all links share the same parameter dict
+    assert link_data["metcalf"].parameter is parameter
+
+
+def test_pickle(lg, gcfs, spectra, score):
+    new_lg = pickle.loads(pickle.dumps(lg))
+    assert new_lg.links == lg.links
+    assert new_lg.has_link(spectra[0], gcfs[0])
+    new_lg.add_link(gcfs[1], spectra[1], metcalf=score)
+    assert len(new_lg.links) == 2
+
+
+def test_unpickle_networkx_link_graph(gcfs, spectra, mfs, score):
+    networkx = pytest.importorskip("networkx")
+    # the state of the LinkGraph pickles before the columnar layout
+    graph = networkx.Graph()
+    graph.add_edge(gcfs[0], spectra[0], metcalf=score)
+    graph.add_edge(mfs[1], gcfs[1], rosetta=Score("rosetta", 2, {}))
+    lg = LinkGraph.__new__(LinkGraph)
+    lg.__setstate__({"_g": graph})
+    assert lg.links == [
+        (gcfs[0], spectra[0], {"metcalf": score}),
+        (mfs[1], gcfs[1], {"rosetta": Score("rosetta", 2, {})}),
+    ]
+    assert lg.has_link(gcfs[1], mfs[1])
+
+
+def test_pickle_new_parameters(gcfs, spectra, mfs):
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=Score("metcalf", 1.0, {"cutoff": 1}))
+    data = pickle.dumps(lg)
+    # free the pickled parameter dict, so that its id can be reused by the new dicts below
+    del lg
+    new_lg = pickle.loads(data)
+    for name, positions in new_lg._param_positions.items():
+        assert {id(p): pos for pos, p in enumerate(new_lg._params[name])} == positions
+
+    # the parameter dicts created after loading are not mixed up with the loaded ones
+    parameters = [{"cutoff": i} for i in range(2, 100)]
+    for i, parameter in enumerate(parameters):
+        new_lg.add_link(gcfs[i % 3], spectra[1], metcalf=Score("metcalf", 2.0, parameter))
+    new_lg.add_links([gcfs[1]], [mfs[1]], [3.0], name="metcalf", parameter={"cutoff": 100})
+    assert new_lg.get_link_data(gcfs[0], spectra[0])["metcalf"].parameter == {"cutoff": 1}
+    for i in range(len(parameters) - 3, len(parameters)):
+        assert new_lg.get_link_data(gcfs[i % 3], spectra[1])["metcalf"].parameter is parameters[i]
+    assert new_lg.get_link_data(gcfs[1], mfs[1])["metcalf"].parameter == {"cutoff": 100}
+
+    # the same holds for the LinkGraph objects combined from the loaded one
+    rosetta = LinkGraph()
+    rosetta.add_link(gcfs[0], spectra[0], rosetta=Score("rosetta", 1.0, {}))
+    for combined in (new_lg.merge(rosetta), new_lg.join(rosetta)):
+        combined.add_link(gcfs[0], spectra[0], metcalf=Score("metcalf", 4.0, {"cutoff": 4}))
+        data = combined.get_link_data(gcfs[0], spectra[0])
+        assert data["metcalf"] == Score("metcalf", 4.0, {"cutoff": 4})
+        assert data["rosetta"] == Score("rosetta", 1.0, {})
+
+
+def test_filter_links(gcfs, spectra, mfs, score):
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=score)
+    lg.add_link(spectra[1], gcfs[1], metcalf=score)
+    lg.add_link(gcfs[1], mfs[1], metcalf=score)
+
+    lg_filtered = lg.filter([gcfs[1]])
+    assert lg_filtered.links == [
+        (spectra[1], gcfs[1], {"metcalf": score}),
+        (gcfs[1], mfs[1], {"metcalf": score}),
+    ]
+    lg_filtered = lg.filter([gcfs[0], gcfs[1]], [spectra[1]])
+    assert lg_filtered.links == [(spectra[1], gcfs[1], {"metcalf": score})]
+    assert lg_filtered[gcfs[1]] == {spectra[1]: {"metcalf": score}}
+
+    with pytest.raises(TypeError, match=".* is not a Spectrum or MolecularFamily object."):
+        lg.filter([gcfs[0]], [gcfs[1]])
+    with pytest.raises(TypeError, match=".* is not a GCF, Spectrum, or MolecularFamily object."):
+        lg.filter(["gcf"])
+
+
+def test_add_links(gcfs, spectra, mfs, score):
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], spectra[0], rosetta=Score("rosetta", 5.0, {}))
+    parameter = {"cutoff": 0.5}
+    lg.add_links(
+        [gcfs[0], gcfs[1], mfs[2], gcfs[1]],
+        [spectra[0], spectra[1], gcfs[2], spectra[1]],
+        np.array([1.0, 2.0, 3.0, 4.0]),
+        name="metcalf",
+        parameter=parameter,
+    )
+    # same result as adding the links one by one
+    expected = LinkGraph()
+    expected.add_link(gcfs[0], spectra[0], rosetta=Score("rosetta", 5.0, {}))
+    for u, v, value in [
+        (gcfs[0], spectra[0], 1.0),
+        (gcfs[1], spectra[1], 2.0),
+        (mfs[2], gcfs[2], 3.0),
+        (gcfs[1], spectra[1], 4.0),
+    ]:
+        expected.add_link(u, v, metcalf=Score("metcalf", value, parameter))
+    assert lg.links == expected.links
+    assert lg[gcfs[1]] == {spectra[1]: {"metcalf": Score("metcalf", 4.0, parameter)}}
+    assert lg.has_link(gcfs[2], mfs[2])
+
+    # empty input
+    lg.add_links([], [], [], name="metcalf", parameter=parameter)
+    assert len(lg.links) == 3
+
+
+def test_add_links_invalid(gcfs, spectra, score):
+    lg = LinkGraph()
+    with pytest.raises(ValueError, match=".* is not a valid name of scoring method.*"):
+        lg.add_links([gcfs[0]], [spectra[0]], [1.0], name="invalid", parameter={})
+    with pytest.raises(ValueError, match="must be the same"):
+        lg.add_links([gcfs[0]], [spectra[0], spectra[1]], [1.0], name="metcalf", parameter={})
+    with pytest.raises(TypeError, match=".* is not a Spectrum or MolecularFamily object."):
+        lg.add_links(
+            [gcfs[0], gcfs[1]], [spectra[0], gcfs[2]], [1, 2], name="metcalf", parameter={}
+        )
+    with pytest.raises(TypeError, match=".* is not a GCF, Spectrum, or MolecularFamily object."):
+        lg.add_links(
+            [gcfs[0], None], [spectra[0], spectra[1]], [1, 2], name="metcalf", parameter={}
+        )
+    assert len(lg.links) == 0
+
+
+def test_filter_by_type(gcfs, spectra, mfs, score):
+    lg = LinkGraph()
+    for gcf in gcfs:
+        for spectrum in spectra:
+            lg.add_link(gcf, spectrum, metcalf=score)
+        lg.add_link(gcf, mfs[0], metcalf=score)
+
+    # only the links to the types of the other side are walked
+    lg_filtered = lg.filter(gcfs, [mfs[0], spectra[1]])
+    assert len(lg_filtered.links) == 6
+    assert lg_filtered[mfs[0]].keys() == set(gcfs)
+    assert lg_filtered[spectra[1]].keys() == set(gcfs)
+
+    # the smaller side is walked, the result does not depend on the order of the sides
+    lg_filtered = lg.filter([gcfs[0]], [*spectra, *mfs])
+    assert lg_filtered.links == lg.filter([*spectra, *mfs], [gcfs[0]]).links
+    assert [link[:2] for link in lg_filtered.links] == [
+        (gcfs[0], spectra[0]),
+        (gcfs[0], spectra[1]),
+        (gcfs[0], spectra[2]),
+        (gcfs[0], mfs[0]),
+    ]
+
+
+@fixture
+def lg_pair(gcfs, spectra, mfs, score):
+    lg1 = LinkGraph()
+    lg1.add_link(gcfs[0], spectra[0], metcalf=score)
+    lg1.add_link(gcfs[1], spectra[1], metcalf=score)
+    lg2 = LinkGraph()
+    rosetta = Score("rosetta", 2.0, {})
+    lg2.add_link(spectra[1], gcfs[1], rosetta=rosetta)
+    lg2.add_link(gcfs[2], mfs[2], rosetta=rosetta)
+    return lg1, lg2
+
+
+def test_merge(lg_pair, gcfs, spectra, mfs, score):
+    lg1, lg2 = lg_pair
+    rosetta = Score("rosetta", 2.0, {})
+    lg = lg1.merge(lg2)
+    assert lg.links == [
+        (gcfs[0], spectra[0], {"metcalf": score}),
+        (gcfs[1], spectra[1], {"metcalf": score, "rosetta": rosetta}),
+        (gcfs[2], mfs[2], {"rosetta": rosetta}),
+    ]
+    assert len(lg) == 6
+    assert lg[mfs[2]] == {gcfs[2]: {"rosetta": rosetta}}
+    # the input LinkGraph objects are not changed
+    assert len(lg1.links) == len(lg2.links) == 2
+
+    # the scores of `other` are kept for the same scoring method
+    lg3 = LinkGraph()
+    new_score = Score("metcalf", 3.0, {"cutoff": 1})
+    lg3.add_link(gcfs[0], spectra[0], metcalf=new_score)
+    assert lg1.merge(lg3).get_link_data(gcfs[0], spectra[0]) == {"metcalf": new_score}
+
+
+def test_join(lg_pair, gcfs, spectra, score):
+    lg1, lg2 = lg_pair
+    lg = lg1.join(lg2)
+    assert lg.links == [
+        (gcfs[1], spectra[1], {"metcalf": score, "rosetta": Score("rosetta", 2.0, {})}),
+    ]
+    assert len(lg) == 2
+    assert len(lg1.join(LinkGraph())) == 0
+
+
+def test_iter_tables(lg_pair, gcfs, spectra, mfs):
+    lg = lg_pair[0].merge(lg_pair[1])
+    tables = list(lg.iter_tables(batch_size=2))
+    assert [len(df) for df in tables] == [2, 1]
+    df = pd.concat(tables, ignore_index=True)
+    assert list(df.columns) == ["gcf", "target_type", "target", "metcalf", "rosetta"]
+    assert list(df["gcf"]) == [gcfs[0].id, gcfs[1].id, gcfs[2].id]
+    assert list(df["target_type"]) == ["Spectrum", "Spectrum", "MolecularFamily"]
+    assert list(df["target"]) == [spectra[0].id, spectra[1].id, mfs[2].id]
+    np.testing.assert_array_equal(df["metcalf"], [1.0, 1.0, np.nan])
+    np.testing.assert_array_equal(df["rosetta"], [np.nan, 2.0, 2.0])
+
+    with pytest.raises(ValueError, match="must be a positive integer"):
+        next(lg.iter_tables(batch_size=0))
+
+
+def test_iter_tables_object_scores(gcfs, spectra):
+    lg = LinkGraph()
+    lg.add_link(gcfs[0], spectra[0], metcalf=Score("metcalf", "high", {}))
+    lg.add_link(gcfs[0], spectra[1], rosetta=Score("rosetta", 1.0, {}))
+    df = next(lg.iter_tables())
+    assert df["metcalf"][0] == "high"
+    assert pd.isna(df["metcalf"][1])
+    # the scores in the link graph are not changed
+    assert lg.get_link_data(gcfs[0], spectra[0])["metcalf"].value == "high"
+
+
+def test_export_csv(lg_pair, tmp_path):
+    lg = lg_pair[0].merge(lg_pair[1])
+    lg.export(tmp_path / "links.csv", batch_size=2)
+    df = pd.read_csv(tmp_path / "links.csv")
+    assert_frame_equal(df, pd.concat(lg.iter_tables(), ignore_index=True))
+
+    LinkGraph().export(tmp_path / "empty.csv")
+    assert (tmp_path / "empty.csv").read_text() == "gcf,target_type,target\n"
+
+    with pytest.raises(ValueError, match="Unsupported format"):
+        lg.export(tmp_path / "links.txt")
+
+
+@pytest.mark.parametrize("file_name", ["links.parquet", "links.arrow"])
+def test_export_arrow(lg_pair, tmp_path, file_name):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    lg = lg_pair[0].merge(lg_pair[1])
+    lg.export(tmp_path / file_name, batch_size=2)
+    if file_name.endswith(".parquet"):
+        file = pyarrow.parquet.ParquetFile(tmp_path / file_name)
+        assert file.num_row_groups == 2
+        table = file.read()
+    else:
+        table = pa.ipc.open_file(tmp_path / file_name).read_all()
+    assert_frame_equal(table.to_pandas(), pd.concat(lg.iter_tables(), ignore_index=True))
+    assert json.loads(table.schema.metadata[b"parameters"]) == {
+        "metcalf": [{"cutoff": 0.5}],
+        "rosetta": [{}],
+    }
+
+
+def test_num_links(lg, gcfs, spectra, score):
+    assert LinkGraph().num_links == 0
+    assert lg.num_links == 1
+    lg.add_link(spectra[0], gcfs[0], metcalf=score)
+    assert lg.num_links == 1
+
+
+def test_repr_lazy(gcfs, monkeypatch):
+    spectra = [Spectrum(f"spectrum{i}", [1], [1], 10.0) for i in range(100)]
+    lg = LinkGraph()
+    lg.add_links([gcfs[0]] * 100, spectra, np.arange(100), name="metcalf", parameter={})
+    # the representation does not create all links
+    monkeypatch.setattr(LinkGraph, "links", property(lambda self: pytest.fail("links called")))
+    table = repr(lg)
+    assert table.endswith("...\n[ 100 links ]")
+    assert len(table.splitlines()) == 2 + 60 + 2
+
+
+def test_top(gcfs, spectra, mfs, score):
+    lg = LinkGraph()
+    lg.add_links(
+        [gcfs[0], gcfs[1], gcfs[2], gcfs[0]],
+        [spectra[0], spectra[1], spectra[2], mfs[0]],
+        [1.0, 3.0, 2.0, 3.0],
+        name="metcalf",
+        parameter={},
+    )
+    lg.add_link(gcfs[1], mfs[1], rosetta=Score("rosetta", 10.0, {}))
+
+    top = lg.top(3)
+    assert [(u, v) for u, v, _ in top.links] == [
+        (gcfs[1], spectra[1]),
+        (gcfs[0], mfs[0]),
+        (gcfs[2], spectra[2]),
+    ]
+    # links without the score are ignored
+    assert lg.top(10).num_links == 4
+    assert lg.top(10, by="rosetta").links == [
+        (gcfs[1], mfs[1], {"rosetta": Score("rosetta", 10.0, {})})
+    ]
+    assert lg.top(10, by="nplclass").num_links == 0
+
+    with pytest.raises(ValueError, match="must be a positive integer"):
+        lg.top(0)
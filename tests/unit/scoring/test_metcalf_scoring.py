@@ -1,8 +1,18 @@
+import os
 import numpy as np
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
+from scipy.sparse import csr_matrix
+from scipy.stats import hypergeom
+from nplinker.genomics import GCF
+from nplinker.metabolomics import Spectrum
 from nplinker.scoring import MetcalfScoring
+from nplinker.scoring.utils import get_presence_gcf_strain
+from nplinker.scoring.utils import get_presence_mf_strain
+from nplinker.scoring.utils import get_presence_spec_strain
+from nplinker.strain import Strain
+from nplinker.strain import StrainCollection
 
 
 def test_init(npl):
@@ -13,8 +23,8 @@ def test_init(npl):
     assert_frame_equal(mc.presence_gcf_strain, pd.DataFrame())
     assert_frame_equal(mc.presence_spec_strain, pd.DataFrame())
     assert_frame_equal(mc.presence_mf_strain, pd.DataFrame())
-    assert_frame_equal(mc.raw_score_spec_gcf, pd.DataFrame(columns=["spec", "gcf", "score"]))
-    assert_frame_equal(mc.raw_score_mf_gcf, pd.DataFrame(columns=["mf", "gcf", "score"]))
+    assert mc.raw_score_spec_gcf.shape == (0, 0)
+    assert mc.raw_score_mf_gcf.shape == (0, 0)
     assert mc.metcalf_mean is None
     assert mc.metcalf_std is None
 
@@ -47,15 +57,13 @@ def test_setup(mc, gcfs, spectra, mfs, strains):
         ),
     )
 
-    df = pd.DataFrame([[12, -9, 11], [-9, 12, 11], [1, 1, 21]], index=spectra, columns=gcfs)
-    df_melted = df.reset_index().melt(id_vars="index")
-    df_melted.columns = ["spec", "gcf", "score"]
-    assert_frame_equal(mc.raw_score_spec_gcf, df_melted)
-
-    df = pd.DataFrame([[12, -9, 11], [-9, 12, 11], [1, 1, 21]], index=mfs, columns=gcfs)
-    df_melted = df.reset_index().melt(id_vars="index")
-    df_melted.columns = ["mf", "gcf", "score"]
-    assert_frame_equal(mc.raw_score_mf_gcf, df_melted)
+    # rows follow the order of spectra/mfs and columns follow the order of gcfs
+    np.testing.assert_array_equal(
+        mc.raw_score_spec_gcf, np.array([[12, -9, 11], [-9, 12, 11], [1, 1, 21]])
+    )
+    np.testing.assert_array_equal(
+        mc.raw_score_mf_gcf, np.array([[12, -9, 11], [-9, 12, 11], [1, 1, 21]])
+    )
 
     assert isinstance(mc.metcalf_mean, np.ndarray)
     assert isinstance(mc.metcalf_std, np.ndarray)
@@ -63,6 +71,127 @@ def test_setup(mc, gcfs, spectra, mfs, strains):
     assert mc.metcalf_std.shape == (4, 4)
 
 
+def test_setup_no_cache(mc, npl):
+    """Test `setup` method does not write the cache by default."""
+    assert not mc.use_cache
+    assert not os.path.exists(os.path.join(npl.output_dir, MetcalfScoring.CACHE))
+
+
+def test_setup_load_cache(mc, npl, monkeypatch):
+    """Test `setup` method when the cache exists and matches the data."""
+    monkeypatch.setattr(MetcalfScoring, "use_cache", True)
+    MetcalfScoring.npl = None
+    mc.setup(npl)
+    assert os.path.exists(os.path.join(npl.output_dir, MetcalfScoring.CACHE, "index.json"))
+
+    expected = {
+        name: getattr(mc, name)
+        for name in ("presence_gcf_strain", "presence_spec_strain", "presence_mf_strain")
+    }
+    expected_raw_score_spec_gcf = mc.raw_score_spec_gcf.copy()
+    expected_mean = mc.metcalf_mean.copy()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("raw scores should be loaded from cache")
+
+    monkeypatch.setattr(MetcalfScoring, "_calc_raw_score", staticmethod(fail))
+    MetcalfScoring.npl = None
+    MetcalfScoring.presence_gcf_strain = pd.DataFrame()
+    mc.setup(npl)
+
+    for name, df in expected.items():
+        assert_frame_equal(getattr(mc, name), df)
+    assert isinstance(mc.raw_score_spec_gcf, np.memmap)
+    np.testing.assert_array_equal(mc.raw_score_spec_gcf, expected_raw_score_spec_gcf)
+    np.testing.assert_array_equal(mc.metcalf_mean, expected_mean)
+
+
+def test_setup_outdated_cache(mc, npl, gcfs, monkeypatch):
+    """Test `setup` method when the data have changed since the cache was saved."""
+    monkeypatch.setattr(MetcalfScoring, "use_cache", True)
+    MetcalfScoring.npl = None
+    mc.setup(npl)
+    npl._gcf_dict = {gcf.id: gcf for gcf in gcfs[:2]}
+    MetcalfScoring.npl = None
+    mc.setup(npl)
+
+    assert list(mc.presence_gcf_strain.index) == list(gcfs[:2])
+    assert mc.raw_score_spec_gcf.shape == (3, 2)
+
+
+#
+# Test the `update` method
+#
+
+
+@pytest.fixture
+def npl_updated(npl, gcfs, spectra, mfs, strains):
+    """NPLinker object with a new strain, a new GCF and a new spectrum added."""
+    strain4 = Strain("strain4")
+    new_strains = StrainCollection()
+    new_strains.add(strain4)
+    gcf4 = GCF("gcf4")
+    gcf4.strains.add(strains.lookup("strain1")[0])
+    gcf4.strains.add(strain4)
+    spectrum4 = Spectrum("spectrum4", [1], [1], 10.0)
+    spectrum4.strains.add(strain4)
+
+    npl._strains = strains + new_strains
+    npl._gcf_dict = {gcf.id: gcf for gcf in (*gcfs, gcf4)}
+    npl._spec_dict = {spec.id: spec for spec in (*spectra, spectrum4)}
+    return npl
+
+
+def test_update(mc, npl_updated):
+    mc.update(npl_updated)
+
+    expected_presence_gcf = get_presence_gcf_strain(npl_updated.gcfs, npl_updated.strains)
+    expected_presence_spec = get_presence_spec_strain(npl_updated.spectra, npl_updated.strains)
+    expected_presence_mf = get_presence_mf_strain(npl_updated.mfs, npl_updated.strains)
+    assert_frame_equal(mc.presence_gcf_strain, expected_presence_gcf)
+    assert_frame_equal(mc.presence_spec_strain, expected_presence_spec)
+    assert_frame_equal(mc.presence_mf_strain, expected_presence_mf)
+
+    # same scores as calculating from scratch
+    np.testing.assert_array_equal(
+        mc.raw_score_spec_gcf,
+        mc._calc_raw_score(expected_presence_spec, expected_presence_gcf, mc.metcalf_weights),
+    )
+    np.testing.assert_array_equal(
+        mc.raw_score_mf_gcf,
+        mc._calc_raw_score(expected_presence_mf, expected_presence_gcf, mc.metcalf_weights),
+    )
+    assert mc.metcalf_mean.shape == (5, 5)
+    assert mc.metcalf_std.shape == (5, 5)
+
+    lg = mc.get_links(npl_updated.lookup_gcf("gcf4"), cutoff=-np.inf)
+    assert len(lg.links) == 7
+
+
+def test_update_changed_presence(mc, npl, spectra, strains):
+    # an existing spectrum is found in another existing strain
+    spectrum = Spectrum(spectra[0].id, [1], [1], spectra[0].precursor_mz)
+    spectrum.strains.add(strains.lookup("strain1")[0])
+    spectrum.strains.add(strains.lookup("strain3")[0])
+    npl._spec_dict = {spec.id: spec for spec in (spectrum, *spectra[1:])}
+    mc.update(npl)
+
+    expected_presence_spec = get_presence_spec_strain(npl.spectra, npl.strains)
+    assert_frame_equal(mc.presence_spec_strain, expected_presence_spec)
+    np.testing.assert_array_equal(
+        mc.raw_score_spec_gcf,
+        mc._calc_raw_score(expected_presence_spec, mc.presence_gcf_strain, mc.metcalf_weights),
+    )
+
+
+def test_update_removed_object(mc, npl, gcfs):
+    npl._gcf_dict = {gcf.id: gcf for gcf in gcfs[:2]}
+    mc.update(npl)
+    assert mc.presence_gcf_strain.shape == (2, 3)
+    assert mc.raw_score_spec_gcf.shape == (3, 2)
+    assert mc.raw_score_mf_gcf.shape == (3, 2)
+
+
 #
 # Test the `get_links` method
 #
@@ -92,6 +221,14 @@ def test_get_links_invalid_input_type(mc, objects, expected):
         mc.get_links(*objects)
 
 
+def test_get_links_not_set_up(monkeypatch):
+    monkeypatch.setattr(MetcalfScoring, "npl", None)
+    with pytest.raises(ValueError, match="MetcalfScoring is not set up"):
+        MetcalfScoring().get_links()
+    with pytest.raises(ValueError, match="MetcalfScoring is not set up"):
+        MetcalfScoring().get_pvalues()
+
+
 def test_get_links_invalid_mixed_types(mc, spectra, mfs):
     objects = (*spectra, *mfs)
     with pytest.raises(TypeError, match="Input objects must be of the same type."):
@@ -170,3 +307,307 @@ def test_get_links_mf_standardised_true(mc, gcfs, mfs):
 
     lg = mc.get_links(*mfs, cutoff=0, standardised=True)
     assert len(lg.links) == 7
+
+
+def test_get_links_top_k(mc, gcfs, spectra, mfs):
+    """Test `get_links` method when keeping the top k links of each input object."""
+    lg = mc.get_links(*gcfs, cutoff=-np.inf, top_k=1)
+    assert len(lg.links) == 6
+    assert lg[gcfs[0]][spectra[0]][mc.name].value == 12
+    assert lg[gcfs[1]][spectra[1]][mc.name].value == 12
+    assert lg[gcfs[2]][spectra[2]][mc.name].value == 21
+    assert lg[gcfs[0]][mfs[0]][mc.name].value == 12
+    assert lg[gcfs[1]][mfs[1]][mc.name].value == 12
+    assert lg[gcfs[2]][mfs[2]][mc.name].value == 21
+    assert lg[gcfs[0]][spectra[0]][mc.name].parameter["top_k"] == 1
+
+    lg = mc.get_links(*spectra, cutoff=-np.inf, top_k=2)
+    assert len(lg.links) == 6
+    assert lg[spectra[0]].keys() == {gcfs[0], gcfs[2]}
+    assert lg[spectra[1]].keys() == {gcfs[1], gcfs[2]}
+
+    # cutoff is applied before taking the top k links
+    lg = mc.get_links(*spectra, cutoff=15, top_k=2)
+    assert len(lg.links) == 1
+    assert lg[spectra[2]][gcfs[2]][mc.name].value == 21
+
+
+def test_get_links_top_k_total(mc, gcfs, spectra, mfs):
+    """Test `get_links` method when keeping the top k links of all input objects."""
+    lg = mc.get_links(*gcfs, cutoff=-np.inf, top_k_total=1)
+    assert len(lg.links) == 2
+    assert lg[gcfs[2]][spectra[2]][mc.name].value == 21
+    assert lg[gcfs[2]][mfs[2]][mc.name].value == 21
+
+    lg = mc.get_links(*mfs, cutoff=-np.inf, standardised=True, top_k=2, top_k_total=3)
+    assert len(lg.links) == 3
+
+
+@pytest.mark.parametrize("top_k", [0, -1, 1.5])
+def test_get_links_invalid_top_k(mc, top_k):
+    with pytest.raises(ValueError, match="`top_k` must be a positive integer"):
+        mc.get_links(top_k=top_k)
+    with pytest.raises(ValueError, match="`top_k_total` must be a positive integer"):
+        mc.get_links(top_k_total=top_k)
+
+
+#
+# Test the chunked scoring mode
+#
+
+
+def _link_values(lg):
+    return {(u.id, v.id): round(float(data["metcalf"].value), 6) for u, v, data in lg.links}
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+@pytest.mark.parametrize(
+    "parameters",
+    [
+        {"cutoff": -np.inf},
+        {"cutoff": 0},
+        {"cutoff": 0, "standardised": True},
+        {"cutoff": -np.inf, "top_k": 1},
+        {"cutoff": -np.inf, "top_k": 2, "top_k_total": 3},
+        {"cutoff": -np.inf, "standardised": True, "top_k_total": 2},
+    ],
+)
+def test_get_links_chunked(npl, gcfs, spectra, mfs, monkeypatch, n_jobs, parameters):
+    """Test chunked scoring gives the same links as scoring with the full raw scores."""
+    MetcalfScoring.npl = None
+    MetcalfScoring.setup(npl)
+    expected = [
+        _link_values(MetcalfScoring().get_links(*objects, **parameters))
+        for objects in (gcfs, spectra, mfs)
+    ]
+
+    monkeypatch.setattr(MetcalfScoring, "chunk_size", 2)
+    monkeypatch.setattr(MetcalfScoring, "n_jobs", n_jobs)
+    MetcalfScoring.npl = None
+    MetcalfScoring.setup(npl)
+    assert MetcalfScoring.raw_score_spec_gcf.size == 0
+    assert MetcalfScoring.raw_score_mf_gcf.size == 0
+    actual = [
+        _link_values(MetcalfScoring().get_links(*objects, **parameters))
+        for objects in (gcfs, spectra, mfs)
+    ]
+    MetcalfScoring.npl = None
+
+    if "top_k" in parameters or "top_k_total" in parameters:
+        # ties at the k-th score may be broken differently, so only compare the sizes and scores
+        for exp, act in zip(expected, actual):
+            assert sorted(exp.values()) == sorted(act.values())
+    else:
+        assert actual == expected
+
+
+def test_get_links_selected_presence(mc, spectra, monkeypatch):
+    """Test only the presences of the input objects are converted, not the whole DataFrames."""
+    converted = []
+    to_numpy = pd.DataFrame.to_numpy
+
+    def record_to_numpy(self, *args, **kwargs):
+        converted.append(list(self.index))
+        return to_numpy(self, *args, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_numpy", record_to_numpy)
+    for chunk_size in (None, 2):
+        monkeypatch.setattr(MetcalfScoring, "chunk_size", chunk_size)
+        converted.clear()
+        mc.get_links(spectra[0], cutoff=-np.inf, standardised=True)
+        assert [spectra[0]] in converted
+        assert not any(spectra[1] in index for index in converted)
+
+
+#
+# Test the `_calc_raw_score` method
+#
+
+
+@pytest.mark.parametrize("weights", [(10, -10, 0, 1), (3, 7, -2, 5), (1, 1, 1, 1)])
+def test_calc_raw_score(weights):
+    rng = np.random.default_rng(42)
+    p1 = rng.integers(0, 2, size=(20, 8))
+    p2 = rng.integers(0, 2, size=(15, 8))
+    # the weighted sum of the four co-presence products
+    expected = (
+        p1 @ p2.T * weights[0]
+        + p1 @ (1 - p2).T * weights[1]
+        + (1 - p1) @ p2.T * weights[2]
+        + (1 - p1) @ (1 - p2).T * weights[3]
+    )
+    score = MetcalfScoring._calc_raw_score(pd.DataFrame(p1), pd.DataFrame(p2), weights)
+    np.testing.assert_array_equal(score, expected)
+
+
+def test_get_links_standardised_values(mc, gcfs, spectra):
+    """Test standardised scores are the raw scores normalised by the mean/std of strain counts."""
+    lg = mc.get_links(*gcfs, cutoff=-np.inf, standardised=True)
+    # spectra[2] has 2 strains, gcfs[2] has 2 strains, raw score is 21
+    expected = (21 - mc.metcalf_mean[2, 2]) / mc.metcalf_std[2, 2]
+    assert lg[gcfs[2]][spectra[2]][mc.name].value == pytest.approx(expected)
+    # spectra[0] has 1 strain, gcfs[1] has 1 strain, raw score is -9
+    expected = (-9 - mc.metcalf_mean[1, 1]) / mc.metcalf_std[1, 1]
+    assert lg[gcfs[1]][spectra[0]][mc.name].value == pytest.approx(expected)
+
+
+#
+# Test the `_calc_mean_std` method
+#
+
+
+@pytest.mark.parametrize("n_strains", [1, 2, 5])
+@pytest.mark.parametrize("weights", [(10, -10, 0, 1), (3, 7, -2, 5)])
+def test_calc_mean_std(n_strains, weights):
+    mean, std = MetcalfScoring._calc_mean_std(n_strains, weights)
+    assert mean.shape == (n_strains + 1, n_strains + 1)
+    assert std.shape == (n_strains + 1, n_strains + 1)
+
+    # compare with the moments summed over the hypergeometric distribution of strain overlaps
+    for n in range(n_strains + 1):
+        for m in range(n_strains + 1):
+            o = np.arange(max(0, n + m - n_strains), min(n, m) + 1)
+            prob = hypergeom.pmf(o, n_strains, n, m)
+            score = (
+                weights[0] * o
+                + weights[1] * (n - o)
+                + weights[2] * (m - o)
+                + weights[3] * (n_strains - (n + m - o))
+            )
+            expected_mean = np.sum(prob * score)
+            expected_var = np.sum(prob * score**2) - expected_mean**2
+            if expected_var < 1e-09:
+                expected_var = 1
+            assert mean[n, m] == pytest.approx(expected_mean)
+            assert std[n, m] == pytest.approx(np.sqrt(expected_var))
+
+
+#
+# Test the `get_pvalues` method
+#
+
+
+def test_get_pvalues(mc, gcfs, spectra, mfs):
+    spec_gcf, mf_gcf = mc.get_pvalues(gcfs[0], n_permutations=3000, max_fdr=None, seed=0)
+    assert list(spec_gcf.columns) == ["spec", "gcf", "score", "pvalue", "fdr"]
+    assert list(mf_gcf.columns) == ["mf", "gcf", "score", "pvalue", "fdr"]
+    assert len(spec_gcf) == len(mf_gcf) == 3
+    assert set(spec_gcf["spec"]) == set(spectra)
+    assert set(spec_gcf["gcf"]) == {gcfs[0]}
+    assert (spec_gcf["fdr"] >= spec_gcf["pvalue"]).all()
+
+    # gcfs[0] and spectra[0] share their only strain, in 1/3 of the permutations of 3 strains
+    pvalue = spec_gcf.loc[spec_gcf["spec"] == spectra[0], "pvalue"].item()
+    assert pvalue == pytest.approx(1 / 3, abs=0.05)
+    # the co-occurrence of gcfs[0] and spectra[1] is the lowest possible
+    pvalue = spec_gcf.loc[spec_gcf["spec"] == spectra[1], "pvalue"].item()
+    assert pvalue == 1
+
+
+def test_get_pvalues_cutoff(mc, gcfs):
+    spec_gcf, mf_gcf = mc.get_pvalues(*gcfs, n_permutations=10, cutoff=12, max_fdr=None, seed=0)
+    assert (spec_gcf["score"] >= 12).all()
+    assert len(spec_gcf) == len(mf_gcf) == 3
+
+
+def test_get_pvalues_max_fdr(mc, gcfs):
+    # with 3 strains, no link is significant, so no link is returned by default
+    spec_gcf, mf_gcf = mc.get_pvalues(gcfs[0], n_permutations=100, seed=0)
+    assert list(spec_gcf.columns) == ["spec", "gcf", "score", "pvalue", "fdr"]
+    assert len(spec_gcf) == len(mf_gcf) == 0
+
+    spec_gcf, _ = mc.get_pvalues(gcfs[0], n_permutations=100, max_fdr=1, seed=0)
+    assert len(spec_gcf) == 3
+    spec_gcf, _ = mc.get_pvalues(gcfs[0], n_permutations=100, max_fdr=0.99, seed=0)
+    assert (spec_gcf["fdr"] <= 0.99).all()
+
+
+def test_get_pvalues_early_stopping(mc, gcfs, spectra, monkeypatch):
+    count_exceedances = MetcalfScoring._count_exceedances
+    calls = []
+
+    def spy(*args, **kwargs):
+        calls.append(args)
+        return count_exceedances(*args, **kwargs)
+
+    monkeypatch.setattr(MetcalfScoring, "_count_exceedances", staticmethod(spy))
+    (spec_gcf,) = mc.get_pvalues(
+        *spectra, n_permutations=1000, batch_size=10, max_exceedances=5, max_fdr=None, seed=0
+    )
+    # with 3 strains, no link is significant, so all links stop long before 100 batches
+    assert len(calls) < 10
+    # links exceeded in every permutation have p-value 1
+    pvalue = spec_gcf.loc[
+        (spec_gcf["spec"] == spectra[1]) & (spec_gcf["gcf"] == gcfs[0]), "pvalue"
+    ].item()
+    assert pvalue == 1
+
+
+def test_get_pvalues_selected_presence(mc, gcfs, spectra, monkeypatch):
+    """Test only the presences of the input objects are converted and permuted."""
+    converted = []
+    to_numpy = pd.DataFrame.to_numpy
+
+    def record_to_numpy(self, *args, **kwargs):
+        converted.append(list(self.index))
+        return to_numpy(self, *args, **kwargs)
+
+    count_exceedances = MetcalfScoring._count_exceedances
+    shapes = []
+
+    def spy(p_met, *args, p_gcf, **kwargs):
+        shapes.append((p_met.shape[0], p_gcf.shape[0]))
+        return count_exceedances(p_met, *args, p_gcf=p_gcf, **kwargs)
+
+    monkeypatch.setattr(pd.DataFrame, "to_numpy", record_to_numpy)
+    monkeypatch.setattr(MetcalfScoring, "_count_exceedances", staticmethod(spy))
+    mc.get_pvalues(spectra[0], n_permutations=10, max_fdr=None, seed=0)
+    assert converted == [[spectra[0]], list(gcfs)]
+    assert set(shapes) == {(1, 3)}
+
+    converted.clear()
+    shapes.clear()
+    mc.get_pvalues(gcfs[0], n_permutations=10, max_fdr=None, seed=0)
+    assert not any(gcfs[1] in index for index in converted)
+    assert set(shapes) == {(3, 1)}
+
+
+@pytest.mark.parametrize("n_jobs", [1, 2])
+def test_get_pvalues_reproducible(mc, gcfs, monkeypatch, n_jobs):
+    expected = mc.get_pvalues(*gcfs, n_permutations=50, batch_size=7, max_fdr=None, seed=1)
+    monkeypatch.setattr(MetcalfScoring, "n_jobs", n_jobs)
+    results = mc.get_pvalues(*gcfs, n_permutations=50, batch_size=7, max_fdr=None, seed=1)
+    for df, expected_df in zip(results, expected):
+        assert_frame_equal(df, expected_df)
+
+
+@pytest.mark.parametrize(
+    "parameters",
+    [{"n_permutations": 0}, {"batch_size": -1}, {"max_exceedances": 1.5}, {"max_fdr": 0}],
+)
+def test_get_pvalues_invalid_parameters(mc, parameters):
+    with pytest.raises(ValueError, match="must be"):
+        mc.get_pvalues(**parameters)
+
+
+def test_count_exceedances():
+    rng = np.random.default_rng(42)
+    p_met = rng.integers(0, 2, size=(12, 70))
+    p_gcf = rng.integers(0, 2, size=(9, 70))
+    permutations = np.array([rng.permutation(70) for _ in range(20)])
+    observed = p_met @ p_gcf.T
+
+    counts = MetcalfScoring._count_exceedances(
+        csr_matrix(p_met), observed, permutations, p_gcf=csr_matrix(p_gcf), sign=1, block_size=50
+    )
+
+    expected = np.zeros_like(observed)
+    for permutation in permutations:
+        expected += p_met @ p_gcf[:, permutation].T >= observed
+    np.testing.assert_array_equal(counts, expected)
+
+
+def test_calc_fdr():
+    pvalues = np.array([0.01, 0.04, 0.03, 0.5, 0.02])
+    expected = np.array([0.05, 0.05, 0.05, 0.5, 0.05])
+    np.testing.assert_allclose(MetcalfScoring._calc_fdr(pvalues), expected)
@@ -1,8 +1,17 @@
+import numpy as np
 import pandas as pd
 from pandas.testing import assert_frame_equal
+from nplinker.genomics import GCF
+from nplinker.scoring.utils import count_cooccurrence
+from nplinker.scoring.utils import get_presence_bits
 from nplinker.scoring.utils import get_presence_gcf_strain
+from nplinker.scoring.utils import get_presence_matrix
 from nplinker.scoring.utils import get_presence_mf_strain
 from nplinker.scoring.utils import get_presence_spec_strain
+from nplinker.scoring.utils import pack_presence
+from nplinker.scoring.utils import unpack_presence
+from nplinker.strain import Strain
+from nplinker.strain import StrainCollection
 
 
 #
@@ -36,3 +45,63 @@ def test_get_presence_mf_strain(mfs, strains):
         presence_mf_strain,
         pd.DataFrame([[1, 0, 0], [0, 1, 0], [1, 1, 0]], index=mfs, columns=list(strains)),
     )
+
+
+def test_get_presence_matrix(gcfs, strains):
+    presence = get_presence_matrix(gcfs, strains)
+    assert presence.shape == (3, 3)
+    np.testing.assert_array_equal(presence.toarray(), [[1, 0, 0], [0, 1, 0], [1, 1, 0]])
+
+
+def test_get_presence_matrix_empty(strains):
+    presence = get_presence_matrix([], strains)
+    assert presence.shape == (0, 3)
+    assert presence.nnz == 0
+
+
+#
+# Test bitset functions
+#
+
+
+def test_get_presence_bits(gcfs, strains):
+    bits = get_presence_bits(gcfs, strains)
+    assert bits.dtype == np.uint64
+    np.testing.assert_array_equal(bits, [[0b001], [0b010], [0b011]])
+    for gcf, row in zip(gcfs, bits):
+        np.testing.assert_array_equal(gcf.strains.to_bitset(strains), row)
+
+
+def test_count_cooccurrence(gcfs, spectra, strains):
+    gcf_bits = get_presence_bits(gcfs, strains)
+    spec_bits = get_presence_bits(spectra, strains)
+    p_gcf = get_presence_matrix(gcfs, strains).toarray()
+    p_spec = get_presence_matrix(spectra, strains).toarray()
+    expected = p_spec.astype(int) @ p_gcf.T.astype(int)
+    np.testing.assert_array_equal(count_cooccurrence(spec_bits, gcf_bits), expected)
+    # small blocks give the same counts
+    np.testing.assert_array_equal(count_cooccurrence(spec_bits, gcf_bits, block_size=1), expected)
+
+
+def test_pack_unpack_presence(gcfs, strains):
+    presence = get_presence_matrix(gcfs, strains).toarray()
+    bits = pack_presence(presence)
+    assert bits.dtype == np.uint64
+    np.testing.assert_array_equal(bits, [[0b001], [0b010], [0b011]])
+    np.testing.assert_array_equal(unpack_presence(bits, len(strains)), presence)
+
+
+def test_pack_presence_multiple_words():
+    strains = StrainCollection()
+    for i in range(130):
+        strains.add(Strain(f"strain{i}"))
+    gcf = GCF("gcf")
+    gcf.strains.add(strains.lookup("strain0")[0])
+    gcf.strains.add(strains.lookup("strain64")[0])
+    gcf.strains.add(strains.lookup("strain129")[0])
+    presence = get_presence_matrix([gcf], strains).toarray()
+    bits = pack_presence(presence)
+    assert bits.shape == (1, 3)
+    np.testing.assert_array_equal(bits, [[1, 1, 2]])
+    np.testing.assert_array_equal(get_presence_bits([gcf], strains), bits)
+    np.testing.assert_array_equal(unpack_presence(bits, len(strains)), presence)
@@ -245,3 +245,14 @@ def test_to_json(collection: StrainCollection, tmp_path):
     with open(file_path, "r") as f:
         actual_data = json.load(f)
     assert actual_data == expected_data
+
+
+def test_to_bitset(collection: StrainCollection, strain: Strain):
+    strains = StrainCollection()
+    strains.add(Strain("strain_0"))
+    strains.add(strain)
+    # match by alias
+    strains.add(Strain("strain_1_a"))
+    assert collection.to_bitset(strains).tolist() == [0b110]
+    assert StrainCollection().to_bitset(strains).tolist() == [0]
+    assert collection.to_bitset(StrainCollection()).tolist() == []
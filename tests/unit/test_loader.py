@@ -0,0 +1,41 @@
+import os
+import pytest
+from nplinker.config import load_config
+from nplinker.defaults import BGC_CACHE_FILENAME
+from nplinker.defaults import OUTPUT_DIRNAME
+from nplinker.loader import DatasetLoader
+from . import CONFIG_FILE_LOCAL_MODE
+
+
+@pytest.fixture
+def config(tmp_path):
+    os.environ["NPLINKER_ROOT_DIR"] = str(tmp_path)
+    return load_config(CONFIG_FILE_LOCAL_MODE)
+
+
+def test_init_default(config):
+    # no worker processes and no cache by default, as in the sequential loading
+    loader = DatasetLoader(config)
+    assert loader.concurrent is False
+    assert loader.n_jobs == 1
+    assert loader.bgc_cache_file is None
+    assert loader._get_n_jobs() == 1
+
+
+def test_init_cache(config):
+    loader = DatasetLoader(config, use_cache=True)
+    assert loader.bgc_cache_file == config.root_dir / OUTPUT_DIRNAME / BGC_CACHE_FILENAME
+
+
+def test_get_n_jobs(config, monkeypatch):
+    monkeypatch.setattr(os, "cpu_count", lambda: 8)
+    assert DatasetLoader(config, n_jobs=-1)._get_n_jobs() == 8
+    # the spectra and antiSMASH parsers share the workers when they run concurrently
+    assert DatasetLoader(config, concurrent=True, n_jobs=-1)._get_n_jobs() == 4
+    assert DatasetLoader(config, concurrent=True, n_jobs=1)._get_n_jobs() == 1
+
+
+@pytest.mark.parametrize("n_jobs", [0, -2])
+def test_init_invalid_n_jobs(config, n_jobs):
+    with pytest.raises(ValueError, match="`n_jobs` must be a positive integer or -1"):
+        DatasetLoader(config, n_jobs=n_jobs)
@@ -0,0 +1,122 @@
+import os
+import pickle
+import pytest
+from nplinker.genomics import GCF
+from nplinker.metabolomics import MolecularFamily
+from nplinker.metabolomics import Spectrum
+from nplinker.nplinker import NPLinker
+from nplinker.strain import Strain
+from nplinker.strain import StrainCollection
+from . import CONFIG_FILE_LOCAL_MODE
+
+
+@pytest.fixture
+def npl(tmp_path) -> NPLinker:
+    """NPLinker object with a few objects set manually instead of loading them."""
+    os.environ["NPLINKER_ROOT_DIR"] = str(tmp_path)
+    (tmp_path / "strain_mappings.json").write_text("{}")
+    npl = NPLinker(CONFIG_FILE_LOCAL_MODE)
+
+    strain = Strain("strain1")
+    gcf = GCF("gcf1")
+    gcf.strains.add(strain)
+    spec = Spectrum("spec1", [100.0, 200.0], [0.5, 1.0], 150.0)
+    spec.strains.add(strain)
+    mf = MolecularFamily("mf1")
+    mf.add_spectrum(spec)
+    npl._strains = StrainCollection()
+    npl._strains.add(strain)
+    npl._gcf_dict = {gcf.id: gcf}
+    npl._spec_dict = {spec.id: spec}
+    npl._mf_dict = {mf.id: mf}
+    return npl
+
+
+def test_save_load_snapshot(npl):
+    snapshot_file = os.path.join(npl.output_dir, NPLinker.SNAPSHOT)
+    fingerprint = npl._get_fingerprint()
+    npl._save_snapshot(snapshot_file, fingerprint)
+
+    new_npl = NPLinker(CONFIG_FILE_LOCAL_MODE)
+    assert new_npl._load_snapshot(snapshot_file, fingerprint)
+    assert [gcf.id for gcf in new_npl.gcfs] == ["gcf1"]
+    assert [mf.id for mf in new_npl.mfs] == ["mf1"]
+    assert new_npl.strains == npl.strains
+    # the links between the objects are kept
+    spec = new_npl.lookup_spectrum("spec1")
+    assert spec.family is new_npl.lookup_mf("mf1")
+    assert spec.peaks.tolist() == [[100.0, 0.5], [200.0, 1.0]]
+    assert next(iter(spec.strains)) is next(iter(new_npl.strains))
+
+
+def test_load_snapshot_outdated(npl, tmp_path):
+    snapshot_file = os.path.join(npl.output_dir, NPLinker.SNAPSHOT)
+    npl._save_snapshot(snapshot_file, npl._get_fingerprint())
+
+    # files in the output directory do not change the fingerprint
+    (tmp_path / "output" / "other_file.txt").write_text("test")
+    assert npl._load_snapshot(snapshot_file, npl._get_fingerprint())
+
+    # a new or changed input file changes the fingerprint
+    (tmp_path / "new_file.txt").write_text("test")
+    assert not npl._load_snapshot(snapshot_file, npl._get_fingerprint())
+
+
+def test_load_snapshot_invalid(npl, monkeypatch):
+    snapshot_file = os.path.join(npl.output_dir, NPLinker.SNAPSHOT)
+    fingerprint = npl._get_fingerprint()
+    assert not npl._load_snapshot(snapshot_file, fingerprint)
+
+    npl._save_snapshot(snapshot_file, fingerprint)
+    monkeypatch.setattr(NPLinker, "SNAPSHOT_VERSION", NPLinker.SNAPSHOT_VERSION + 1)
+    assert not npl._load_snapshot(snapshot_file, fingerprint)
+
+    with open(snapshot_file, "wb") as f:
+        f.write(b"not a pickle")
+    assert not npl._load_snapshot(snapshot_file, fingerprint)
+
+    # the snapshot refers to a class that no longer exists
+    with open(snapshot_file, "wb") as f:
+        pickle.dump({"version": NPLinker.SNAPSHOT_VERSION, "fingerprint": fingerprint}, f)
+        f.write(b"cnplinker.nplinker\nNoSuchClass\n.")
+    assert not npl._load_snapshot(snapshot_file, fingerprint)
+
+
+def test_fingerprint_file_content(npl, tmp_path):
+    mappings_file = tmp_path / "strain_mappings.json"
+    other_file = tmp_path / "other.json"
+    other_file.write_text("{}")
+    fingerprint = npl._get_fingerprint()
+
+    # rewriting a regenerated file with the same content keeps the fingerprint
+    os.utime(mappings_file, ns=(0, 0))
+    mappings_file.write_text("{}")
+    assert npl._get_fingerprint() == fingerprint
+
+    # changing the content of a regenerated file changes the fingerprint, even if the size is
+    # the same
+    mappings_file.write_text("[]")
+    assert npl._get_fingerprint() != fingerprint
+    fingerprint = npl._get_fingerprint()
+
+    # other files are fingerprinted by their modification time, their content is not read
+    os.utime(other_file, ns=(0, 0))
+    assert npl._get_fingerprint() != fingerprint
+
+
+def test_load_data_failed_no_snapshot(npl, monkeypatch):
+    monkeypatch.setattr("nplinker.nplinker.DatasetArranger.arrange", lambda self: None)
+    monkeypatch.setattr("nplinker.nplinker.DatasetLoader.load", lambda self: False)
+    npl.load_data(use_snapshot=True)
+    assert not os.path.exists(os.path.join(npl.output_dir, NPLinker.SNAPSHOT))
+
+    monkeypatch.setattr("nplinker.nplinker.DatasetLoader.load", lambda self: True)
+    npl.load_data(use_snapshot=True)
+    assert os.path.exists(os.path.join(npl.output_dir, NPLinker.SNAPSHOT))
+
+
+def test_load_data_no_snapshot_by_default(npl, monkeypatch):
+    monkeypatch.setattr("nplinker.nplinker.DatasetArranger.arrange", lambda self: None)
+    monkeypatch.setattr("nplinker.nplinker.DatasetLoader.load", lambda self: True)
+    npl.load_data()
+    assert not os.path.exists(os.path.join(npl.output_dir, NPLinker.SNAPSHOT))